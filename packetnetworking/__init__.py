@@ -1,3 +1,11 @@
-from .builder import Builder
-
 __all__ = ["Builder"]
+
+
+def __getattr__(name):
+    # Builder pulls in the hooks and discovery code, only import it when it is
+    # actually asked for so `python -m packetnetworking --help` stays cheap.
+    if name == "Builder":
+        from .builder import Builder
+
+        return Builder
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
@@ -1,12 +1,22 @@
 from .metadata import Metadata
+from . import profiles
+from . import steering
 from . import utils
-from .distros import get_distro_builder
 from .hooks import trigger_hook
+from . import tracing
 import logging
-import requests
+import math
 
 log = logging.getLogger()
 
+# How slaves wait for the first one before being brought up, "carrier" polls
+# its link for up to `timeout` seconds while "sleep" always waits that long.
+DEFAULT_LINK_WAIT = {"mode": "carrier", "timeout": 4}
+LINK_WAIT_MODES = ("carrier", "sleep")
+# How long boot waits, in seconds, for the bond or primary interface to come
+# online before network-online.target is reached anyway
+DEFAULT_WAIT_ONLINE = {"timeout": 30}
+
 
 class Builder(object):
     def __init__(self, metadata=None):
@@ -23,8 +33,13 @@ class Builder(object):
         return getattr(self.metadata, attr)
 
     def load_metadata(self, url, **request_args):
-        response = requests.get(url, **request_args)
-        response.raise_for_status()
+        # requests (and urllib3) is only needed when metadata isn't provided
+        # from a file, so don't pay for importing it up front.
+        import requests
+
+        with tracing.span("builder.load_metadata", url=url):
+            response = requests.get(url, **request_args)
+            response.raise_for_status()
         self.set_metadata(response.json())
         return self
 
@@ -36,24 +51,34 @@ class Builder(object):
         return self.metadata
 
     def get_builder(self, distro):
-        builder = get_distro_builder(distro)
+        from .distros import get_distro_builder
+
+        version = None
+        if self.metadata is not None:
+            version = self.metadata.operating_system.get("version")
+        builder = get_distro_builder(distro, version)
         if not builder:
             raise LookupError("No builders found for distro '{}'".format(distro))
         return builder
 
     def trigger(self, hook, *args, **kwargs):
-        return trigger_hook(hook, self, *args, **kwargs)
+        with tracing.span("hook." + hook):
+            return trigger_hook(hook, self, *args, **kwargs)
 
     def initialize(self):
         self.initialized = False
         if self.metadata is None:
             raise Exception("Metadata must be loaded before calling initialize")
-        metadata_private_subnets = self.metadata.get("private_subnets")
-        if metadata_private_subnets is not None:
-            self.network.private_subnets = metadata_private_subnets
-        self.network.load(self.metadata.network)
-        self.initialized = True
-        self.trigger("initialized")
+        with tracing.span("builder.initialize"):
+            metadata_private_subnets = self.metadata.get("private_subnets")
+            if metadata_private_subnets is not None:
+                self.network.private_subnets = list(metadata_private_subnets)
+            # Lets hooks narrow down which NICs are probed, through
+            # self.network.discovery, before any udev work is done.
+            self.trigger("pre_discovery")
+            self.network.load(self.metadata.network, plan=self.metadata.get("plan"))
+            self.initialized = True
+            self.trigger("initialized")
         return self
 
     def run(self, rootfs_path):
@@ -61,10 +86,12 @@ class Builder(object):
             raise Exception("Builder must be initialized before calling run")
 
         os = self.metadata.operating_system
-        DistroBuilder = self.get_builder(os.distro)
-        builder = DistroBuilder(self)
-        builder.build()
-        return builder.run(rootfs_path)
+        with tracing.span("builder.run", distro=os.distro, version=os.version):
+            DistroBuilder = self.get_builder(os.distro)
+            builder = DistroBuilder(self)
+            with tracing.span("builder.build"):
+                builder.build()
+            return builder.run(rootfs_path)
 
     def as_dict(self):
         return {"metadata": self.metadata, "network": self.network.as_dict()}
@@ -73,30 +100,59 @@ class Builder(object):
 class NetworkData(object):
     def __init__(self, default_resolvers=None, default_private_subnets=None):
         self.nw_metadata = None
+        self.plan = None
+        self.backend = None
+        self.persistent_names = None
         self.bonding = None
         self.interfaces = None
         self.physical_interfaces = None
         self.bonds = None
+        self.link_wait = None
+        self.wait_online = None
+        self.mtu = None
+        self.ipv6_fast_ready = False
+        self.sysctl = None
         self.addresses = None
         self.resolvers = default_resolvers
+        self.resolver = None
         self.private_subnets = default_private_subnets
+        self.discovery = utils.DiscoveryFilter()
 
-    def load(self, nw_metadata):
+    def load(self, nw_metadata, plan=None):
         self.nw_metadata = nw_metadata
+        self.plan = plan
+        self.backend = self.backend or nw_metadata.get("backend")
+        self.persistent_names = nw_metadata.get("persistent_names")
         self.build_bonding()
         self.build_interfaces()
         self.build_bonds()
+        self.build_mtu()
+        self.build_tuning()
+        self.build_steering()
+        self.build_link_wait()
+        self.build_wait_online()
+        self.build_ipv6_fast_ready()
+        self.build_sysctl()
         self.build_addresses()
+        self.build_private_subnets()
         self.build_resolvers()
+        self.build_resolver()
 
     def build_bonding(self):
         self.bonding = self.nw_metadata.bonding
         self.bonding["link_aggregation"] = (
             self.bonding.get("link_aggregation") or "bonded"
         )
+        self.bonding["options"] = profiles.bonding_options(
+            self.bonding.get("mode"), self.plan, self.bonding
+        )
 
     def build_interfaces(self):
-        physical_ifaces = utils.get_interfaces()
+        # NICs handed over up front, by a hook or a test harness, aren't
+        # discovered again
+        physical_ifaces = self.physical_interfaces
+        if physical_ifaces is None:
+            physical_ifaces = utils.get_interfaces(discovery=self.discovery)
         matched_ifaces = utils.get_matched_interfaces(
             self.nw_metadata.interfaces, physical_ifaces
         )
@@ -104,6 +160,10 @@ class NetworkData(object):
             log.debug("Physical Interfaces: {}".format(physical_ifaces))
             log.debug("Metadata Interfaces: {}".format(self.nw_metadata.interfaces))
             raise LookupError("No interfaces matched ones provided from metadata")
+        for iface in matched_ifaces:
+            for key in utils.LINK_STATE_KEYS:
+                iface.setdefault(key, None)
+            iface["link_rank"] = utils.link_rank(iface)
         self.interfaces = utils.RecursiveAttributes(matched_ifaces)
         self.physical_interfaces = utils.RecursiveAttributes(physical_ifaces)
 
@@ -116,19 +176,144 @@ class NetworkData(object):
                 else:
                     self.bonds[iface.bond].append(iface)
 
+    def build_mtu(self):
+        """
+        Resolves the MTU of every bond and interface from the metadata's
+        `network.mtu`, either a number or a mapping of bond/interface names,
+        `default` and `ipv6` to MTUs, falling back to the plan's default.
+        Slaves always get the MTU of their bond.
+        """
+        mtu = self.nw_metadata.get("mtu")
+        if not isinstance(mtu, dict):
+            mtu = {"default": mtu}
+        default = mtu.get("default") or profiles.PLAN_MTU.get((self.plan or "").lower())
+
+        bonds = {bond: mtu.get(bond) or default for bond in self.bonds}
+        for iface in self.interfaces:
+            if iface.get("bond") in bonds:
+                if iface.get("mtu") and iface.mtu != bonds[iface.bond]:
+                    log.warning(
+                        "Ignoring MTU {} of {}, slaves use the MTU of {}".format(
+                            iface.mtu, iface.name, iface.bond
+                        )
+                    )
+                iface["mtu"] = bonds[iface.bond]
+            else:
+                iface["mtu"] = (
+                    iface.get("mtu")
+                    or mtu.get(iface.meta_name)
+                    or mtu.get(iface.name)
+                    or default
+                )
+        self.mtu = utils.RecursiveAttributes(
+            {"default": default, "bonds": bonds, "ipv6": mtu.get("ipv6")}
+        )
+
+    def build_tuning(self):
+        network_tuning = self.nw_metadata.get("tuning")
+        for iface in self.interfaces:
+            iface["tuning"] = profiles.nic_tuning(
+                self.plan, network_tuning, iface.get("tuning")
+            )
+
+    def build_steering(self):
+        """
+        Plans RPS/XPS and interrupt steering for the interfaces whose queues
+        were probed, if enabled by the metadata's `network.steering` or else by
+        the plan.
+        """
+        enabled = self.nw_metadata.get("steering")
+        if enabled is None:
+            enabled = (self.plan or "").lower() in profiles.PLAN_STEERING
+        topology = None
+        for iface in self.interfaces:
+            iface["steering"] = None
+            if not enabled or not iface.get("hardware"):
+                continue
+            if topology is None:
+                topology = steering.read_topology()
+            iface["steering"] = steering.plan(iface.hardware, topology)
+
+    def build_sysctl(self):
+        # the interface carrying the addresses
+        link = "bond0"
+        if self.bonding.link_aggregation == "individual":
+            link = self.interfaces[0]["name"] if self.interfaces else None
+        self.sysctl = profiles.sysctl_settings(
+            self.plan, self.nw_metadata.get("sysctl"), self.ipv6_fast_ready, link
+        )
+
+    def build_ipv6_fast_ready(self):
+        self.ipv6_fast_ready = profiles.ipv6_fast_ready(
+            self.plan, self.nw_metadata.get("ipv6_fast_ready")
+        )
+
+    def build_link_wait(self):
+        link_wait = dict(DEFAULT_LINK_WAIT)
+        link_wait.update(self.nw_metadata.get("link_wait") or {})
+        if link_wait["mode"] not in LINK_WAIT_MODES:
+            log.warning(
+                "Unknown link_wait mode '{}', using '{}'".format(
+                    link_wait["mode"], DEFAULT_LINK_WAIT["mode"]
+                )
+            )
+            link_wait["mode"] = DEFAULT_LINK_WAIT["mode"]
+        try:
+            timeout = float(link_wait["timeout"])
+        except (TypeError, ValueError):
+            timeout = -1
+        if timeout < 0:
+            log.warning(
+                "Invalid link_wait timeout '{}', using {}".format(
+                    link_wait["timeout"], DEFAULT_LINK_WAIT["timeout"]
+                )
+            )
+            timeout = DEFAULT_LINK_WAIT["timeout"]
+        # wait-for-link counts its tries with shell integer arithmetic
+        link_wait["timeout"] = int(math.ceil(timeout))
+        self.link_wait = utils.RecursiveAttributes(link_wait)
+
+    def build_wait_online(self):
+        wait_online = dict(DEFAULT_WAIT_ONLINE)
+        wait_online.update(self.nw_metadata.get("wait_online") or {})
+        self.wait_online = utils.RecursiveAttributes(wait_online)
+
     def build_addresses(self):
         self.addresses = utils.IPAddressList(self.nw_metadata.addresses)
 
+    def build_private_subnets(self):
+        if self.private_subnets is None:
+            return
+        onlink = [
+            "{}/{}".format(a.network, a.cidr)
+            for a in self.addresses.ipv4
+            if a.get("network") and a.get("cidr") is not None
+        ]
+        self.private_subnets = utils.collapse_subnets(self.private_subnets, onlink)
+
     def build_resolvers(self):
         self.resolvers = utils.resolvers(self.resolvers)
 
+    def build_resolver(self):
+        self.resolver = utils.RecursiveAttributes(
+            profiles.resolver_settings(self.nw_metadata.get("resolver"))
+        )
+
     def as_dict(self):
         return {
+            "backend": self.backend,
+            "persistent_names": self.persistent_names,
             "bonding": self.bonding,
             "interfaces": self.interfaces,
             "physical_interfaces": self.physical_interfaces,
             "bonds": self.bonds,
+            "link_wait": self.link_wait,
+            "wait_online": self.wait_online,
+            "mtu": self.mtu,
+            "ipv6_fast_ready": self.ipv6_fast_ready,
+            "sysctl": self.sysctl,
             "addresses": self.addresses,
             "resolvers": self.resolvers,
+            "resolver": self.resolver,
             "private_subnets": self.private_subnets,
         }
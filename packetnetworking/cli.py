@@ -1,9 +1,11 @@
+import contextlib
 import sys
 import time
 import json
 import click
 import logging
 from packetnetworking import builder as sysbuilder
+from packetnetworking import tracing
 
 log = logging.getLogger("packetnetworking")
 
@@ -36,12 +38,48 @@ log = logging.getLogger("packetnetworking")
         + "(otherwise uses ones from /etc/resolv.conf)"
     ),
 )
+@click.option(
+    "--network-backend",
+    envvar="PACKET_NETWORK_BACKEND",
+    help=(
+        "Network configuration backend to render for (ex: networkd), "
+        + "overriding the distro's default"
+    ),
+)
 @click.option(
     "-n",
     "--max-attempts",
     default=10,
     help="Retry up to N times on failure when downloading metadata from a url",
 )
+@click.option(
+    "--trace",
+    envvar="PACKET_TRACE",
+    help=(
+        "Record spans as OTLP/JSON to a file, "
+        + "or to an OTLP/HTTP collector if a URL is given"
+    ),
+)
+@click.option(
+    "--profile",
+    is_flag=False,
+    flag_value="packet-networking.prof",
+    type=click.Path(dir_okay=False),
+    help="Profile the run, writing the results to PATH (packet-networking.prof)",
+)
+@click.option(
+    "--profile-format",
+    type=click.Choice(["pstats", "collapsed"]),
+    default="pstats",
+    help="Write a pstats dump or a flamegraph ready collapsed stack file",
+)
+@click.option(
+    "--profile-memory",
+    type=int,
+    default=0,
+    metavar="N",
+    help="Also trace allocations and report the top N allocation sites",
+)
 @click.option("-v", "--verbose", count=True, help="Provide more detailed output")
 @click.option("-q", "--quiet", is_flag=True, help="Silences all output")
 def cli(
@@ -50,7 +88,12 @@ def cli(
     operating_system,
     rootfs,
     resolvers,
+    network_backend,
     max_attempts,
+    trace,
+    profile,
+    profile_format,
+    profile_memory,
     verbose,
     quiet,
 ):
@@ -82,18 +125,60 @@ def cli(
             )
         )
 
-    attempt = 1
-    while True:
-        try:
-            try_run(
+    profiler = contextlib.nullcontext()
+    if profile or profile_memory:
+        from packetnetworking import profiling
+
+        profiler = profiling.Profiler(profile, profile_format, profile_memory)
+
+    if trace:
+        tracing.enable()
+    try:
+        with profiler, tracing.span("packet-networking", rootfs=rootfs):
+            run_with_retries(
                 metadata_file,
                 metadata_url,
                 operating_system,
                 rootfs,
                 resolvers,
+                network_backend,
+                max_attempts,
                 verbose,
                 quiet,
             )
+    finally:
+        if trace:
+            try:
+                tracing.disable().export(trace)
+            except Exception as exc:
+                log.error("Unable to export trace to '{}': {}".format(trace, exc))
+
+
+def run_with_retries(
+    metadata_file,
+    metadata_url,
+    operating_system,
+    rootfs,
+    resolvers,
+    network_backend,
+    max_attempts,
+    verbose,
+    quiet,
+):
+    attempt = 1
+    while True:
+        try:
+            with tracing.span("attempt", attempt=attempt):
+                try_run(
+                    metadata_file,
+                    metadata_url,
+                    operating_system,
+                    rootfs,
+                    resolvers,
+                    network_backend,
+                    verbose,
+                    quiet,
+                )
             break
         except Exception as exc:
             # If a metadata file has been passed, retrying won't result in a
@@ -113,12 +198,21 @@ def cli(
 
 
 def try_run(
-    metadata_file, metadata_url, operating_system, rootfs, resolvers, verbose, quiet
+    metadata_file,
+    metadata_url,
+    operating_system,
+    rootfs,
+    resolvers,
+    network_backend,
+    verbose,
+    quiet,
 ):
     builder = setup_builder(metadata_file, metadata_url)
 
     set_os(builder, operating_system, quiet)
 
+    set_network_backend(builder, network_backend)
+
     builder.initialize()
 
     set_resolvers(builder, resolvers)
@@ -185,6 +279,11 @@ def set_os(builder, operating_system, quiet):
             )
 
 
+def set_network_backend(builder, network_backend):
+    if network_backend:
+        builder.network.backend = network_backend.lower()
+
+
 def set_resolvers(builder, resolvers):
     if resolvers:
         resolvers = [x for x in resolvers.split(",") if x.strip()]
@@ -177,3 +177,44 @@ def make_interfaces_dhcp_metadata(metadata):
         return md
 
     return _make_interfaces_dhcp_metadata
+
+
+@pytest.fixture
+def fake_sysfs(tmp_path):
+    """
+    Builds a fake /sys tree and points utils.SYSFS_NET at its class/net.
+    """
+    from . import utils
+
+    class FakeSysfs:
+        def __init__(self, root):
+            self.root = root
+            self.net = root / "class" / "net"
+            self.net.mkdir(parents=True)
+            self.ifindex = 1
+
+        def write(self, path, value):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("{}\n".format(value))
+
+        def add_netdev(self, name, mac, driver=None, pci=None, **attrs):
+            dev = self.net / name
+            dev.mkdir()
+            self.ifindex += 1
+            self.write(dev / "address", mac)
+            self.write(dev / "ifindex", self.ifindex)
+            if driver:
+                pci = pci or "0000:00:{:02x}.0".format(self.ifindex)
+                device = self.root / "devices" / "pci0000:00" / pci
+                drivers = self.root / "bus" / "pci" / "drivers" / driver
+                drivers.mkdir(parents=True, exist_ok=True)
+                device.mkdir(parents=True)
+                (device / "driver").symlink_to(drivers)
+                (dev / "device").symlink_to(device)
+            for attr, value in attrs.items():
+                self.write(dev / attr.replace("__", "/"), value)
+            return dev
+
+    sysfs = FakeSysfs(tmp_path / "sys")
+    with mock.patch.object(utils, "SYSFS_NET", str(sysfs.net) + "/"):
+        yield sysfs
@@ -1,8 +1,15 @@
-from .distro_builder import DistroBuilder, get_distro_builder
-from .network_builder import NetworkBuilder
-from .alpine import AlpineBuilder
-from .debian import DebianBuilder
-from .redhat import RedhatBuilder
+import importlib
+
+# Distro packages (and jinja2 through distro_builder) are only imported once
+# one of their names is accessed, see PEP 562.
+_lazy_attributes = {
+    "DistroBuilder": ".distro_builder",
+    "get_distro_builder": ".distro_builder",
+    "NetworkBuilder": ".network_builder",
+    "AlpineBuilder": ".alpine",
+    "DebianBuilder": ".debian",
+    "RedhatBuilder": ".redhat",
+}
 
 __all__ = [
     "DistroBuilder",
@@ -12,3 +19,13 @@ __all__ = [
     "DebianBuilder",
     "RedhatBuilder",
 ]
+
+
+def __getattr__(name):
+    try:
+        module = _lazy_attributes[name]
+    except KeyError:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,5 +1,5 @@
 from .. import NetworkBuilder
-from ...utils import generate_persistent_names_mdev
+from ...utils import generate_persistent_names_mdev, generate_wait_for_link
 
 
 class AlpineBondedNetwork(NetworkBuilder):
@@ -15,5 +15,7 @@ class AlpineBondedNetwork(NetworkBuilder):
         self.task_template("etc/modules", "bonded/etc_modules.j2", write_mode="a")
 
         self.tasks.update(generate_persistent_names_mdev())
+        if self.network.link_wait.mode == "carrier":
+            self.tasks.update(generate_wait_for_link())
 
         return self.tasks
@@ -1,4 +1,5 @@
 from .. import DistroBuilder
+from ...utils import generate_steering_local_d
 from .bonded import AlpineBondedNetwork
 from .individual import AlpineIndividualNetwork
 
@@ -8,6 +9,9 @@ class AlpineBuilder(DistroBuilder):
     network_builders = [AlpineBondedNetwork, AlpineIndividualNetwork]
 
     def build_tasks(self):
+        super().build_tasks()
         self.task_template("etc/hostname", "etc_hostname.j2")
         self.task_template("etc/resolv.conf", "etc_resolv.conf.j2")
         self.task_template("etc/hosts", "etc_hosts.j2")
+        if any(iface.steering for iface in self.network.interfaces):
+            self.tasks.update(generate_steering_local_d())
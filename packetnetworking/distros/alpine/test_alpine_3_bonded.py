@@ -26,7 +26,7 @@ def test_alpine_3_public_bonded_task_etc_network_interfaces(alpine_3_bonded_netw
 
         auto eth1
         iface eth1 inet manual
-            pre-up sleep 4
+            pre-up /usr/local/sbin/wait-for-link eth0 4
 
         auto bond0
         iface bond0 inet static
@@ -37,11 +37,11 @@ def test_alpine_3_public_bonded_task_etc_network_interfaces(alpine_3_bonded_netw
             dns-nameservers {dns1} {dns2}
 
             bond-downdelay 200
+            bond-lacp-rate 1
             bond-miimon 100
             bond-mode {bonding_mode}
             bond-updelay 200
-            bond-xmit_hash_policy layer3+4
-            bond-lacp-rate 1
+            bond-xmit-hash-policy layer3+4
             bond-slaves eth0 eth1
 
         iface bond0 inet6 static
@@ -86,7 +86,7 @@ def test_alpine_3_private_bonded_task_etc_network_interfaces(alpine_3_bonded_net
 
         auto eth1
         iface eth1 inet manual
-            pre-up sleep 4
+            pre-up /usr/local/sbin/wait-for-link eth0 4
 
         auto bond0
         iface bond0 inet static
@@ -97,11 +97,11 @@ def test_alpine_3_private_bonded_task_etc_network_interfaces(alpine_3_bonded_net
             dns-nameservers {dns1} {dns2}
 
             bond-downdelay 200
+            bond-lacp-rate 1
             bond-miimon 100
             bond-mode {bonding_mode}
             bond-updelay 200
-            bond-xmit_hash_policy layer3+4
-            bond-lacp-rate 1
+            bond-xmit-hash-policy layer3+4
             bond-slaves eth0 eth1
     """
     ).format(
@@ -132,7 +132,7 @@ def test_alpine_3_public_bonded_task_etc_network_interfaces_with_custom_private_
 
         auto eth1
         iface eth1 inet manual
-            pre-up sleep 4
+            pre-up /usr/local/sbin/wait-for-link eth0 4
 
         auto bond0
         iface bond0 inet static
@@ -143,11 +143,11 @@ def test_alpine_3_public_bonded_task_etc_network_interfaces_with_custom_private_
             dns-nameservers {dns1} {dns2}
 
             bond-downdelay 200
+            bond-lacp-rate 1
             bond-miimon 100
             bond-mode {bonding_mode}
             bond-updelay 200
-            bond-xmit_hash_policy layer3+4
-            bond-lacp-rate 1
+            bond-xmit-hash-policy layer3+4
             bond-slaves eth0 eth1
 
         iface bond0 inet6 static
@@ -197,7 +197,7 @@ def test_alpine_3_private_bonded_task_etc_network_interfaces_with_custom_private
 
         auto eth1
         iface eth1 inet manual
-            pre-up sleep 4
+            pre-up /usr/local/sbin/wait-for-link eth0 4
 
         auto bond0
         iface bond0 inet static
@@ -208,11 +208,11 @@ def test_alpine_3_private_bonded_task_etc_network_interfaces_with_custom_private
             dns-nameservers {dns1} {dns2}
 
             bond-downdelay 200
+            bond-lacp-rate 1
             bond-miimon 100
             bond-mode {bonding_mode}
             bond-updelay 200
-            bond-xmit_hash_policy layer3+4
-            bond-lacp-rate 1
+            bond-xmit-hash-policy layer3+4
             bond-slaves eth0 eth1
     """
     ).format(
@@ -253,15 +253,15 @@ def test_alpine_3_public_bonded_task_etc_network_interfaces_with_two_bonds(
 
         auto eth1
         iface eth1 inet manual
-            pre-up sleep 4
+            pre-up /usr/local/sbin/wait-for-link eth0 4
 
         auto eth2
         iface eth2 inet manual
-            pre-up sleep 4
+            pre-up /usr/local/sbin/wait-for-link eth0 4
 
         auto eth3
         iface eth3 inet manual
-            pre-up sleep 4
+            pre-up /usr/local/sbin/wait-for-link eth0 4
 
         auto bond0
         iface bond0 inet static
@@ -272,11 +272,11 @@ def test_alpine_3_public_bonded_task_etc_network_interfaces_with_two_bonds(
             dns-nameservers {dns1} {dns2}
 
             bond-downdelay 200
+            bond-lacp-rate 1
             bond-miimon 100
             bond-mode {bonding_mode}
             bond-updelay 200
-            bond-xmit_hash_policy layer3+4
-            bond-lacp-rate 1
+            bond-xmit-hash-policy layer3+4
             bond-slaves eth0 eth1
 
         iface bond0 inet6 static
@@ -294,11 +294,11 @@ def test_alpine_3_public_bonded_task_etc_network_interfaces_with_two_bonds(
         auto bond1
         iface bond1 inet manual
             bond-downdelay 200
+            bond-lacp-rate 1
             bond-miimon 100
             bond-mode {bonding_mode}
             bond-updelay 200
-            bond-xmit_hash_policy layer3+4
-            bond-lacp-rate 1
+            bond-xmit-hash-policy layer3+4
             bond-slaves eth2 eth3
     """
     ).format(
@@ -340,6 +340,7 @@ def test_alpine_3_etc_resolvers_configured(alpine_3_bonded_network, fake):
         """\
         nameserver {resolver1}
         nameserver {resolver2}
+        options timeout:2 attempts:2
     """
     ).format(resolver1=resolver1, resolver2=resolver2)
     assert tasks["etc/resolv.conf"] == result
@@ -413,3 +414,32 @@ def test_alpine_3_persistent_interface_names(alpine_3_bonded_network):
 
     assert tasks["etc/mdev.conf"]["content"] == mdevconf_result
     assert tasks["etc/mactab"] == mactab_result
+
+
+def test_alpine_3_sysctl_profile(alpine_3_bonded_network):
+    tasks = alpine_3_bonded_network().render()
+    assert "net.core.netdev_max_backlog = 5000\n" in tasks[utils.SYSCTL_CONF]
+
+
+def test_alpine_3_ipv6_fast_ready(alpine_3_bonded_network):
+    metadata = {"network": {"ipv6_fast_ready": True}}
+    tasks = alpine_3_bonded_network(metadata=metadata).render()
+    assert (
+        "    pre-up sysctl -q -w net.ipv6.conf.bond0.accept_dad=0\n"
+        "    pre-up sysctl -q -w net.ipv6.conf.bond0.accept_ra=0\n"
+    ) in tasks["etc/network/interfaces"]
+
+
+def test_alpine_3_packet_steering_enables_local(alpine_3_bonded_network):
+    builder = alpine_3_bonded_network()
+    builder.network.interfaces[0].steering = {"cpus": [0], "rps": ["1"], "xps": ["1"]}
+    builder.build_tasks()
+    tasks = builder.render()
+
+    start = tasks["etc/local.d/packet-steering.start"]
+    assert start["mode"] == 0o755
+    assert "/usr/local/sbin/packet-steering" in start["content"]
+    script = tasks["usr/local/sbin/packet-steering"]["content"]
+    name = builder.network.interfaces[0].meta_name
+    assert "set_queue {} rx-0/rps_cpus 1\n".format(name) in script
+    assert tasks["etc/runlevels/default/local"] == {"symlink": "/etc/init.d/local"}
@@ -167,6 +167,7 @@ def test_alpine_3_etc_resolvers_configured(alpine_3_individual_network, fake):
         """\
         nameserver {resolver1}
         nameserver {resolver2}
+        options timeout:2 attempts:2
     """
     ).format(resolver1=resolver1, resolver2=resolver2)
     assert tasks["etc/resolv.conf"] == result
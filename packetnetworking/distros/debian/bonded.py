@@ -1,5 +1,8 @@
 from .. import NetworkBuilder
-from ...utils import generate_persistent_names_udev
+from ...utils import (
+    generate_private_routes,
+    generate_wait_for_link,
+)
 
 
 class DebianBondedNetwork(NetworkBuilder):
@@ -25,5 +28,9 @@ class DebianBondedNetwork(NetworkBuilder):
             )
 
         self.task_template("etc/modules", "bonded/etc_modules.j2", write_mode="a")
-        self.tasks.update(generate_persistent_names_udev())
+        self.build_persistent_names()
+        if self.ipv4pub.first and self.network.private_subnets:
+            self.tasks.update(generate_private_routes())
+        if self.network.link_wait.mode == "carrier":
+            self.tasks.update(generate_wait_for_link())
         return self.tasks
@@ -1,4 +1,7 @@
 from .. import DistroBuilder
+from ...utils import generate_steering_udev
+from ..netplan import NetplanBondedNetwork, NetplanIndividualNetwork
+from ..networkd import NetworkdBondedNetwork, NetworkdIndividualNetwork
 from .bonded import DebianBondedNetwork
 from .individual import DebianIndividualNetwork
 
@@ -6,8 +9,16 @@ from .individual import DebianIndividualNetwork
 class DebianBuilder(DistroBuilder):
     distros = ["debian", "ubuntu"]
     network_builders = [DebianBondedNetwork, DebianIndividualNetwork]
+    backends = {
+        "ifupdown": network_builders,
+        "networkd": [NetworkdBondedNetwork, NetworkdIndividualNetwork],
+        "netplan": [NetplanBondedNetwork, NetplanIndividualNetwork],
+    }
+    # Debian doesn't ship netplan.io
+    backend_distros = {"netplan": ["ubuntu"]}
 
     def build_tasks(self):
+        super().build_tasks()
         self.task_template("etc/hostname", "etc_hostname.j2")
         self.task_template("etc/hosts", "etc_hosts.j2")
         if self.metadata.operating_system.distro == "ubuntu":
@@ -17,3 +28,5 @@ class DebianBuilder(DistroBuilder):
             )
         else:
             self.task_template("etc/resolv.conf", "etc_resolv.conf.j2")
+        if any(iface.steering for iface in self.network.interfaces):
+            self.tasks.update(generate_steering_udev())
@@ -69,13 +69,17 @@ def expected_file_etc_network_interfaces_dhcp_2():
 def debianbuilder(mockit, fake, metadata, patch_dict, request):
     gen_metadata = metadata
 
-    def _builder(metadata=None, public=True, post_gen_metadata=None):
+    def _builder(
+        metadata=None, public=True, post_gen_metadata=None, phys_overrides=None
+    ):
         resolvers = reversed([fake.ipv4(), fake.ipv4()])
         meta_interfaces = request.param
         phys_interfaces = [
             {"name": iface["name"].replace("eth", "enp"), "mac": iface["mac"]}
             for iface in meta_interfaces
         ]
+        for iface in phys_interfaces:
+            iface.update((phys_overrides or {}).get(iface["name"], {}))
         _metadata = {"network": {"interfaces": meta_interfaces}}
         if metadata:
             patch_dict(_metadata, metadata)
@@ -93,7 +97,7 @@ def debianbuilder(mockit, fake, metadata, patch_dict, request):
 
 @pytest.fixture(params=["bonded", "mlag_ha"])
 def generic_debian_bonded_network(debianbuilder, patch_dict, request):
-    def _builder(distro, version, public=True, metadata=None):
+    def _builder(distro, version, public=True, metadata=None, **kwargs):
         version = str(version)
         slug = "{distro}_{version}".format(distro=distro, version=version)
         metadata = patch_dict(
@@ -107,7 +111,7 @@ def generic_debian_bonded_network(debianbuilder, patch_dict, request):
             },
             metadata or {},
         )
-        builder = debianbuilder(metadata, public=public)
+        builder = debianbuilder(metadata, public=public, **kwargs)
         builder.build()
         builder.builders = [
             builder
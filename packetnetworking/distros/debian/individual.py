@@ -1,5 +1,5 @@
 from .. import NetworkBuilder
-from ...utils import generate_persistent_names_udev
+from ...utils import generate_private_routes
 
 
 class DebianIndividualNetwork(NetworkBuilder):
@@ -16,15 +16,17 @@ class DebianIndividualNetwork(NetworkBuilder):
             template = "dhcp/etc_network_interfaces.j2"
 
         self.task_template("etc/network/interfaces", template)
+        if not self.dhcp and self.ipv4pub.first and self.network.private_subnets:
+            self.tasks.update(generate_private_routes())
 
         os = self.metadata.operating_system
 
         if os.distro == "debian" and os.version in ["10", "11"]:
-            self.tasks.update(generate_persistent_names_udev())
+            self.build_persistent_names()
         elif os.distro == "ubuntu" and os.version in [
             "18.04",
             "20.04",
             "22.04",
         ]:
-            self.tasks.update(generate_persistent_names_udev())
+            self.build_persistent_names()
         return self.tasks
@@ -1,5 +1,9 @@
+import os
+import subprocess
+import time
 from textwrap import dedent
 from .conftest import versions
+import mock
 import pytest
 
 
@@ -29,12 +33,13 @@ def test_public_bonded_task_etc_network_interfaces(
         iface lo inet loopback
         """
     result = dedent(partial)
-    for iface in sorted(builder.network.interfaces, key=lambda iface: iface.name):
-        if iface.name != builder.network.interfaces[0].name:
+    slaves = sorted(builder.network.interfaces, key=lambda iface: iface.name)
+    for iface in slaves:
+        if iface.name != slaves[0].name:
             partial = f"""
                 auto {iface.name}
                 iface {iface.name} inet manual
-                    pre-up sleep 4
+                    pre-up /usr/local/sbin/wait-for-link {slaves[0].name} 4
                     bond-master {iface.bond}
                 """
         else:
@@ -54,13 +59,13 @@ def test_public_bonded_task_etc_network_interfaces(
             dns-nameservers {" ".join(sorted(builder.network.resolvers))}
 
             bond-downdelay 200
+            bond-lacp-rate 1
             bond-miimon 100
             bond-mode {bonding_mode}
             bond-updelay 200
-            bond-xmit_hash_policy layer3+4
+            bond-xmit-hash-policy layer3+4
         """
     result += dedent(partial)
-    result += "    bond-lacp-rate 1\n"
     result += f"""    bond-slaves {' '.join(sorted(nic.name for nic in builder.network.bonds["bond0"]))}\n"""
 
     partial = f"""
@@ -73,8 +78,8 @@ def test_public_bonded_task_etc_network_interfaces(
         iface bond0:0 inet static
             address {ipv4priv.address}
             netmask {ipv4priv.netmask}
-            post-up route add -net 10.0.0.0/8 gw {ipv4priv.gateway}
-            post-down route del -net 10.0.0.0/8 gw {ipv4priv.gateway}
+            post-up ip -force -batch /etc/network/private-routes.up
+            post-down ip -force -batch /etc/network/private-routes.down
         """
     result += dedent(partial)
 
@@ -86,13 +91,13 @@ def test_public_bonded_task_etc_network_interfaces(
             auto {bond}
             iface {bond} inet manual
                 bond-downdelay 200
+                bond-lacp-rate 1
                 bond-miimon 100
                 bond-mode {bonding_mode}
                 bond-updelay 200
-                bond-xmit_hash_policy layer3+4
+                bond-xmit-hash-policy layer3+4
             """
         result += dedent(partial)
-        result += "    bond-lacp-rate 1\n"
         result += f"    bond-slaves {' '.join(sorted(nic.name for nic in members))}\n"
     assert tasks["etc/network/interfaces"] == result
 
@@ -115,12 +120,13 @@ def test_private_bonded_task_etc_network_interfaces(
         iface lo inet loopback
         """
     result = dedent(partial)
-    for iface in sorted(builder.network.interfaces, key=lambda iface: iface.name):
-        if iface.name != builder.network.interfaces[0].name:
+    slaves = sorted(builder.network.interfaces, key=lambda iface: iface.name)
+    for iface in slaves:
+        if iface.name != slaves[0].name:
             partial = f"""
                 auto {iface.name}
                 iface {iface.name} inet manual
-                    pre-up sleep 4
+                    pre-up /usr/local/sbin/wait-for-link {slaves[0].name} 4
                     bond-master {iface.bond}
                 """
         else:
@@ -140,13 +146,13 @@ def test_private_bonded_task_etc_network_interfaces(
             dns-nameservers {" ".join(sorted(builder.network.resolvers))}
 
             bond-downdelay 200
+            bond-lacp-rate 1
             bond-miimon 100
             bond-mode {bonding_mode}
             bond-updelay 200
-            bond-xmit_hash_policy layer3+4
+            bond-xmit-hash-policy layer3+4
         """
     result += dedent(partial)
-    result += "    bond-lacp-rate 1\n"
     result += f"    bond-slaves {' '.join(sorted(nic.name for nic in builder.network.bonds['bond0']))}\n"
 
     for bond, members in builder.network.bonds.items():
@@ -157,13 +163,13 @@ def test_private_bonded_task_etc_network_interfaces(
             auto {bond}
             iface {bond} inet manual
                 bond-downdelay 200
+                bond-lacp-rate 1
                 bond-miimon 100
                 bond-mode {bonding_mode}
                 bond-updelay 200
-                bond-xmit_hash_policy layer3+4
+                bond-xmit-hash-policy layer3+4
             """
         result += dedent(partial)
-        result += "    bond-lacp-rate 1\n"
         result += f"    bond-slaves {' '.join(sorted(nic.name for nic in members))}\n"
     assert tasks["etc/network/interfaces"] == result
 
@@ -186,12 +192,13 @@ def test_public_bonded_task_etc_network_interfaces_with_custom_private_ip_space(
         iface lo inet loopback
         """
     result = dedent(partial)
-    for iface in sorted(builder.network.interfaces, key=lambda iface: iface.name):
-        if iface.name != builder.network.interfaces[0].name:
+    slaves = sorted(builder.network.interfaces, key=lambda iface: iface.name)
+    for iface in slaves:
+        if iface.name != slaves[0].name:
             partial = f"""
                 auto {iface.name}
                 iface {iface.name} inet manual
-                    pre-up sleep 4
+                    pre-up /usr/local/sbin/wait-for-link {slaves[0].name} 4
                     bond-master {iface.bond}
                 """
         else:
@@ -211,13 +218,13 @@ def test_public_bonded_task_etc_network_interfaces_with_custom_private_ip_space(
             dns-nameservers {" ".join(sorted(builder.network.resolvers))}
 
             bond-downdelay 200
+            bond-lacp-rate 1
             bond-miimon 100
             bond-mode {bonding_mode}
             bond-updelay 200
-            bond-xmit_hash_policy layer3+4
+            bond-xmit-hash-policy layer3+4
         """
     result += dedent(partial)
-    result += "    bond-lacp-rate 1\n"
     result += f"""    bond-slaves {' '.join(sorted(nic.name for nic in builder.network.bonds["bond0"]))}\n"""
     partial = f"""
         iface bond0 inet6 static
@@ -229,10 +236,8 @@ def test_public_bonded_task_etc_network_interfaces_with_custom_private_ip_space(
         iface bond0:0 inet static
             address {ipv4priv.address}
             netmask {ipv4priv.netmask}
-            post-up route add -net 172.16.0.0/12 gw {ipv4priv.gateway}
-            post-down route del -net 172.16.0.0/12 gw {ipv4priv.gateway}
-            post-up route add -net 192.168.5.0/24 gw {ipv4priv.gateway}
-            post-down route del -net 192.168.5.0/24 gw {ipv4priv.gateway}
+            post-up ip -force -batch /etc/network/private-routes.up
+            post-down ip -force -batch /etc/network/private-routes.down
         """
     result += dedent(partial)
 
@@ -244,15 +249,23 @@ def test_public_bonded_task_etc_network_interfaces_with_custom_private_ip_space(
             auto {bond}
             iface {bond} inet manual
                 bond-downdelay 200
+                bond-lacp-rate 1
                 bond-miimon 100
                 bond-mode {bonding_mode}
                 bond-updelay 200
-                bond-xmit_hash_policy layer3+4
+                bond-xmit-hash-policy layer3+4
             """
         result += dedent(partial)
-        result += "    bond-lacp-rate 1\n"
         result += f"    bond-slaves {' '.join(sorted(nic.name for nic in members))}\n"
     assert tasks["etc/network/interfaces"] == result
+    for action in ("add", "del"):
+        routes = tasks[
+            "etc/network/private-routes." + ("up" if action == "add" else "down")
+        ]
+        assert [r for r in routes.splitlines() if not r.startswith("#")] == [
+            f"route {action} 172.16.0.0/12 via {ipv4priv.gateway}",
+            f"route {action} 192.168.5.0/24 via {ipv4priv.gateway}",
+        ]
 
 
 @pytest.mark.parametrize("distro,version", versions)
@@ -273,12 +286,13 @@ def test_private_bonded_task_etc_network_interfaces_with_custom_private_ip_space
         iface lo inet loopback
         """
     result = dedent(partial)
-    for iface in sorted(builder.network.interfaces, key=lambda iface: iface.name):
-        if iface.name != builder.network.interfaces[0].name:
+    slaves = sorted(builder.network.interfaces, key=lambda iface: iface.name)
+    for iface in slaves:
+        if iface.name != slaves[0].name:
             partial = f"""
                 auto {iface.name}
                 iface {iface.name} inet manual
-                    pre-up sleep 4
+                    pre-up /usr/local/sbin/wait-for-link {slaves[0].name} 4
                     bond-master {iface.bond}
                 """
         else:
@@ -298,13 +312,13 @@ def test_private_bonded_task_etc_network_interfaces_with_custom_private_ip_space
             dns-nameservers {" ".join(sorted(builder.network.resolvers))}
 
             bond-downdelay 200
+            bond-lacp-rate 1
             bond-miimon 100
             bond-mode {bonding_mode}
             bond-updelay 200
-            bond-xmit_hash_policy layer3+4
+            bond-xmit-hash-policy layer3+4
         """
     result += dedent(partial)
-    result += "    bond-lacp-rate 1\n"
     result += f"""    bond-slaves {' '.join(sorted(nic.name for nic in builder.network.bonds["bond0"]))}\n"""
 
     for bond, members in builder.network.bonds.items():
@@ -315,13 +329,13 @@ def test_private_bonded_task_etc_network_interfaces_with_custom_private_ip_space
             auto {bond}
             iface {bond} inet manual
                 bond-downdelay 200
+                bond-lacp-rate 1
                 bond-miimon 100
                 bond-mode {bonding_mode}
                 bond-updelay 200
-                bond-xmit_hash_policy layer3+4
+                bond-xmit-hash-policy layer3+4
             """
         result += dedent(partial)
-        result += "    bond-lacp-rate 1\n"
         result += f"    bond-slaves {' '.join(sorted(nic.name for nic in members))}\n"
     assert tasks["etc/network/interfaces"] == result
 
@@ -358,6 +372,7 @@ def test_etc_systemd_resolved_configured(bonded_network_builder, fake, distro, v
         result = f"""\
             nameserver {resolver1}
             nameserver {resolver2}
+            options timeout:2 attempts:2
         """
         assert tasks["etc/resolv.conf"] == dedent(result)
 
@@ -420,3 +435,281 @@ def test_persistent_interface_names(bonded_network_builder, distro, version):
             """
         result += dedent(partial)
     assert tasks["etc/udev/rules.d/70-persistent-net.rules"] == dedent(result)
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_ipv6_fast_ready(bonded_network_builder, distro, version):
+    metadata = {"network": {"ipv6_fast_ready": True}}
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    tasks = builder.render()
+    ipv6pub = builder.ipv6pub.first
+    partial = f"""\
+        iface bond0 inet6 static
+            address {ipv6pub.address}
+            netmask {ipv6pub.cidr}
+            gateway {ipv6pub.gateway}
+            dad-attempts 0
+            accept_ra 0
+        """
+    assert dedent(partial) in tasks["etc/network/interfaces"]
+    sysctl = tasks["etc/sysctl.d/60-packet-network.conf"]
+    assert "net.ipv6.conf.default.optimistic_dad = 1\n" in sysctl
+    assert "net.ipv6.conf.bond0.use_optimistic = 1\n" in sysctl
+
+    tasks = bonded_network_builder(distro, version).render()
+    assert "dad-attempts" not in tasks["etc/network/interfaces"]
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_resolver_profile(bonded_network_builder, distro, version):
+    metadata = {
+        "network": {
+            "resolver": {
+                "rotate": True,
+                "single_request_reopen": True,
+                "cache": True,
+                "dns_stub_listener": False,
+                "fallback_dns": [],
+            }
+        }
+    }
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    builder.network.resolvers = ("147.75.207.207", "2001:4860:4860::8888")
+    tasks = builder.render()
+    if distro == "ubuntu":
+        result = """\
+            [Resolve]
+            DNS=147.75.207.207 2001:4860:4860::8888
+            Cache=yes
+            DNSStubListener=no
+            FallbackDNS=
+            """
+        assert tasks["etc/systemd/resolved.conf"] == dedent(result)
+    else:
+        result = """\
+            nameserver 147.75.207.207
+            nameserver 2001:4860:4860::8888
+            options timeout:2 attempts:2 rotate single-request-reopen
+            """
+        assert tasks["etc/resolv.conf"] == dedent(result)
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_persistent_interface_names_keyed(bonded_network_builder, distro, version):
+    metadata = {"network": {"persistent_names": "keyed"}}
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    tasks = builder.render()
+
+    rules = tasks["etc/udev/rules.d/70-persistent-net.rules"].splitlines()
+    assert rules[2] == 'SUBSYSTEM!="net", GOTO="packet_persistent_net_end"'
+    assert 'ATTR{dev_id}!="0x0", GOTO="packet_persistent_net_end"' in rules
+    assert rules[-1] == 'LABEL="packet_persistent_net_end"'
+    for iface in builder.network.interfaces:
+        rule = f'ATTR{{address}}=="{iface.mac}", NAME="{iface.name}"'
+        assert rule in rules
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_persistent_interface_names_link(bonded_network_builder, distro, version):
+    metadata = {"network": {"persistent_names": "link", "mtu": 9000}}
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    tasks = builder.render()
+
+    assert "etc/udev/rules.d/70-persistent-net.rules" not in tasks
+    for iface in builder.network.interfaces:
+        link = tasks["etc/systemd/network/70-{}.link".format(iface.name)]
+        assert link.endswith(
+            f"[Match]\nMACAddress={iface.mac}\n\n[Link]\nName={iface.name}\n"
+            "MTUBytes=9000\n"
+        )
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_bonded_slaves_without_carrier_come_last(
+    bonded_network_builder, distro, version
+):
+    """
+    Slaves known to have no carrier are brought up last, by hotplug and without
+    the delay, so they don't stall boot.
+    """
+    phys_overrides = {
+        "enp0": {"carrier": False, "operstate": "down"},
+        "enp1": {"carrier": True, "operstate": "up", "speed": 25000},
+    }
+    builder = bonded_network_builder(distro, version, phys_overrides=phys_overrides)
+    tasks = builder.render()
+    content = tasks["etc/network/interfaces"]
+
+    assert "auto enp0\n" not in content
+    assert (
+        "allow-hotplug enp0\niface enp0 inet manual\n    bond-master bond0\n" in content
+    )
+    slave_stanzas = [
+        line.split()[1] for line in content.splitlines() if line.startswith("iface enp")
+    ]
+    assert slave_stanzas[-1] == "enp0"
+    bond0_slaves = [
+        line.split()[1:] for line in content.splitlines() if "enp0" in line
+    ][-1]
+    assert bond0_slaves[0] == "enp1"
+    assert bond0_slaves[-1] == "enp0"
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_bonded_slaves_wait_on_first_slave_brought_up(
+    bonded_network_builder, distro, version
+):
+    """
+    Slaves wait on the first slave in bring-up order, which isn't the first
+    metadata interface once slaves with link are moved ahead.
+    """
+    phys_overrides = {"enp1": {"carrier": True, "operstate": "up"}}
+    builder = bonded_network_builder(distro, version, phys_overrides=phys_overrides)
+    content = builder.render()["etc/network/interfaces"]
+
+    assert "iface enp1 inet manual\n    bond-master bond0\n" in content
+    assert (
+        "iface enp0 inet manual\n    pre-up /usr/local/sbin/wait-for-link enp1 4\n"
+        in content
+    )
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_link_wait_sleep_keeps_fixed_delay(bonded_network_builder, distro, version):
+    metadata = {"network": {"link_wait": {"mode": "sleep", "timeout": 2}}}
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    tasks = builder.render()
+
+    assert "    pre-up sleep 2\n" in tasks["etc/network/interfaces"]
+    assert "wait-for-link" not in tasks["etc/network/interfaces"]
+    assert "usr/local/sbin/wait-for-link" not in tasks
+
+
+@pytest.fixture
+def wait_for_link(bonded_network_builder, tmp_path):
+    builder = bonded_network_builder("debian", "12")
+    task = builder.render()["usr/local/sbin/wait-for-link"]
+    assert task["mode"] == 0o755
+    script = tmp_path / "wait-for-link"
+    script.write_text(task["content"])
+    run = tmp_path / "run"
+    run.mkdir()
+
+    def _wait_for_link(iface, flags, carrier, timeout=1):
+        sysfs = tmp_path / "sys" / "class" / "net" / iface
+        sysfs.mkdir(parents=True, exist_ok=True)
+        (sysfs / "flags").write_text(flags + "\n")
+        (sysfs / "carrier").write_text(carrier + "\n")
+        env = dict(os.environ, SYSFS=str(tmp_path / "sys"), RUNDIR=str(run))
+        start = time.monotonic()
+        subprocess.run(["sh", str(script), iface, str(timeout)], env=env, check=True)
+        return time.monotonic() - start
+
+    return _wait_for_link
+
+
+def test_wait_for_link_returns_once_carrier_is_up(wait_for_link):
+    assert wait_for_link("enp0", "0x1003", "1", timeout=5) < 1
+
+
+def test_wait_for_link_skips_interfaces_that_are_down(wait_for_link):
+    assert wait_for_link("enp0", "0x1002", "0", timeout=5) < 1
+
+
+def test_wait_for_link_only_times_out_once(wait_for_link):
+    assert wait_for_link("enp0", "0x1003", "0", timeout=1) >= 1
+    assert wait_for_link("enp0", "0x1003", "0", timeout=5) < 1
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_bonding_options_from_plan(bonded_network_builder, distro, version):
+    builder = bonded_network_builder(
+        distro, version, metadata={"plan": "n3.xlarge.x86"}
+    )
+    tasks = builder.render()
+    assert (
+        "    bond-ad-select bandwidth\n    bond-downdelay 200\n"
+        in tasks["etc/network/interfaces"]
+    )
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_bonded_mtu(bonded_network_builder, distro, version):
+    """Slaves are configured with the MTU of their bond"""
+    metadata = {"network": {"mtu": {"bond0": 9000, "ipv6": 1500}}}
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    content = builder.render()["etc/network/interfaces"]
+
+    slaves = builder.network.bonds["bond0"]
+    assert content.count("    mtu 9000\n    bond-master bond0\n") == len(slaves)
+    assert content.count("    mtu 9000\n") == len(slaves) + 1
+    assert "    mtu 9000\n    bond-downdelay 200\n" in content
+    assert "    post-up sysctl -q -w net.ipv6.conf.bond0.mtu=1500\n" in content
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_bonded_nic_tuning(bonded_network_builder, distro, version):
+    metadata = {"network": {"tuning": {"channels": {"combined": 8}}}}
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    content = builder.render()["etc/network/interfaces"]
+
+    for iface in builder.network.interfaces:
+        assert (
+            "    post-up ethtool -L {} combined 8 || true\n"
+            "    bond-master {}\n".format(iface.name, iface.bond)
+        ) in content
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_packet_steering(bonded_network_builder, tmp_path, distro, version):
+    hardware = {"numa_node": 1, "rx_queues": 2, "tx_queues": 2}
+    phys_overrides = {"enp0": {"hardware": hardware}, "enp1": {"hardware": {}}}
+    metadata = {"network": {"steering": True}}
+    topology = {0: [0, 1], 1: [2, 3, 4, 5]}
+    with mock.patch("packetnetworking.steering.read_topology", return_value=topology):
+        builder = bonded_network_builder(
+            distro, version, metadata=metadata, phys_overrides=phys_overrides
+        )
+    tasks = builder.render()
+
+    assert tasks["etc/udev/rules.d/71-packet-steering.rules"].endswith(
+        'SUBSYSTEM=="net", ACTION=="add", TEST=="device", '
+        'ATTR{address}=="00:0c:29:51:53:a0", '
+        'RUN+="/usr/local/sbin/packet-steering $name"\n'
+    )
+    script = tasks["usr/local/sbin/packet-steering"]
+    assert script["mode"] == 0o755
+    (tmp_path / "packet-steering").write_text(script["content"])
+
+    net = tmp_path / "sys" / "class" / "net" / "enp0"
+    for queue in ("rx-0/rps_cpus", "rx-1/rps_cpus", "tx-0/xps_cpus", "tx-1/xps_cpus"):
+        (net / "queues" / queue).parent.mkdir(parents=True, exist_ok=True)
+        (net / "queues" / queue).write_text("0\n")
+    (net / "device" / "msi_irqs").mkdir(parents=True)
+    irqs = (40, 41, 42, 43, 44, 45)
+    for irq in irqs:
+        (net / "device" / "msi_irqs" / str(irq)).write_text("msix\n")
+        (tmp_path / "proc" / "irq" / str(irq)).mkdir(parents=True)
+
+    env = dict(os.environ, SYSFS=str(tmp_path / "sys"), PROCFS=str(tmp_path / "proc"))
+    subprocess.run(["sh", str(tmp_path / "packet-steering")], env=env, check=True)
+
+    def read(path):
+        return path.read_text().strip()
+
+    assert read(net / "queues" / "rx-0" / "rps_cpus") == "c"
+    assert read(net / "queues" / "rx-1" / "rps_cpus") == "30"
+    assert read(net / "queues" / "tx-0" / "xps_cpus") == "c"
+    assert read(net / "queues" / "tx-1" / "xps_cpus") == "30"
+    affinities = [
+        read(tmp_path / "proc" / "irq" / str(irq) / "smp_affinity_list") for irq in irqs
+    ]
+    assert affinities == ["2", "3", "4", "5", "2", "3"]
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_sysctl_profile(bonded_network_builder, distro, version):
+    metadata = {"network": {"sysctl": {"net.core.busy_read": 50}}}
+    tasks = bonded_network_builder(distro, version, metadata=metadata).render()
+    content = tasks["etc/sysctl.d/60-packet-network.conf"]
+    assert content.endswith("net.core.busy_read = 50\n")
@@ -44,8 +44,8 @@ def test_public_individual_task_etc_network_interfaces(
         iface {iface0}:0 inet static
             address {ipv4priv.address}
             netmask {ipv4priv.netmask}
-            post-up route add -net 10.0.0.0/8 gw {ipv4priv.gateway}
-            post-down route del -net 10.0.0.0/8 gw {ipv4priv.gateway}
+            post-up ip -force -batch /etc/network/private-routes.up
+            post-down ip -force -batch /etc/network/private-routes.down
         """
     assert tasks["etc/network/interfaces"] == dedent(result)
 
@@ -110,10 +110,8 @@ def test_public_individual_task_etc_network_interfaces_with_custom_private_ip_sp
         iface {iface0}:0 inet static
             address {ipv4priv.address}
             netmask {ipv4priv.netmask}
-            post-up route add -net 172.16.0.0/12 gw {ipv4priv.gateway}
-            post-down route del -net 172.16.0.0/12 gw {ipv4priv.gateway}
-            post-up route add -net 192.168.5.0/24 gw {ipv4priv.gateway}
-            post-down route del -net 192.168.5.0/24 gw {ipv4priv.gateway}
+            post-up ip -force -batch /etc/network/private-routes.up
+            post-down ip -force -batch /etc/network/private-routes.down
         """
     assert tasks["etc/network/interfaces"] == dedent(result)
 
@@ -143,6 +141,7 @@ def test_private_individual_task_etc_network_interfaces_with_custom_private_ip_s
             dns-nameservers {" ".join(sorted(builder.network.resolvers))}
     """
     assert tasks["etc/network/interfaces"] == dedent(result)
+    assert "etc/network/private-routes.up" not in tasks
 
 
 @pytest.mark.parametrize("distro,version", versions)
@@ -167,6 +166,7 @@ def test_dns_resolver_configured(individual_network_builder, fake, distro, versi
         result = f"""\
             nameserver {resolver1}
             nameserver {resolver2}
+            options timeout:2 attempts:2
         """
         assert tasks["etc/resolv.conf"] == dedent(result)
 
@@ -1,3 +1,4 @@
+import fnmatch
 import os
 import re
 import sys
@@ -8,6 +9,7 @@ from textwrap import dedent
 from jinja2 import Template, StrictUndefined
 from jinja2.exceptions import UndefinedError
 
+from .. import tracing
 from .. import utils
 
 log = logging.getLogger()
@@ -23,6 +25,17 @@ def get_templates_dir(instance):
 class DistroBuilder(utils.Tasks):
     distros = None
     network_builders = []
+    # Alternative network builders by backend name, selected by the metadata's
+    # `network.backend` (or --network-backend) or else by `default_backends`,
+    # `network_builders` is used otherwise.
+    backends = {}
+    # Backends only shipped by some of `distros`, by backend name
+    backend_distros = {}
+    # (distro, version pattern, backend), first match wins
+    default_backends = ()
+    # (distro, version pattern, method) naming NICs when the metadata's
+    # `network.persistent_names` doesn't, first match wins and "udev" otherwise
+    default_persistent_names = ()
 
     def __init__(self, metadata):
         self.templates_base = get_templates_dir(self)
@@ -43,6 +56,70 @@ class DistroBuilder(utils.Tasks):
     def ipv4priv(self):
         return self.network.addresses.management.private.ipv4
 
+    def distro_default(self, defaults):
+        """
+        Returns the value of the first (distro, version pattern, value) entry
+        of `defaults` matching the operating system, None if none does.
+        """
+        os = self.metadata.operating_system
+        distro = (os.distro or "").lower()
+        version = str(os.version or "").lower()
+        for name, versions, default in defaults:
+            if name == distro and fnmatch.fnmatchcase(version, versions):
+                return default
+        return None
+
+    @property
+    def backend(self):
+        """
+        The name of the network backend in use, None for `network_builders`.
+        """
+        backend = getattr(self.network, "backend", None)
+        if backend is None:
+            backend = self.distro_default(self.default_backends)
+        if backend is not None and backend not in self.backends:
+            log.warning(
+                "Network backend '{}' isn't supported by {}, ignoring it".format(
+                    backend, self.__class__.__name__
+                )
+            )
+            backend = None
+        distro = (self.metadata.operating_system.distro or "").lower()
+        if (
+            backend in self.backend_distros
+            and distro not in self.backend_distros[backend]
+        ):
+            log.warning(
+                "Network backend '{}' isn't available on {}, ignoring it".format(
+                    backend, distro
+                )
+            )
+            backend = None
+        return backend
+
+    @property
+    def persistent_names(self):
+        """
+        The method giving NICs their persistent names, see
+        `utils.PERSISTENT_NAMES_METHODS`.
+        """
+        method = getattr(self.network, "persistent_names", None)
+        if method is None:
+            method = self.distro_default(self.default_persistent_names)
+        if method is not None and method not in utils.PERSISTENT_NAMES_METHODS:
+            log.warning(
+                "Unknown persistent names method '{}', using 'udev'".format(method)
+            )
+            method = None
+        return method or "udev"
+
+    def get_network_builders(self):
+        backend = self.backend
+        if backend is None:
+            return self.network_builders
+        log.debug("Using '{}' network backend".format(backend))
+        return self.backends[backend]
+
     def build(self):
         """
         Build triggers all build functions to build the list of tasks needing
@@ -53,7 +130,10 @@ class DistroBuilder(utils.Tasks):
             "Discovered {:d} {} tasks".format(len(self.tasks), self.__class__.__name__)
         )
         found_tasks = False
-        for NetworkBuilder in self.network_builders:
+        if self.network is not None:
+            # network builders name the NICs with whichever method was picked
+            self.network.persistent_names = self.persistent_names
+        for NetworkBuilder in self.get_network_builders():
             builder = NetworkBuilder(self.metadata)
             if not hasattr(builder, "templates_base"):
                 builder.templates_base = self.templates_base
@@ -70,7 +150,12 @@ class DistroBuilder(utils.Tasks):
         return self.tasks or found_tasks
 
     def build_tasks(self):
-        pass
+        """
+        Adds the tasks shared by every distro, builders extending it should
+        call it first.
+        """
+        if getattr(self.network, "sysctl", None):
+            self.tasks.update(utils.generate_sysctl_conf())
 
     def context(self):
         return {
@@ -128,6 +213,9 @@ class DistroBuilder(utils.Tasks):
             if template is None:
                 rendered_tasks[path] = template
                 continue
+            if isinstance(template, dict) and "symlink" in template:
+                rendered_tasks[path] = {"symlink": template["symlink"]}
+                continue
 
             file_mode = None
             mode = None
@@ -152,7 +240,16 @@ class DistroBuilder(utils.Tasks):
                 undefined=StrictUndefined,
             )
 
-            tmpl.environment.globals.update(generated_header=utils.generated_header)
+            tmpl.environment.globals.update(
+                generated_header=utils.generated_header,
+                ethtool_commands=utils.ethtool_commands,
+                systemd_link_tuning=utils.systemd_link_tuning,
+                systemd_bond_options=utils.systemd_bond_options,
+                networkmanager_ethtool=utils.networkmanager_ethtool,
+                netplan_bond_parameters=utils.netplan_bond_parameters,
+                netplan_offloads=utils.netplan_offloads,
+                split_resolvers=utils.split_resolvers,
+            )
 
             try:
                 content = tmpl.render(context)
@@ -184,7 +281,8 @@ class DistroBuilder(utils.Tasks):
         """
         Run processes the rendered tasks and writes them to the filesystem.
         """
-        rendered_tasks = self.render()
+        with tracing.span("render"):
+            rendered_tasks = self.render()
         if not rendered_tasks:
             return {}
         for relpath, content in rendered_tasks.items():
@@ -200,6 +298,10 @@ class DistroBuilder(utils.Tasks):
                     )
                 continue
 
+            if isinstance(content, dict) and "symlink" in content:
+                self.write_symlink(abspath, content["symlink"])
+                continue
+
             # Resolve symlinks to write to the destination file
             abspath = utils.resolve_path(rootfs_path, relpath)
 
@@ -216,24 +318,133 @@ class DistroBuilder(utils.Tasks):
                 os.makedirs(dirname, exist_ok=True)
 
             log.debug("Writing content to '{}'".format(abspath))
-            with open(abspath, file_mode) as f:
-                f.write(content)
+            with tracing.span("write", path=relpath, bytes=len(content)):
+                with open(abspath, file_mode) as f:
+                    f.write(content)
 
-            if mode:
-                os.chmod(abspath, mode)
+                if mode:
+                    os.chmod(abspath, mode)
         return rendered_tasks
 
-
-def get_distro_builder(distro):
-    catch_all = None
-    for builder in DistroBuilder.__subclasses__():
-        if isinstance(builder.distros, list) and distro.lower() in builder.distros:
-            log.debug("Using builder: {}".format(builder.__name__))
-            return builder
-        elif builder.distros == "*":
-            catch_all = builder
-    if catch_all:
-        log.debug("Using catch-all builder: {}".format(catch_all.__name__))
-    else:
-        log.debug("No builder found for '{}' distro".format(distro))
-    return catch_all
+    def write_symlink(self, abspath, target):
+        dirname = os.path.dirname(abspath)
+        if dirname and not os.path.lexists(dirname):
+            log.debug("Making directory '{}'".format(dirname))
+            os.makedirs(dirname, exist_ok=True)
+        if os.path.lexists(abspath):
+            if os.path.islink(abspath) and os.readlink(abspath) == target:
+                return
+            os.remove(abspath)
+        log.debug("Linking '{}' to '{}'".format(abspath, target))
+        os.symlink(target, abspath)
+
+
+class DistroRegistry(object):
+    """
+    Maps distro names, and optionally a version pattern, to the DistroBuilder
+    handling them. Builders can be registered as classes or as
+    'module:Class' import paths, the latter are only imported once they are
+    picked so looking up a distro loads nothing but that distro's builder.
+
+    Builders registered later take precedence, and builders published by
+    other packages under the `packetnetworking.distros` entry point group
+    (named `distro` or `distro/version-pattern`) are registered on the first
+    lookup.
+    """
+
+    entry_point_group = "packetnetworking.distros"
+
+    def __init__(self):
+        self.entries = []
+        self.cache = {}
+        self.entry_points_loaded = False
+
+    def register(self, distros, builder, versions="*"):
+        if isinstance(distros, str):
+            distros = [distros]
+        for distro in distros:
+            self.entries.append((distro.lower(), versions, builder))
+        self.cache.clear()
+        return builder
+
+    def load_entry_points(self):
+        self.entry_points_loaded = True
+        for ep in utils.entry_points(self.entry_point_group):
+            distro, _, versions = ep.name.partition("/")
+            log.debug("Registering distro builder plugin '{}'".format(ep.value))
+            self.register(distro, ep.value, versions or "*")
+
+    def find(self, distro, version):
+        catch_all = None
+        for entry in reversed(self.entries):
+            name, versions, _ = entry
+            if name == "*":
+                catch_all = catch_all or entry
+            elif name == distro and fnmatch.fnmatchcase(version, versions):
+                return entry, False
+        return catch_all, True
+
+    def lookup(self, distro, version=None):
+        distro = (distro or "").lower()
+        version = str(version or "").lower()
+        key = (distro, version)
+        if key in self.cache:
+            return self.cache[key]
+
+        if not self.entry_points_loaded:
+            self.load_entry_points()
+
+        entry, is_catch_all = self.find(distro, version)
+        builder = None
+        if entry is None:
+            log.debug("No builder found for '{}' distro".format(distro))
+        else:
+            builder = entry[2]
+            if isinstance(builder, str):
+                builder = utils.import_path(builder)
+            log.debug(
+                "Using {}builder: {}".format(
+                    "catch-all " if is_catch_all else "", builder.__name__
+                )
+            )
+        self.cache[key] = builder
+        return builder
+
+
+registry = DistroRegistry()
+registry.register(["alpine"], "packetnetworking.distros.alpine:AlpineBuilder")
+registry.register(["debian", "ubuntu"], "packetnetworking.distros.debian:DebianBuilder")
+registry.register(
+    [
+        "almalinux",
+        "centos",
+        "redhatenterprise",
+        "redhatenterpriseserver",
+        "rhel",
+        "rocky",
+    ],
+    "packetnetworking.distros.redhat:RedhatBuilder",
+)
+
+
+def register_distro_builder(builder=None, distros=None, versions="*"):
+    """
+    Class decorator registering a DistroBuilder, by default for the distros
+    listed in its `distros` attribute.
+
+        @register_distro_builder
+        class GentooBuilder(DistroBuilder):
+            distros = ["gentoo"]
+    """
+
+    def decorator(builder):
+        registry.register(distros or builder.distros, builder, versions)
+        return builder
+
+    if builder is None:
+        return decorator
+    return decorator(builder)
+
+
+def get_distro_builder(distro, version=None):
+    return registry.lookup(distro, version)
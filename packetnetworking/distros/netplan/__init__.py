@@ -0,0 +1,4 @@
+from .bonded import NetplanBondedNetwork
+from .individual import NetplanIndividualNetwork
+
+__all__ = ["NetplanBondedNetwork", "NetplanIndividualNetwork"]
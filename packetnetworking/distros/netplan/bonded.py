@@ -0,0 +1,14 @@
+from .network import NetplanNetwork
+
+
+class NetplanBondedNetwork(NetplanNetwork):
+    def build(self):
+        if self.network.bonding.link_aggregation not in ("bonded", "mlag_ha"):
+            return
+
+        super().build()
+        self.build_tasks()
+
+    def build_tasks(self):
+        self.build_netplan_tasks(bonded=True)
+        return self.tasks
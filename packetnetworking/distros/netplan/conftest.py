@@ -0,0 +1,56 @@
+import pytest
+
+from ...builder import Builder
+from ... import utils
+from ..debian import DebianBuilder
+
+versions = [["ubuntu", "20.04"], ["ubuntu", "22.04"]]
+
+
+@pytest.fixture
+def netplan_builder(mockit, fake, metadata, patch_dict):
+    gen_metadata = metadata
+
+    def _builder(
+        distro,
+        version,
+        link_aggregation,
+        public=True,
+        metadata=None,
+        post_gen_metadata=None,
+    ):
+        meta_interfaces = [
+            {"name": "eth0", "mac": "00:0c:29:51:53:a0", "bond": "bond0"},
+            {"name": "eth1", "mac": "00:0c:29:51:53:a1", "bond": "bond0"},
+        ]
+        phys_interfaces = [
+            {"name": iface["name"].replace("eth", "enp"), "mac": iface["mac"]}
+            for iface in meta_interfaces
+        ]
+        _metadata = patch_dict(
+            {
+                "network": {
+                    "backend": "netplan",
+                    "bonding": {"link_aggregation": link_aggregation},
+                    "interfaces": meta_interfaces,
+                },
+                "operating_system": {
+                    "slug": "{}_{}".format(distro, version),
+                    "distro": distro,
+                    "version": version,
+                },
+            },
+            metadata or {},
+        )
+        md = gen_metadata(_metadata, public=public)
+        if post_gen_metadata:
+            md = post_gen_metadata(md)
+        with mockit(utils.get_interfaces, return_value=phys_interfaces):
+            builder_metadata = Builder(md).initialize()
+            builder_metadata.network.resolvers = ["2.2.2.2", "1.1.1.1"]
+
+        builder = DebianBuilder(builder_metadata)
+        builder.build()
+        return builder
+
+    return _builder
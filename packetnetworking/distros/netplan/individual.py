@@ -0,0 +1,14 @@
+from .network import NetplanNetwork
+
+
+class NetplanIndividualNetwork(NetplanNetwork):
+    def build(self):
+        if self.network.bonding.link_aggregation != "individual":
+            return
+
+        super().build()
+        self.build_tasks()
+
+    def build_tasks(self):
+        self.build_netplan_tasks(bonded=False)
+        return self.tasks
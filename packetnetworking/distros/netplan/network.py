@@ -0,0 +1,66 @@
+"""
+Netplan network builders.
+
+An alternative to ifupdown for Ubuntu, picked through `DistroBuilder.backends`.
+Bonds, slaves, addresses, routes and nameservers are described by a single
+netplan file, which netplan turns into systemd-networkd configuration at
+boot.
+"""
+import logging
+
+from .. import NetworkBuilder
+from ..distro_builder import get_templates_dir
+from ..networkd.network import IFUPDOWN_LOOPBACK, task_wait_online
+
+log = logging.getLogger()
+
+NETPLAN_CONF = "etc/netplan/50-packet-networking.yaml"
+# Configuration written by cloud-init and the installers, which netplan would
+# merge with ours
+NETPLAN_DEFAULTS = (
+    "etc/netplan/00-installer-config.yaml",
+    "etc/netplan/01-netcfg.yaml",
+    "etc/netplan/50-cloud-init.yaml",
+)
+# Releases whose netplan predates `routes: [{to: default}]` and offload
+# settings, they get gateway4/gateway6 instead
+LEGACY_VERSIONS = ("18.04", "20.04")
+# NIC tuning section netplan can express, it only knows about offloads
+TUNING_SECTIONS = ("offloads",)
+
+
+class NetplanNetwork(NetworkBuilder):
+    def __init__(self, metadata):
+        super().__init__(metadata)
+        self.templates_base = get_templates_dir(self)
+
+    @property
+    def legacy(self):
+        return self.metadata.operating_system.version in LEGACY_VERSIONS
+
+    def warn_unsupported_tuning(self):
+        for iface in self.network.interfaces:
+            tuning = iface.get("tuning") or {}
+            for section, options in tuning.items():
+                if options and (self.legacy or section not in TUNING_SECTIONS):
+                    log.warning(
+                        "NIC {} tuning isn't supported by netplan, ignoring it".format(
+                            section
+                        )
+                    )
+                    return
+
+    def build_netplan_tasks(self, bonded):
+        self.task("etc/network/interfaces", IFUPDOWN_LOOPBACK)
+        for path in NETPLAN_DEFAULTS:
+            self.tasks[path] = None
+        self.warn_unsupported_tuning()
+        # netplan renders for networkd, whose wait-online gets the same scoping
+        task_wait_online(self)
+        # netplan warns about configuration readable by others
+        self.task_template(
+            NETPLAN_CONF,
+            "netplan.yaml.j2",
+            mode=0o600,
+            context={"bonded": bonded, "legacy": self.legacy, "dhcp": self.dhcp},
+        )
@@ -0,0 +1,128 @@
+from textwrap import dedent
+
+import pytest
+
+from .conftest import versions
+from . import NetplanBondedNetwork
+
+NETPLAN_CONF = "etc/netplan/50-packet-networking.yaml"
+
+
+def strip_header(content):
+    return "".join(line for line in content.splitlines(True) if line[0] != "#")
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_netplan_backend_replaces_ifupdown(netplan_builder, distro, version):
+    builder = netplan_builder(distro, version, "bonded")
+    assert [type(b) for b in builder.builders if b.tasks] == [NetplanBondedNetwork]
+    tasks = builder.render()
+    assert tasks["etc/network/interfaces"] == "auto lo\niface lo inet loopback\n"
+    assert tasks["etc/netplan/50-cloud-init.yaml"] is None
+    assert tasks[NETPLAN_CONF]["mode"] == 0o600
+
+
+def test_netplan_backend_is_ignored_on_debian(netplan_builder):
+    builder = netplan_builder("debian", "12", "bonded")
+    assert not any(isinstance(b, NetplanBondedNetwork) for b in builder.builders)
+    tasks = builder.render()
+    assert NETPLAN_CONF not in tasks
+    assert "bond0" in tasks["etc/network/interfaces"]
+
+
+def test_netplan_bonded(netplan_builder):
+    metadata = {
+        "plan": "n3.xlarge.x86",
+        "private_subnets": ["192.168.5.0/24"],
+        "network": {"tuning": {"offloads": {"lro": False}}},
+    }
+    builder = netplan_builder("ubuntu", "22.04", "bonded", metadata=metadata)
+    tasks = builder.render()
+    ipv4pub = builder.ipv4pub.first
+    ipv4priv = builder.ipv4priv.first
+    ipv6pub = builder.ipv6pub.first
+    result = f"""\
+        network:
+          version: 2
+          renderer: networkd
+          ethernets:
+            enp0:
+              match:
+                macaddress: "00:0c:29:51:53:a0"
+              set-name: enp0
+              mtu: 9000
+              large-receive-offload: false
+              optional: true
+            enp1:
+              match:
+                macaddress: "00:0c:29:51:53:a1"
+              set-name: enp1
+              mtu: 9000
+              large-receive-offload: false
+              optional: true
+          bonds:
+            bond0:
+              interfaces: [enp0, enp1]
+              macaddress: "00:0c:29:51:53:a0"
+              mtu: 9000
+              parameters:
+                mode: "802.3ad"
+                mii-monitor-interval: 100
+                down-delay: 200
+                up-delay: 200
+                transmit-hash-policy: "layer3+4"
+                lacp-rate: "fast"
+                ad-select: "bandwidth"
+              addresses:
+                - "{ipv4pub.address}/{ipv4pub.cidr}"
+                - "{ipv4priv.address}/{ipv4priv.cidr}"
+                - "{ipv6pub.address}/{ipv6pub.cidr}"
+              routes:
+                - to: default
+                  via: "{ipv4pub.gateway}"
+                - to: default
+                  via: "{ipv6pub.gateway}"
+                - to: "192.168.5.0/24"
+                  via: "{ipv4priv.gateway}"
+              nameservers:
+                addresses: ["2.2.2.2", "1.1.1.1"]
+              accept-ra: false
+        """
+    assert strip_header(tasks[NETPLAN_CONF]["content"]) == dedent(result)
+
+
+def test_netplan_bonded_legacy_gateways(netplan_builder):
+    builder = netplan_builder("ubuntu", "20.04", "bonded")
+    content = builder.render()[NETPLAN_CONF]["content"]
+    ipv4pub = builder.ipv4pub.first
+    ipv6pub = builder.ipv6pub.first
+    assert '      gateway4: "{}"\n'.format(ipv4pub.gateway) in content
+    assert '      gateway6: "{}"\n'.format(ipv6pub.gateway) in content
+    assert "to: default" not in content
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_netplan_private_only_bond(netplan_builder, distro, version):
+    metadata = {"private_subnets": ["192.168.5.0/24"]}
+    builder = netplan_builder(
+        distro, version, "bonded", public=False, metadata=metadata
+    )
+    content = builder.render()[NETPLAN_CONF]["content"]
+    ipv4priv = builder.ipv4priv.first
+    assert '- "{}/{}"\n'.format(ipv4priv.address, ipv4priv.cidr) in content
+    # the private gateway is the default route, no subnet routes needed
+    assert "192.168.5.0/24" not in content
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_netplan_extra_bonds_are_optional(netplan_builder, distro, version):
+    def post_gen_metadata(md):
+        md["network"]["interfaces"][1]["bond"] = "bond1"
+        return md
+
+    builder = netplan_builder(
+        distro, version, "bonded", post_gen_metadata=post_gen_metadata
+    )
+    content = builder.render()[NETPLAN_CONF]["content"]
+    assert "    bond1:\n      interfaces: [enp1]\n" in content
+    assert content.endswith("      optional: true\n")
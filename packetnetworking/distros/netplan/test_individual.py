@@ -0,0 +1,61 @@
+from textwrap import dedent
+
+import pytest
+
+from .conftest import versions
+from .test_bonded import NETPLAN_CONF, strip_header
+
+
+def test_netplan_individual(netplan_builder):
+    metadata = {"network": {"mtu": {"default": 9000, "ipv6": 1500}}}
+    builder = netplan_builder("ubuntu", "22.04", "individual", metadata=metadata)
+    tasks = builder.render()
+    ipv4pub = builder.ipv4pub.first
+    ipv4priv = builder.ipv4priv.first
+    ipv6pub = builder.ipv6pub.first
+    result = f"""\
+        network:
+          version: 2
+          renderer: networkd
+          ethernets:
+            enp0:
+              match:
+                macaddress: "00:0c:29:51:53:a0"
+              set-name: enp0
+              mtu: 9000
+              addresses:
+                - "{ipv4pub.address}/{ipv4pub.cidr}"
+                - "{ipv4priv.address}/{ipv4priv.cidr}"
+                - "{ipv6pub.address}/{ipv6pub.cidr}"
+              routes:
+                - to: default
+                  via: "{ipv4pub.gateway}"
+                - to: default
+                  via: "{ipv6pub.gateway}"
+                - to: "10.0.0.0/8"
+                  via: "{ipv4priv.gateway}"
+              nameservers:
+                addresses: ["2.2.2.2", "1.1.1.1"]
+              accept-ra: false
+              ipv6-mtu: 1500
+        """
+    assert strip_header(tasks[NETPLAN_CONF]["content"]) == dedent(result)
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_netplan_individual_dhcp(netplan_builder, distro, version):
+    def dhcp(metadata):
+        for iface in metadata["network"]["interfaces"]:
+            iface["dhcp"] = True
+        return metadata
+
+    builder = netplan_builder(distro, version, "individual", post_gen_metadata=dhcp)
+    content = builder.render()[NETPLAN_CONF]["content"]
+    assert "      set-name: enp0\n      dhcp4: true\n" in content
+    assert "      set-name: enp1\n      optional: true\n      dhcp4: true\n" in content
+    assert "addresses:" not in content
+    dropin = builder.render()[
+        "etc/systemd/system/systemd-networkd-wait-online.service.d/"
+        "10-packet-networking.conf"
+    ]
+    assert "--interface=enp0 --interface=enp1 --any" in dropin
@@ -1,4 +1,4 @@
-from ..utils import Tasks
+from ..utils import Tasks, generate_persistent_names
 
 
 class NetworkBuilder(Tasks):
@@ -12,6 +12,13 @@ class NetworkBuilder(Tasks):
         if self.dhcp:
             self.tasks["etc/resolv.conf"] = None
 
+    def build_persistent_names(self):
+        self.tasks.update(
+            generate_persistent_names(
+                self.network.persistent_names, self.network.interfaces
+            )
+        )
+
     @property
     def ipv4pub(self):
         return self.network.addresses.management.public.ipv4
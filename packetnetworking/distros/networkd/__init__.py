@@ -0,0 +1,4 @@
+from .bonded import NetworkdBondedNetwork
+from .individual import NetworkdIndividualNetwork
+
+__all__ = ["NetworkdBondedNetwork", "NetworkdIndividualNetwork"]
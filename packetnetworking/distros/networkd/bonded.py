@@ -0,0 +1,47 @@
+from ...utils import SYSTEMD_LINK
+from .network import NetworkdNetwork
+
+
+class NetworkdBondedNetwork(NetworkdNetwork):
+    def build(self):
+        if self.network.bonding.link_aggregation not in ("bonded", "mlag_ha"):
+            return
+
+        super().build()
+        self.build_tasks()
+
+    def build_tasks(self):
+        self.build_service_tasks()
+        for bond in self.network.bonds:
+            self.task_template(
+                self.network_path("10-{}.netdev".format(bond)),
+                "bonded/bond.netdev.j2",
+                context={"bond": bond},
+            )
+            self.task_template(
+                self.network_path("40-{}.network".format(bond)),
+                "network.j2",
+                context={
+                    "name": bond,
+                    "mtu": self.network.mtu.bonds[bond],
+                    "static": bond == "bond0",
+                },
+            )
+
+        for i, iface in enumerate(self.network.interfaces):
+            name = iface["name"]
+            self.task(
+                self.network_path("70-{}.link".format(name)),
+                SYSTEMD_LINK,
+                context={"i": i},
+            )
+            self.task_template(
+                self.network_path("30-{}.network".format(name)),
+                "bonded/slave.network.j2",
+                context={"i": i},
+            )
+
+        # the .link files above already name the NICs
+        if self.network.persistent_names != "link":
+            self.build_persistent_names()
+        return self.tasks
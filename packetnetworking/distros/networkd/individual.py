@@ -0,0 +1,35 @@
+from ...utils import SYSTEMD_LINK
+from .network import NetworkdNetwork
+
+
+class NetworkdIndividualNetwork(NetworkdNetwork):
+    def build(self):
+        if self.network.bonding.link_aggregation != "individual":
+            return
+
+        super().build()
+        self.build_tasks()
+
+    def build_tasks(self):
+        self.build_service_tasks()
+        if self.dhcp:
+            for i, iface in enumerate(self.network.interfaces):
+                self.task_template(
+                    self.network_path("40-{}.network".format(iface["name"])),
+                    "dhcp/network.j2",
+                    context={"i": i},
+                )
+            return self.tasks
+
+        iface0 = self.network.interfaces[0]
+        self.task(
+            self.network_path("70-{}.link".format(iface0["name"])),
+            SYSTEMD_LINK,
+            context={"i": 0},
+        )
+        self.task_template(
+            self.network_path("40-{}.network".format(iface0["name"])),
+            "network.j2",
+            context={"name": iface0["name"], "mtu": iface0.get("mtu"), "static": True},
+        )
+        return self.tasks
@@ -0,0 +1,78 @@
+"""
+systemd-networkd network builders.
+
+An alternative to the distros' own network configuration, picked through
+`DistroBuilder.backends`. Links, bonds and addresses are described by
+`.link`, `.netdev` and `.network` files under /etc/systemd/network, which
+networkd brings up in parallel as udev reports the links.
+"""
+from .. import NetworkBuilder
+from ..distro_builder import get_templates_dir
+
+SYSTEMD_NETWORK = "etc/systemd/network"
+SYSTEMD_UNITS = "/lib/systemd/system"
+# Symlinks under etc/systemd/system enabling systemd-networkd, as
+# `systemctl enable systemd-networkd` would
+NETWORKD_UNITS = {
+    "multi-user.target.wants/systemd-networkd.service": "systemd-networkd.service",
+    "sockets.target.wants/systemd-networkd.socket": "systemd-networkd.socket",
+    "network-online.target.wants/systemd-networkd-wait-online.service": (
+        "systemd-networkd-wait-online.service"
+    ),
+    "dbus-org.freedesktop.network1.service": "systemd-networkd.service",
+}
+
+# Scopes systemd-networkd-wait-online to the interfaces we configure, NICs
+# left unconfigured would otherwise hold boot until it times out
+NETWORKD_WAIT_ONLINE = (
+    "etc/systemd/system/systemd-networkd-wait-online.service.d/"
+    "10-packet-networking.conf"
+)
+NETWORKD_WAIT_ONLINE_TEMPLATE = """\
+{{ generated_header() }}
+[Service]
+ExecStart=
+ExecStart=/lib/systemd/systemd-networkd-wait-online{% for name in online_interfaces %} --interface={{ name }}{% endfor %}{% if online_any %} --any{% endif %} --timeout={{ net.wait_online.timeout }}
+"""  # noqa
+
+# Leaves ifupdown, if installed, nothing but the loopback to bring up
+IFUPDOWN_LOOPBACK = """\
+auto lo
+iface lo inet loopback
+"""
+
+
+def task_wait_online(builder):
+    """
+    Adds the systemd-networkd-wait-online drop-in waiting for bond0, the
+    primary interface, or any of the interfaces when they all use DHCP.
+    """
+    if builder.network.bonding.link_aggregation != "individual":
+        interfaces, any_interface = ["bond0"], False
+    elif builder.dhcp:
+        interfaces = [iface["name"] for iface in builder.network.interfaces]
+        any_interface = True
+    else:
+        interfaces, any_interface = [builder.network.interfaces[0]["name"]], False
+    return builder.task(
+        NETWORKD_WAIT_ONLINE,
+        NETWORKD_WAIT_ONLINE_TEMPLATE,
+        context={"online_interfaces": interfaces, "online_any": any_interface},
+    )
+
+
+class NetworkdNetwork(NetworkBuilder):
+    def __init__(self, metadata):
+        super().__init__(metadata)
+        self.templates_base = get_templates_dir(self)
+
+    def network_path(self, name):
+        return "{}/{}".format(SYSTEMD_NETWORK, name)
+
+    def build_service_tasks(self):
+        self.task("etc/network/interfaces", IFUPDOWN_LOOPBACK)
+        for path, unit in NETWORKD_UNITS.items():
+            self.task_symlink(
+                "etc/systemd/system/" + path, "{}/{}".format(SYSTEMD_UNITS, unit)
+            )
+        task_wait_online(self)
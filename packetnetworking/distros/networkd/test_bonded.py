@@ -0,0 +1,148 @@
+import os
+from textwrap import dedent
+
+import pytest
+
+from ..debian import DebianBondedNetwork
+from .conftest import versions
+from . import NetworkdBondedNetwork
+
+
+def strip_header(content):
+    return "".join(line for line in content.splitlines(True) if line[0] != "#")
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkd_backend_replaces_ifupdown(networkd_builder, distro, version):
+    builder = networkd_builder(distro, version, "bonded")
+    assert [type(b) for b in builder.builders if b.tasks] == [NetworkdBondedNetwork]
+    tasks = builder.render()
+    assert tasks["etc/network/interfaces"] == "auto lo\niface lo inet loopback\n"
+    assert tasks[
+        "etc/systemd/system/multi-user.target.wants/systemd-networkd.service"
+    ] == {"symlink": "/lib/systemd/system/systemd-networkd.service"}
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkd_wait_online_scoped_to_bond(networkd_builder, distro, version):
+    metadata = {"network": {"wait_online": {"timeout": 10}}}
+    builder = networkd_builder(distro, version, "bonded", metadata=metadata)
+    tasks = builder.render()
+    dropin = tasks[
+        "etc/systemd/system/systemd-networkd-wait-online.service.d/"
+        "10-packet-networking.conf"
+    ]
+    assert dropin.endswith(
+        "[Service]\nExecStart=\nExecStart=/lib/systemd/systemd-networkd-wait-online"
+        " --interface=bond0 --timeout=10\n"
+    )
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkd_unknown_backend_uses_ifupdown(networkd_builder, distro, version):
+    metadata = {"network": {"backend": "wicked"}}
+    builder = networkd_builder(distro, version, "bonded", metadata=metadata)
+    assert DebianBondedNetwork in [type(b) for b in builder.builders]
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkd_bond_netdev(networkd_builder, distro, version):
+    metadata = {"plan": "n3.xlarge.x86"}
+    builder = networkd_builder(distro, version, "bonded", metadata=metadata)
+    tasks = builder.render()
+    result = """\
+        [NetDev]
+        Name=bond0
+        Kind=bond
+        MACAddress=00:0c:29:51:53:a0
+        MTUBytes=9000
+
+        [Bond]
+        Mode=802.3ad
+        MIIMonitorSec=100ms
+        DownDelaySec=200ms
+        UpDelaySec=200ms
+        TransmitHashPolicy=layer3+4
+        LACPTransmitRate=fast
+        AdSelect=bandwidth
+        """
+    netdev = tasks["etc/systemd/network/10-bond0.netdev"]
+    assert strip_header(netdev) == dedent(result)
+    for iface in ("enp0", "enp1"):
+        slave = tasks["etc/systemd/network/30-{}.network".format(iface)]
+        assert strip_header(slave).endswith(
+            "[Link]\nMTUBytes=9000\n\n[Network]\nBond=bond0\n"
+        )
+        link = tasks["etc/systemd/network/70-{}.link".format(iface)]
+        assert "Name={}\nMTUBytes=9000\nRxBufferSize=4096\n".format(iface) in link
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkd_public_bond_network(networkd_builder, distro, version):
+    metadata = {"private_subnets": ["192.168.5.0/24", "172.16.0.0/12"]}
+    builder = networkd_builder(distro, version, "bonded", metadata=metadata)
+    tasks = builder.render()
+    ipv4pub = builder.ipv4pub.first
+    ipv4priv = builder.ipv4priv.first
+    ipv6pub = builder.ipv6pub.first
+    result = f"""\
+        [Match]
+        Name=bond0
+
+        [Link]
+        RequiredForOnline=yes
+
+        [Network]
+        Address={ipv4pub.address}/{ipv4pub.cidr}
+        Gateway={ipv4pub.gateway}
+        Address={ipv4priv.address}/{ipv4priv.cidr}
+        Address={ipv6pub.address}/{ipv6pub.cidr}
+        Gateway={ipv6pub.gateway}
+        DNS=1.1.1.1
+        DNS=2.2.2.2
+        IPv6AcceptRA=no
+
+        [Route]
+        Destination=192.168.5.0/24
+        Gateway={ipv4priv.gateway}
+
+        [Route]
+        Destination=172.16.0.0/12
+        Gateway={ipv4priv.gateway}
+        """
+    network = tasks["etc/systemd/network/40-bond0.network"]
+    assert strip_header(network) == dedent(result)
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkd_private_bond_network(networkd_builder, distro, version):
+    builder = networkd_builder(distro, version, "bonded", public=False)
+    tasks = builder.render()
+    ipv4priv = builder.ipv4priv.first
+    result = f"""\
+        [Network]
+        Address={ipv4priv.address}/{ipv4priv.cidr}
+        Gateway={ipv4priv.gateway}
+        DNS=1.1.1.1
+        DNS=2.2.2.2
+        IPv6AcceptRA=no
+        """
+    network = tasks["etc/systemd/network/40-bond0.network"]
+    assert network.endswith(dedent(result))
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkd_run_writes_symlinks(networkd_builder, tmp_path, distro, version):
+    builder = networkd_builder(distro, version, "bonded")
+    wants = tmp_path / "etc/systemd/system/sockets.target.wants"
+    wants.mkdir(parents=True)
+    (wants / "systemd-networkd.socket").write_text("stale")
+
+    builder.run(str(tmp_path))
+
+    assert os.readlink(wants / "systemd-networkd.socket") == (
+        "/lib/systemd/system/systemd-networkd.socket"
+    )
+    alias = tmp_path / "etc/systemd/system/dbus-org.freedesktop.network1.service"
+    assert os.readlink(alias) == "/lib/systemd/system/systemd-networkd.service"
+    assert (tmp_path / "etc/systemd/network/10-bond0.netdev").is_file()
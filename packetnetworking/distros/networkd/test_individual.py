@@ -0,0 +1,76 @@
+from textwrap import dedent
+
+import pytest
+
+from .conftest import versions
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkd_individual_network(networkd_builder, distro, version):
+    metadata = {"network": {"mtu": {"default": 9000, "ipv6": 1500}}}
+    builder = networkd_builder(distro, version, "individual", metadata=metadata)
+    tasks = builder.render()
+    ipv4pub = builder.ipv4pub.first
+    ipv4priv = builder.ipv4priv.first
+    ipv6pub = builder.ipv6pub.first
+    result = f"""\
+        [Match]
+        Name=enp0
+
+        [Link]
+        MTUBytes=9000
+        RequiredForOnline=yes
+
+        [Network]
+        Address={ipv4pub.address}/{ipv4pub.cidr}
+        Gateway={ipv4pub.gateway}
+        Address={ipv4priv.address}/{ipv4priv.cidr}
+        Address={ipv6pub.address}/{ipv6pub.cidr}
+        Gateway={ipv6pub.gateway}
+        DNS=1.1.1.1
+        DNS=2.2.2.2
+        IPv6AcceptRA=no
+        IPv6MTUBytes=1500
+
+        [Route]
+        Destination=10.0.0.0/8
+        Gateway={ipv4priv.gateway}
+        """
+    network = tasks["etc/systemd/network/40-enp0.network"]
+    assert network.endswith(dedent(result))
+    assert "etc/systemd/network/40-enp1.network" not in tasks
+    assert "etc/systemd/network/10-bond0.netdev" not in tasks
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkd_individual_dhcp(networkd_builder, distro, version):
+    def dhcp(metadata):
+        for iface in metadata["network"]["interfaces"]:
+            iface["dhcp"] = True
+        return metadata
+
+    builder = networkd_builder(distro, version, "individual", post_gen_metadata=dhcp)
+    tasks = builder.render()
+    for iface in ("enp0", "enp1"):
+        network = tasks["etc/systemd/network/40-{}.network".format(iface)]
+        assert network.endswith(
+            "[Match]\nName={}\n\n[Network]\nDHCP=yes\n".format(iface)
+        )
+    dropin = tasks[
+        "etc/systemd/system/systemd-networkd-wait-online.service.d/"
+        "10-packet-networking.conf"
+    ]
+    assert dropin.endswith(
+        "ExecStart=/lib/systemd/systemd-networkd-wait-online"
+        " --interface=enp0 --interface=enp1 --any --timeout=30\n"
+    )
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkd_ipv6_fast_ready(networkd_builder, distro, version):
+    metadata = {"network": {"ipv6_fast_ready": True}}
+    builder = networkd_builder(distro, version, "individual", metadata=metadata)
+    network = builder.render()["etc/systemd/network/40-enp0.network"]
+    assert "IPv6AcceptRA=no\nIPv6DuplicateAddressDetection=0\n" in network
+    sysctl = builder.render()["etc/sysctl.d/60-packet-network.conf"]
+    assert "net.ipv6.conf.enp0.optimistic_dad = 1\n" in sysctl
@@ -0,0 +1,4 @@
+from .bonded import NetworkManagerBondedNetwork
+from .individual import NetworkManagerIndividualNetwork
+
+__all__ = ["NetworkManagerBondedNetwork", "NetworkManagerIndividualNetwork"]
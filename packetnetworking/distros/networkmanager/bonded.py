@@ -0,0 +1,33 @@
+from .network import NetworkManagerNetwork
+
+
+class NetworkManagerBondedNetwork(NetworkManagerNetwork):
+    def build(self):
+        if self.network.bonding.link_aggregation not in ("bonded", "mlag_ha"):
+            return
+
+        super().build()
+        self.build_tasks()
+
+    def build_tasks(self):
+        self.build_service_tasks()
+        for bond in self.network.bonds:
+            self.task_connection(
+                bond,
+                "connection.nmconnection.j2",
+                context={
+                    "kind": "bond",
+                    "mac": self.network.interfaces[0].mac if bond == "bond0" else None,
+                    "mtu": self.network.mtu.bonds[bond],
+                    "static": bond == "bond0",
+                    "tuning": None,
+                },
+            )
+
+        for i, iface in enumerate(self.network.interfaces):
+            self.task_connection(
+                iface["name"], "slave.nmconnection.j2", context={"i": i}
+            )
+
+        self.build_persistent_names()
+        return self.tasks
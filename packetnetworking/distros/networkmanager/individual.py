@@ -0,0 +1,28 @@
+from .network import NetworkManagerNetwork
+
+
+class NetworkManagerIndividualNetwork(NetworkManagerNetwork):
+    def build(self):
+        if self.network.bonding.link_aggregation != "individual":
+            return
+
+        super().build()
+        self.build_tasks()
+
+    def build_tasks(self):
+        self.build_service_tasks()
+        iface0 = self.network.interfaces[0]
+        self.task_connection(
+            iface0["name"],
+            "connection.nmconnection.j2",
+            context={
+                "kind": "ethernet",
+                "mac": iface0.mac,
+                "mtu": iface0.get("mtu"),
+                "static": True,
+                "tuning": iface0.get("tuning"),
+            },
+        )
+
+        self.build_persistent_names()
+        return self.tasks
@@ -0,0 +1,99 @@
+"""
+NetworkManager keyfile network builders.
+
+An alternative to the RedHat family's ifcfg files, picked through
+`DistroBuilder.backends`. Bonds, slaves and interfaces are described by
+keyfile connection profiles, read by NetworkManager's native keyfile plugin
+rather than the ifcfg-rh compatibility plugin, and slaves are pinned to
+their NIC by MAC address.
+"""
+import logging
+import uuid
+
+from .. import NetworkBuilder
+from ..distro_builder import get_templates_dir
+from ...utils import split_resolvers
+
+log = logging.getLogger()
+
+SYSTEM_CONNECTIONS = "etc/NetworkManager/system-connections"
+NM_CONF = "etc/NetworkManager/conf.d/90-packet-networking.conf"
+SYSTEMD_UNITS = "/usr/lib/systemd/system"
+# Symlinks under etc/systemd/system enabling NetworkManager, as
+# `systemctl enable NetworkManager` would
+NETWORKMANAGER_UNITS = {
+    "multi-user.target.wants/NetworkManager.service": "NetworkManager.service",
+    "network-online.target.wants/NetworkManager-wait-online.service": (
+        "NetworkManager-wait-online.service"
+    ),
+    "dbus-org.freedesktop.NetworkManager.service": "NetworkManager.service",
+    "dbus-org.freedesktop.nm-dispatcher.service": "NetworkManager-dispatcher.service",
+}
+# Ahead of profiles shipped with the image and of generated defaults
+AUTOCONNECT_PRIORITY = 100
+# Profiles keep their uuid when the host is provisioned again
+UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "packet-networking")
+
+# Bounds NetworkManager-wait-online, which otherwise waits up to its own
+# default for NetworkManager to finish starting
+NM_WAIT_ONLINE = (
+    "etc/systemd/system/NetworkManager-wait-online.service.d/"
+    "10-packet-networking.conf"
+)
+NM_WAIT_ONLINE_TEMPLATE = """\
+{{ generated_header() }}
+[Service]
+ExecStart=
+ExecStart=/usr/bin/nm-online -s -q --timeout={{ net.wait_online.timeout }}
+"""
+
+NM_CONF_TEMPLATE = """\
+{{ generated_header() }}
+[main]
+plugins=keyfile
+no-auto-default=*
+"""
+
+
+def connection_uuid(name):
+    return str(uuid.uuid5(UUID_NAMESPACE, name))
+
+
+class NetworkManagerNetwork(NetworkBuilder):
+    def __init__(self, metadata):
+        super().__init__(metadata)
+        self.templates_base = get_templates_dir(self)
+
+    def task_connection(self, name, template, context):
+        context = dict(
+            context,
+            name=name,
+            uuid=connection_uuid(name),
+            priority=AUTOCONNECT_PRIORITY,
+        )
+        # NetworkManager ignores keyfiles readable by others
+        return self.task_template(
+            "{}/{}.nmconnection".format(SYSTEM_CONNECTIONS, name),
+            template,
+            mode=0o600,
+            context=context,
+        )
+
+    def warn_dropped_resolvers(self):
+        # NetworkManager refuses DNS servers in an [ipv6] section it doesn't
+        # configure, which is the case without a public IPv6 address
+        _, ipv6 = split_resolvers(self.network.resolvers or ())
+        if ipv6 and not self.ipv6pub.first:
+            log.warning(
+                "No public IPv6 address to carry the IPv6 resolvers {}, "
+                "ignoring them".format(", ".join(ipv6))
+            )
+
+    def build_service_tasks(self):
+        self.task(NM_CONF, NM_CONF_TEMPLATE)
+        self.warn_dropped_resolvers()
+        self.task(NM_WAIT_ONLINE, NM_WAIT_ONLINE_TEMPLATE)
+        for path, unit in NETWORKMANAGER_UNITS.items():
+            self.task_symlink(
+                "etc/systemd/system/" + path, "{}/{}".format(SYSTEMD_UNITS, unit)
+            )
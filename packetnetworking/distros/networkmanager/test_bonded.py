@@ -0,0 +1,171 @@
+import os
+from textwrap import dedent
+
+import pytest
+
+from ..redhat import RedhatBondedNetwork
+from .conftest import versions
+from .network import connection_uuid
+from . import NetworkManagerBondedNetwork
+
+CONNECTIONS = "etc/NetworkManager/system-connections/"
+
+
+def strip_header(content):
+    return "".join(line for line in content.splitlines(True) if line[0] != "#")
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkmanager_backend_replaces_ifcfg(networkmanager_builder, distro, version):
+    builder = networkmanager_builder(distro, version, "bonded")
+    assert [type(b) for b in builder.builders if b.tasks] == [
+        NetworkManagerBondedNetwork
+    ]
+    tasks = builder.render()
+    assert not [path for path in tasks if "network-scripts" in path]
+    assert "sbin/ifup-pre-local" not in tasks
+    conf = tasks["etc/NetworkManager/conf.d/90-packet-networking.conf"]
+    assert conf.endswith("[main]\nplugins=keyfile\nno-auto-default=*\n")
+    assert tasks[
+        "etc/systemd/system/multi-user.target.wants/NetworkManager.service"
+    ] == {"symlink": "/usr/lib/systemd/system/NetworkManager.service"}
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkmanager_wait_online_timeout(networkmanager_builder, distro, version):
+    metadata = {"network": {"wait_online": {"timeout": 10}}}
+    builder = networkmanager_builder(distro, version, "bonded", metadata=metadata)
+    tasks = builder.render()
+    dropin = tasks[
+        "etc/systemd/system/NetworkManager-wait-online.service.d/"
+        "10-packet-networking.conf"
+    ]
+    assert dropin.endswith(
+        "[Service]\nExecStart=\nExecStart=/usr/bin/nm-online -s -q --timeout=10\n"
+    )
+    bond = tasks[CONNECTIONS + "bond0.nmconnection"]["content"]
+    assert "\nwait-device-timeout=10000\n" in bond
+    for iface in builder.network.interfaces:
+        slave = tasks[CONNECTIONS + iface.name + ".nmconnection"]["content"]
+        assert "wait-device-timeout" not in slave
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkmanager_unknown_backend_uses_ifcfg(
+    networkmanager_builder, distro, version
+):
+    metadata = {"network": {"backend": "networkd"}}
+    builder = networkmanager_builder(distro, version, "bonded", metadata=metadata)
+    assert RedhatBondedNetwork in [type(b) for b in builder.builders]
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkmanager_bond_connection(networkmanager_builder, distro, version):
+    metadata = {
+        "plan": "n3.xlarge.x86",
+        "private_subnets": ["192.168.5.0/24", "172.16.0.0/12"],
+    }
+    builder = networkmanager_builder(distro, version, "bonded", metadata=metadata)
+    tasks = builder.render()
+    ipv4pub = builder.ipv4pub.first
+    ipv4priv = builder.ipv4priv.first
+    ipv6pub = builder.ipv6pub.first
+    result = f"""\
+        [connection]
+        id=bond0
+        uuid={connection_uuid("bond0")}
+        type=bond
+        interface-name=bond0
+        autoconnect=true
+        autoconnect-priority=100
+        wait-device-timeout=30000
+        autoconnect-slaves=1
+
+        [ethernet]
+        cloned-mac-address=00:0c:29:51:53:a0
+        mtu=9000
+
+        [bond]
+        mode=4
+        miimon=100
+        downdelay=200
+        updelay=200
+        xmit_hash_policy=layer3+4
+        lacp_rate=1
+        ad_select=bandwidth
+
+        [ipv4]
+        method=manual
+        address1={ipv4pub.address}/{ipv4pub.cidr},{ipv4pub.gateway}
+        address2={ipv4priv.address}/{ipv4priv.cidr}
+        route1=192.168.5.0/24,{ipv4priv.gateway}
+        route2=172.16.0.0/12,{ipv4priv.gateway}
+        dns=2.2.2.2;1.1.1.1;
+
+        [ipv6]
+        method=manual
+        address1={ipv6pub.address}/{ipv6pub.cidr},{ipv6pub.gateway}
+        """
+    connection = tasks[CONNECTIONS + "bond0.nmconnection"]
+    assert connection["mode"] == 0o600
+    assert strip_header(connection["content"]) == dedent(result)
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkmanager_private_bond_connection(
+    networkmanager_builder, distro, version
+):
+    builder = networkmanager_builder(distro, version, "bonded", public=False)
+    tasks = builder.render()
+    ipv4priv = builder.ipv4priv.first
+    result = f"""\
+        [ipv4]
+        method=manual
+        address1={ipv4priv.address}/{ipv4priv.cidr},{ipv4priv.gateway}
+        dns=2.2.2.2;1.1.1.1;
+
+        [ipv6]
+        method=ignore
+        """
+    connection = tasks[CONNECTIONS + "bond0.nmconnection"]["content"]
+    assert connection.endswith(dedent(result))
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkmanager_slave_connections(networkmanager_builder, distro, version):
+    metadata = {"network": {"tuning": {"offloads": {"lro": False}}}}
+    builder = networkmanager_builder(distro, version, "bonded", metadata=metadata)
+    tasks = builder.render()
+    for iface in builder.network.interfaces:
+        result = f"""\
+            [connection]
+            id={iface.name}
+            uuid={connection_uuid(iface.name)}
+            type=ethernet
+            master=bond0
+            slave-type=bond
+            autoconnect=true
+            autoconnect-priority=100
+
+            [ethernet]
+            mac-address={iface.mac}
+
+            [ethtool]
+            feature-lro=false
+            """
+        connection = tasks[CONNECTIONS + iface.name + ".nmconnection"]
+        assert strip_header(connection["content"]) == dedent(result)
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkmanager_run_writes_private_keyfiles(
+    networkmanager_builder, tmp_path, distro, version
+):
+    builder = networkmanager_builder(distro, version, "bonded")
+    builder.run(str(tmp_path))
+    keyfile = tmp_path / CONNECTIONS / "bond0.nmconnection"
+    assert keyfile.stat().st_mode & 0o777 == 0o600
+    alias = tmp_path / "etc/systemd/system/dbus-org.freedesktop.nm-dispatcher.service"
+    assert os.readlink(alias) == (
+        "/usr/lib/systemd/system/NetworkManager-dispatcher.service"
+    )
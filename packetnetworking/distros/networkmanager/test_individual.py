@@ -0,0 +1,78 @@
+from textwrap import dedent
+
+import pytest
+
+from .conftest import versions
+
+CONNECTIONS = "etc/NetworkManager/system-connections/"
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkmanager_individual_connection(networkmanager_builder, distro, version):
+    metadata = {
+        "network": {
+            "mtu": {"default": 9000, "ipv6": 1500},
+            "tuning": {"rings": {"rx": 4096}, "coalesce": {"adaptive_rx": True}},
+        }
+    }
+    builder = networkmanager_builder(distro, version, "individual", metadata=metadata)
+    tasks = builder.render()
+    ipv4pub = builder.ipv4pub.first
+    ipv4priv = builder.ipv4priv.first
+    ipv6pub = builder.ipv6pub.first
+    result = f"""\
+        type=ethernet
+        interface-name=enp0
+        autoconnect=true
+        autoconnect-priority=100
+        wait-device-timeout=30000
+
+        [ethernet]
+        mac-address=00:0c:29:51:53:a0
+        mtu=9000
+
+        [ethtool]
+        ring-rx=4096
+        coalesce-adaptive-rx=1
+
+        [ipv4]
+        method=manual
+        address1={ipv4pub.address}/{ipv4pub.cidr},{ipv4pub.gateway}
+        address2={ipv4priv.address}/{ipv4priv.cidr}
+        route1=10.0.0.0/8,{ipv4priv.gateway}
+        dns=2.2.2.2;1.1.1.1;
+
+        [ipv6]
+        method=manual
+        address1={ipv6pub.address}/{ipv6pub.cidr},{ipv6pub.gateway}
+        mtu=1500
+        """
+    connection = tasks[CONNECTIONS + "enp0.nmconnection"]["content"]
+    assert connection.endswith(dedent(result))
+    assert CONNECTIONS + "enp1.nmconnection" not in tasks
+    assert CONNECTIONS + "bond0.nmconnection" not in tasks
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkmanager_ipv6_resolvers(networkmanager_builder, distro, version):
+    builder = networkmanager_builder(distro, version, "individual")
+    builder.network.resolvers = ("147.75.207.207", "2001:4860:4860::8888")
+    tasks = builder.render()
+    connection = tasks[CONNECTIONS + "enp0.nmconnection"]["content"]
+    ipv4, ipv6 = connection.split("[ipv6]")
+    assert "\ndns=147.75.207.207;\n" in ipv4
+    assert "\ndns=2001:4860:4860::8888;\n" in ipv6
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_networkmanager_warns_about_dropped_ipv6_resolvers(
+    networkmanager_builder, caplog, distro, version
+):
+    builder = networkmanager_builder(distro, version, "individual", public=False)
+    builder.network.resolvers = ("147.75.207.207", "2001:4860:4860::8888")
+    (network_builder,) = [nb for nb in builder.builders if nb.tasks]
+    network_builder.warn_dropped_resolvers()
+    connection = builder.render()[CONNECTIONS + "enp0.nmconnection"]["content"]
+
+    assert connection.endswith("[ipv6]\nmethod=ignore\n")
+    assert "2001:4860:4860::8888, ignoring them" in caplog.text
@@ -1,5 +1,6 @@
 from .. import NetworkBuilder
-from ...utils import generate_persistent_names_udev
+from ..networkmanager.network import NM_WAIT_ONLINE, NM_WAIT_ONLINE_TEMPLATE
+from ...utils import SYSTEMD_LINK, generate_wait_for_link
 import os
 
 
@@ -46,15 +47,17 @@ class RedhatBondedNetwork(NetworkBuilder):
                 context={"iface": name, "i": i},
             )
             if self.metadata.operating_system["slug"] == "rhel_9":
-                self.task_template(
+                self.task(
                     "etc/systemd/network/70-" + name + ".link",
-                    "bonded/etc_systemd_network-70-template.j2",
-                    context={"iface": name, "i": i},
+                    SYSTEMD_LINK,
+                    context={"i": i},
                 )
 
         self.task_template(
             "sbin/ifup-pre-local", "bonded/sbin_ifup-pre-local.j2", mode=0o755
         )
+        if self.network.link_wait.mode == "carrier":
+            self.tasks.update(generate_wait_for_link())
 
         if self.metadata.operating_system.distro not in (
             "redhatenterpriseserver",
@@ -69,5 +72,8 @@ class RedhatBondedNetwork(NetworkBuilder):
                     os.path.join("etc/systemd/system", service + ".service")
                 ] = None
         else:
-            self.tasks.update(generate_persistent_names_udev())
+            # NetworkManager stays enabled to read the ifcfg files, bound its
+            # wait-online like the keyfile backend does
+            self.task(NM_WAIT_ONLINE, NM_WAIT_ONLINE_TEMPLATE)
+            self.build_persistent_names()
         return self.tasks
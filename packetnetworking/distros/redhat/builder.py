@@ -1,4 +1,9 @@
 from .. import DistroBuilder
+from ...utils import generate_steering_udev
+from ..networkmanager import (
+    NetworkManagerBondedNetwork,
+    NetworkManagerIndividualNetwork,
+)
 from .bonded import RedhatBondedNetwork
 from .individual import RedhatIndividualNetwork
 
@@ -13,8 +18,21 @@ class RedhatBuilder(DistroBuilder):
         "rocky",
     ]
     network_builders = [RedhatBondedNetwork, RedhatIndividualNetwork]
+    backends = {
+        "ifcfg": network_builders,
+        "networkmanager": [
+            NetworkManagerBondedNetwork,
+            NetworkManagerIndividualNetwork,
+        ],
+    }
+    # NetworkManager keyfiles are opt-in until they've been rolled out, e.g.
+    # ("rocky", "9*", "networkmanager")
+    default_backends = ()
 
     def build_tasks(self):
+        super().build_tasks()
         self.task_template("etc/hostname", "etc_hostname.j2")
         self.task_template("etc/resolv.conf", "etc_resolv.conf.j2")
         self.task_template("etc/hosts", "etc_hosts.j2")
+        if any(iface.steering for iface in self.network.interfaces):
+            self.tasks.update(generate_steering_udev())
@@ -18,7 +18,7 @@ versions = [[distro, version] for distro in versions for version in versions[dis
 def redhatbuilder(mockit, fake, metadata, patch_dict):
     gen_metadata = metadata
 
-    def _builder(metadata=None, public=True):
+    def _builder(metadata=None, public=True, phys_overrides=None):
         resolvers = ("1.2.3.4", "2.3.4.5")
         meta_interfaces = [
             {"name": "eth0", "mac": "00:0c:29:51:53:a1", "bond": "bond0"},
@@ -28,6 +28,8 @@ def redhatbuilder(mockit, fake, metadata, patch_dict):
             {"name": "enp0", "mac": "00:0c:29:51:53:a1"},
             {"name": "enp1", "mac": "00:0c:29:51:53:a2"},
         ]
+        for iface in phys_interfaces:
+            iface.update((phys_overrides or {}).get(iface["name"], {}))
         _metadata = {"network": {"interfaces": meta_interfaces}}
         if metadata:
             patch_dict(_metadata, metadata)
@@ -43,7 +45,7 @@ def redhatbuilder(mockit, fake, metadata, patch_dict):
 
 @pytest.fixture(params=["bonded", "mlag_ha"])
 def generic_redhat_bonded_network(redhatbuilder, patch_dict, request):
-    def _builder(distro, version, public=True, metadata=None):
+    def _builder(distro, version, public=True, metadata=None, **kwargs):
         version = str(version)
         slug = "{distro}_{version}".format(distro=distro, version=version)
         metadata = patch_dict(
@@ -57,7 +59,7 @@ def generic_redhat_bonded_network(redhatbuilder, patch_dict, request):
             },
             metadata or {},
         )
-        builder = redhatbuilder(metadata, public=public)
+        builder = redhatbuilder(metadata, public=public, **kwargs)
         builder.build()
         builder.builders = [
             builder
@@ -1,5 +1,5 @@
 from .. import NetworkBuilder
-from ...utils import generate_persistent_names_udev
+from ..networkmanager.network import NM_WAIT_ONLINE, NM_WAIT_ONLINE_TEMPLATE
 import os
 
 
@@ -51,5 +51,8 @@ class RedhatIndividualNetwork(NetworkBuilder):
                     os.path.join("etc/systemd/system", service + ".service")
                 ] = None
         else:
-            self.tasks.update(generate_persistent_names_udev())
+            # NetworkManager stays enabled to read the ifcfg files, bound its
+            # wait-online like the keyfile backend does
+            self.task(NM_WAIT_ONLINE, NM_WAIT_ONLINE_TEMPLATE)
+            self.build_persistent_names()
         return self.tasks
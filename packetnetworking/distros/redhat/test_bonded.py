@@ -1,5 +1,6 @@
 from textwrap import dedent
 from ... import utils
+from ..networkmanager.network import NM_WAIT_ONLINE
 import os
 import pytest
 from .conftest import versions
@@ -65,6 +66,63 @@ def test_bonded_task_etc_modprobe_d_bonding(bonded_network_builder, distro, vers
     assert tasks["etc/modprobe.d/bonding.conf"] == result
 
 
+@pytest.mark.parametrize("distro,version", versions)
+def test_bonding_options_from_metadata(bonded_network_builder, distro, version):
+    metadata = {
+        "network": {
+            "bonding": {"mode": 4, "xmit_hash_policy": "layer2+3", "min_links": 1}
+        }
+    }
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    tasks = builder.render()
+    options = (
+        "mode=4 miimon=100 downdelay=200 updelay=200 xmit_hash_policy=layer2+3"
+        " lacp_rate=1 min_links=1"
+    )
+    assert 'BONDING_OPTS="{}"\n'.format(options) in (
+        tasks["etc/sysconfig/network-scripts/ifcfg-bond0"]
+    )
+    assert "options bond0 {}\n".format(options) in tasks["etc/modprobe.d/bonding.conf"]
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_bonded_mtu(bonded_network_builder, distro, version):
+    metadata = {"network": {"mtu": 9000}, "operating_system": {"slug": "rhel_9"}}
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    tasks = builder.render()
+
+    assert "\nMTU=9000\n" in tasks["etc/sysconfig/network-scripts/ifcfg-bond0"]
+    for iface in builder.network.interfaces:
+        path = "etc/sysconfig/network-scripts/ifcfg-" + iface.name
+        assert tasks[path].endswith("BOOTPROTO=none\nMTU=9000\n")
+        link = "etc/systemd/network/70-" + iface.name + ".link"
+        assert tasks[link] == (
+            "{}\n[Match]\nMACAddress={}\n\n[Link]\nName={}\nMTUBytes=9000\n".format(
+                utils.generated_header(), iface.mac, iface.name
+            )
+        )
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_bonded_nic_tuning(bonded_network_builder, distro, version):
+    metadata = {
+        "network": {
+            "tuning": {"rings": {"rx": 4096}, "offloads": {"lro": False}},
+        },
+        "operating_system": {"slug": "rhel_9"},
+    }
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    tasks = builder.render()
+
+    for iface in builder.network.interfaces:
+        ifcfg = tasks["etc/sysconfig/network-scripts/ifcfg-" + iface.name]
+        assert ifcfg.endswith(
+            'ETHTOOL_OPTS="-G {0} rx 4096; -K {0} lro off"\n'.format(iface.name)
+        )
+        link = tasks["etc/systemd/network/70-" + iface.name + ".link"]
+        assert link.endswith("RxBufferSize=4096\nLargeReceiveOffload=no\n")
+
+
 @pytest.mark.parametrize("distro,version", versions)
 def test_public_bonded_task_etc_sysconfig_network_scripts_ifcfg_bond0(
     bonded_network_builder, distro, version
@@ -83,7 +141,7 @@ def test_public_bonded_task_etc_sysconfig_network_scripts_ifcfg_bond0(
         ONBOOT=yes
         USERCTL=no
         TYPE=Bond
-        BONDING_OPTS="mode={bonding_mode} miimon=100 downdelay=200 updelay=200"
+        BONDING_OPTS="mode={bonding_mode} miimon=100 downdelay=200 updelay=200 xmit_hash_policy=layer3+4 lacp_rate=1"
 
         IPV6INIT=yes
         IPV6ADDR={ipv6pub.address}/{ipv6pub.cidr}
@@ -122,7 +180,7 @@ def test_private_bonded_task_etc_sysconfig_network_scripts_ifcfg_bond0(
         ONBOOT=yes
         USERCTL=no
         TYPE=Bond
-        BONDING_OPTS="mode={bonding_mode} miimon=100 downdelay=200 updelay=200"
+        BONDING_OPTS="mode={bonding_mode} miimon=100 downdelay=200 updelay=200 xmit_hash_policy=layer3+4 lacp_rate=1"
 
         DNS1={dns1}
         DNS2={dns2}
@@ -270,6 +328,7 @@ def test_etc_resolvers_configured(bonded_network_builder, fake, distro, version)
         """\
         nameserver {resolver1}
         nameserver {resolver2}
+        options timeout:2 attempts:2
     """
     ).format(resolver1=resolver1, resolver2=resolver2)
     assert tasks["etc/resolv.conf"] == result
@@ -322,7 +381,7 @@ def test_sbin_ifup_pre_local(bonded_network_builder, distro, version):
         iface=${{1#*-}}
         case "$iface" in
         bond0 | {interface0.name}) ip link set "$iface" address {interface0.mac} ;;
-                {interface1.name}) ip link set "$iface" address {interface1.mac} && sleep 4 ;;
+                {interface1.name}) ip link set "$iface" address {interface1.mac} && /usr/local/sbin/wait-for-link {interface0.name} 4 ;;
         *) echo "ignoring unknown interface $iface" && exit 0 ;;
         esac
     """
@@ -334,6 +393,38 @@ def test_sbin_ifup_pre_local(bonded_network_builder, distro, version):
     assert tasks["sbin/ifup-pre-local"]["mode"] == 0o755
 
 
+@pytest.mark.parametrize("distro,version", versions)
+def test_sbin_ifup_pre_local_skips_delay_without_carrier(
+    bonded_network_builder, distro, version
+):
+    phys_overrides = {"enp1": {"carrier": False}}
+    builder = bonded_network_builder(distro, version, phys_overrides=phys_overrides)
+    tasks = builder.render()
+    assert (
+        '        enp1) ip link set "$iface" address 00:0c:29:51:53:a2 ;;\n'
+        in tasks["sbin/ifup-pre-local"]["content"]
+    )
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_sbin_ifup_pre_local_waits_on_first_slave_by_name(
+    bonded_network_builder, distro, version
+):
+    builder = bonded_network_builder(distro, version)
+    builder.network.interfaces = utils.RecursiveAttributes(
+        list(reversed(builder.network.interfaces))
+    )
+    content = builder.render()["sbin/ifup-pre-local"]["content"]
+    assert 'bond0) ip link set "$iface" address 00:0c:29:51:53:a2 ;;\n' in content
+    assert (
+        '        enp1) ip link set "$iface" address 00:0c:29:51:53:a2'
+        " && /usr/local/sbin/wait-for-link enp0 4 ;;\n" in content
+    )
+    assert (
+        '        enp0) ip link set "$iface" address 00:0c:29:51:53:a1 ;;\n' in content
+    )
+
+
 @pytest.mark.parametrize("distro,version", versions)
 def test_network_manager_is_disabled(bonded_network_builder, distro, version):
     """
@@ -352,6 +443,22 @@ def test_network_manager_is_disabled(bonded_network_builder, distro, version):
         )
 
 
+@pytest.mark.parametrize("distro,version", versions)
+def test_network_manager_wait_online_is_bounded(
+    bonded_network_builder, distro, version
+):
+    """
+    Distros keeping NetworkManager enabled bound NetworkManager-wait-online
+    """
+    builder = bonded_network_builder(distro, version)
+    tasks = builder.render()
+    wait_online = tasks.get(NM_WAIT_ONLINE)
+    if distro.startswith("redhatenterprise"):
+        assert wait_online.endswith("ExecStart=/usr/bin/nm-online -s -q --timeout=30\n")
+    else:
+        assert wait_online is None
+
+
 @pytest.mark.parametrize("distro,version", versions)
 def test_persistent_interface_names(bonded_network_builder, distro, version):
     """
@@ -383,3 +490,23 @@ def test_persistent_interface_names(bonded_network_builder, distro, version):
         assert "etc/udev/rules.d/70-persistent-net.rules" not in tasks
     else:
         assert tasks["etc/udev/rules.d/70-persistent-net.rules"] == result
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_sysctl_profile(bonded_network_builder, distro, version):
+    metadata = {"plan": "n3.xlarge.x86"}
+    tasks = bonded_network_builder(distro, version, metadata=metadata).render()
+    assert "net.ipv4.tcp_congestion_control = bbr\n" in tasks[utils.SYSCTL_CONF]
+
+
+@pytest.mark.parametrize("distro,version", versions)
+def test_ipv6_fast_ready(bonded_network_builder, distro, version):
+    metadata = {"network": {"ipv6_fast_ready": True}}
+    builder = bonded_network_builder(distro, version, metadata=metadata)
+    tasks = builder.render()
+    ifcfg = tasks["etc/sysconfig/network-scripts/ifcfg-bond0"]
+    assert (
+        "IPV6_DEFAULTGW={}\nIPV6_AUTOCONF=no\n".format(builder.ipv6pub.first.gateway)
+        in ifcfg
+    )
+    assert "net.ipv6.conf.default.use_optimistic = 1\n" in tasks[utils.SYSCTL_CONF]
@@ -1,5 +1,6 @@
 from textwrap import dedent
 from ... import utils
+from ..networkmanager.network import NM_WAIT_ONLINE
 import os
 import pytest
 from .conftest import versions
@@ -209,6 +210,7 @@ def test_etc_resolvers_configured(individual_network_builder, fake, distro, vers
         """\
         nameserver {resolver1}
         nameserver {resolver2}
+        options timeout:2 attempts:2
     """
     ).format(resolver1=resolver1, resolver2=resolver2)
     assert tasks["etc/resolv.conf"] == result
@@ -263,6 +265,22 @@ def test_network_manager_is_disabled(individual_network_builder, distro, version
         )
 
 
+@pytest.mark.parametrize("distro,version", versions)
+def test_network_manager_wait_online_is_bounded(
+    individual_network_builder, distro, version
+):
+    """
+    Distros keeping NetworkManager enabled bound NetworkManager-wait-online
+    """
+    builder = individual_network_builder(distro, version)
+    tasks = builder.render()
+    wait_online = tasks.get(NM_WAIT_ONLINE)
+    if distro.startswith("redhatenterprise"):
+        assert wait_online.endswith("ExecStart=/usr/bin/nm-online -s -q --timeout=30\n")
+    else:
+        assert wait_online is None
+
+
 @pytest.mark.parametrize("distro,version", versions)
 def test_persistent_interface_names(individual_network_builder, distro, version):
     """
@@ -1,20 +1,34 @@
 import mock
 import pytest
 
-from .distro_builder import DistroBuilder, get_distro_builder
+from . import distro_builder
+from .distro_builder import (
+    DistroBuilder,
+    DistroRegistry,
+    get_distro_builder,
+    register_distro_builder,
+)
 from .. import utils
 from ..builder import NetworkData
 
 
 @pytest.fixture
-def fake_distro_builder():
-    def func(distros):
+def isolated_registry():
+    registry = DistroRegistry()
+    registry.entries = list(distro_builder.registry.entries)
+    with mock.patch.object(distro_builder, "registry", registry):
+        yield registry
+
+
+@pytest.fixture
+def fake_distro_builder(isolated_registry):
+    def func(distros, versions="*"):
         class FakeDistroBuilder(DistroBuilder):
             pass
 
         FakeDistroBuilder.distros = distros
 
-        return FakeDistroBuilder
+        return register_distro_builder(FakeDistroBuilder, versions=versions)
 
     return func
 
@@ -84,6 +98,54 @@ def test_get_distro_builder_finds_catch_all(fake_distro_builder):
     assert get_distro_builder("catchmeos") is fake_distro2
 
 
+def test_get_distro_builder_matches_versions(fake_distro_builder):
+    fake_distro_old = fake_distro_builder(["fakeos7"])
+    fake_distro_new = fake_distro_builder(["fakeos7"], versions="2*")
+    assert get_distro_builder("fakeos7", "1.0") is fake_distro_old
+    assert get_distro_builder("fakeos7", "24.04") is fake_distro_new
+    assert get_distro_builder("fakeos7") is fake_distro_old
+
+
+def test_get_distro_builder_sees_indirect_subclasses(fake_distro_builder):
+    fake_distro = fake_distro_builder(["fakeos8"])
+
+    @register_distro_builder
+    class FakeChildDistroBuilder(fake_distro):
+        distros = ["fakeos9"]
+
+    assert get_distro_builder("fakeos9") is FakeChildDistroBuilder
+
+
+def test_get_distro_builder_resolves_import_paths_once(isolated_registry):
+    isolated_registry.register("fakeos10", "packetnetworking.distros:DistroBuilder")
+    with mock.patch.object(
+        utils, "import_path", wraps=utils.import_path
+    ) as mocked_import_path:
+        assert get_distro_builder("fakeos10") is DistroBuilder
+        assert get_distro_builder("FakeOS10") is DistroBuilder
+    mocked_import_path.assert_called_once_with("packetnetworking.distros:DistroBuilder")
+
+
+def test_get_distro_builder_registers_entry_points(isolated_registry):
+    ep = mock.Mock(value="packetnetworking.distros:NetworkBuilder")
+    ep.name = "fakeos11/3.*"
+    with mock.patch.object(utils, "entry_points", return_value=[ep]) as mocked_eps:
+        assert get_distro_builder("fakeos11", "3.1").__name__ == "NetworkBuilder"
+        assert get_distro_builder("fakeos11", "4") is None
+    mocked_eps.assert_called_once_with("packetnetworking.distros")
+
+
+@pytest.mark.parametrize(
+    "path", ["alpine:AlpineBuilder", "debian:DebianBuilder", "redhat:RedhatBuilder"]
+)
+def test_builtin_registrations_match_builder_distros(path):
+    path = "packetnetworking.distros." + path
+    registered = [
+        entry[0] for entry in distro_builder.registry.entries if entry[2] == path
+    ]
+    assert sorted(registered) == sorted(utils.import_path(path).distros)
+
+
 def test_distro_builder_initializes_network_builders(
     fake_distro_builder, fake_network_builder, fake_metadata
 ):
@@ -377,3 +439,88 @@ def test_distro_builder_creates_file_with_mode(fake_distro_builder_with_metadata
         "\nhostname = {hostname}\n".format(**fake_distro.context())
     )
     mock_chmod.assert_called_with("/path/to/rootfs/path/to/file", 0o755)
+
+
+def test_distro_builder_writes_sysctl_profile(fake_distro_builder_with_metadata):
+    metadata = {
+        "network": {"sysctl": {"net.core.rmem_max": None, "net.core.somaxconn": 4096}}
+    }
+    builder = fake_distro_builder_with_metadata(metadata)
+    builder.build_tasks()
+    builder.builders = [mock.Mock(tasks={"other": None})]
+    content = builder.render()[utils.SYSCTL_CONF]
+    lines = content.splitlines()
+    assert lines[0].startswith("#")
+    assert "net.core.rmem_max" not in content
+    assert "net.core.wmem_max = 16777216" in lines
+    assert "net.ipv4.tcp_rmem = 4096 131072 16777216" in lines
+    assert lines[-1] == "net.core.somaxconn = 4096"
+
+
+def test_distro_builder_skips_empty_sysctl_profile(fake_distro_builder_with_metadata):
+    builder = fake_distro_builder_with_metadata()
+    builder.network.sysctl = {}
+    builder.build_tasks()
+    assert utils.SYSCTL_CONF not in builder.tasks
+
+
+@pytest.mark.parametrize(
+    "backend,version,expected",
+    [
+        (None, "1", None),
+        (None, "2", "fast"),
+        ("fast", "1", "fast"),
+        ("native", "2", "native"),
+        ("unknown", "2", None),
+    ],
+)
+def test_distro_builder_selects_backend(
+    fake_distro_builder_with_metadata, fake_network_builder, backend, version, expected
+):
+    distro = fake_distro_builder_with_metadata(
+        {"operating_system": {"distro": "fakeos", "version": version}}
+    )
+    distro.network_builders = [fake_network_builder]
+    distro.backends = {"native": distro.network_builders, "fast": [mock.Mock]}
+    distro.default_backends = (("fakeos", "2*", "fast"),)
+    distro.network.backend = backend
+
+    assert distro.backend == expected
+    builders = distro.backends[expected] if expected else distro.network_builders
+    assert distro.get_network_builders() is builders
+
+
+@pytest.mark.parametrize("distro,expected", [("fakeos", "fast"), ("otheros", None)])
+def test_distro_builder_limits_backends_to_their_distros(
+    fake_distro_builder_with_metadata, fake_network_builder, distro, expected
+):
+    builder = fake_distro_builder_with_metadata(
+        {"operating_system": {"distro": distro, "version": "1"}}
+    )
+    builder.network_builders = [fake_network_builder]
+    builder.backends = {"fast": [mock.Mock]}
+    builder.backend_distros = {"fast": ["fakeos"]}
+    builder.network.backend = "fast"
+
+    assert builder.backend == expected
+
+
+@pytest.mark.parametrize(
+    "method,version,expected",
+    [
+        (None, "1", "udev"),
+        (None, "2", "link"),
+        ("keyed", "2", "keyed"),
+        ("unknown", "2", "udev"),
+    ],
+)
+def test_distro_builder_selects_persistent_names(
+    fake_distro_builder_with_metadata, method, version, expected
+):
+    distro = fake_distro_builder_with_metadata(
+        {"operating_system": {"distro": "fakeos", "version": version}}
+    )
+    distro.default_persistent_names = (("fakeos", "2*", "link"),)
+    distro.network.persistent_names = method
+
+    assert distro.persistent_names == expected
@@ -1,9 +1,11 @@
-from .builder_hook import BuilderHook, trigger_hook
+from .builder_hook import BuilderHook, HookRegistry, register_hook, trigger_hook
 from .single_interface_hook import SingleInterfaceHook
 from .logical_interface_names_hook import LogicalInterfaceNamesHook
 
 __all__ = [
     "BuilderHook",
+    "HookRegistry",
+    "register_hook",
     "trigger_hook",
     "SingleInterfaceHook",
     "LogicalInterfaceNamesHook",
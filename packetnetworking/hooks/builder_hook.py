@@ -1,17 +1,122 @@
+import logging
 import re
 
+from .. import utils
+
+log = logging.getLogger()
+
 
 class BuilderHook:
-    pass
-
-
-def trigger_hook(hook_name, context):
-    hook_func = re.sub("[^a-z0-9]+", "_", hook_name, flags=re.I).lower()
-    results = []
-    for Hook in BuilderHook.__subclasses__():
-        hook = Hook()
-        try:
-            results.append(getattr(hook, "hook_" + hook_func)(context))
-        except AttributeError:
-            pass
-    return results
+    # Plan slugs the hook applies to, None applies it to every plan.
+    plans = None
+
+
+def hook_method_name(hook_name):
+    return "hook_" + re.sub("[^a-z0-9]+", "_", hook_name, flags=re.I).lower()
+
+
+def builder_hook_classes(cls=BuilderHook):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from builder_hook_classes(subclass)
+
+
+class HookRegistry(object):
+    """
+    Dispatches triggered hooks to the `hook_*` methods of the registered
+    BuilderHook classes.
+
+    Unless given an explicit list, every imported BuilderHook subclass and
+    every class published under the `packetnetworking.hooks` entry point group
+    is registered. Each hook is instantiated once, the first time a hook is
+    triggered, and the bound `hook_*` methods are indexed by name so a trigger
+    is a dictionary lookup. Hooks declaring `plans` are only returned for
+    those plans.
+    """
+
+    entry_point_group = "packetnetworking.hooks"
+
+    def __init__(self, hooks=None):
+        self.hooks = hooks
+        self.dispatch = None
+        self.method_names = {}
+        self.cache = {}
+
+    def register(self, Hook):
+        if self.hooks is None:
+            self.hooks = self.discover()
+        if Hook not in self.hooks:
+            self.hooks.append(Hook)
+        self.dispatch = None
+        return Hook
+
+    def discover(self):
+        hooks = list(builder_hook_classes())
+        for ep in utils.entry_points(self.entry_point_group):
+            Hook = ep.load()
+            log.debug("Registering hook plugin '{}'".format(ep.value))
+            if Hook not in hooks:
+                hooks.append(Hook)
+        return hooks
+
+    def build(self):
+        if self.hooks is None:
+            self.hooks = self.discover()
+        dispatch = {}
+        for Hook in self.hooks:
+            hook = Hook()
+            plans = getattr(Hook, "plans", None)
+            if plans is not None:
+                plans = frozenset(plan.lower() for plan in plans)
+            for attr in dir(Hook):
+                if not attr.startswith("hook_"):
+                    continue
+                func = getattr(hook, attr)
+                if callable(func):
+                    dispatch.setdefault(attr, []).append((plans, func))
+        self.dispatch = dispatch
+        self.cache = {}
+        return dispatch
+
+    def callables(self, hook_name, plan=None):
+        """
+        Returns the hook functions to call for `hook_name` on `plan`.
+        """
+        if self.dispatch is None:
+            self.build()
+
+        method = self.method_names.get(hook_name)
+        if method is None:
+            method = self.method_names[hook_name] = hook_method_name(hook_name)
+
+        plan = plan.lower() if plan else None
+        key = (method, plan)
+        funcs = self.cache.get(key)
+        if funcs is None:
+            funcs = self.cache[key] = [
+                func
+                for plans, func in self.dispatch.get(method, ())
+                if plans is None or plan in plans
+            ]
+        return funcs
+
+    def trigger(self, hook_name, context, *args, **kwargs):
+        metadata = getattr(context, "metadata", None)
+        plan = metadata.get("plan") if metadata else None
+        return [
+            func(context, *args, **kwargs) for func in self.callables(hook_name, plan)
+        ]
+
+
+registry = HookRegistry()
+
+
+def register_hook(Hook):
+    """
+    Class decorator registering a hook defined after the first trigger.
+    """
+    return registry.register(Hook)
+
+
+def trigger_hook(hook_name, context, *args, **kwargs):
+    return registry.trigger(hook_name, context, *args, **kwargs)
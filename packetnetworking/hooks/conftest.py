@@ -2,6 +2,7 @@ import pytest
 import mock
 from ..builder import Builder
 from .. import utils
+from .builder_hook import HookRegistry
 
 
 @pytest.fixture
@@ -32,19 +33,15 @@ def mocked_trigger(mockit, plan_builder):
                 triggers[trigger] = [hook_cls]
             else:
                 triggers[trigger].append(hook_cls)
+        registries = {
+            trigger: HookRegistry(hook_classes)
+            for trigger, hook_classes in triggers.items()
+        }
 
         def trigger(trigger, *args, **kwargs):
-            hook_classes = triggers.get(trigger, [])
-            results = []
-            for hook_cls in hook_classes:
-                hook = hook_cls()
-                try:
-                    results.append(
-                        getattr(hook, "hook_" + trigger)(builder, *args, **kwargs)
-                    )
-                except AttributeError:
-                    pass
-            return results
+            if trigger not in registries:
+                return []
+            return registries[trigger].trigger(trigger, builder, *args, **kwargs)
 
         phys_interfaces = physical_interfaces or [
             {"name": "enp0", "mac": "00:0c:29:51:53:a1"},
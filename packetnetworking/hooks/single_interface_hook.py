@@ -4,6 +4,12 @@ from .builder_hook import BuilderHook
 class SingleInterfaceHook(BuilderHook):
     plans = ["baremetal_1e", "x1.small.x86"]
 
+    def hook_pre_discovery(self, builder):
+        # Only the first interface found is configured, there's no need to
+        # probe NICs missing from the metadata. All of the metadata's are
+        # probed so the next one is used if the first isn't there.
+        interfaces = builder.metadata.network.interfaces
+        builder.network.discovery.restrict_macs(iface["mac"] for iface in interfaces)
+
     def hook_initialized(self, builder):
-        if builder.metadata.plan.lower() in self.plans:
-            builder.network.interfaces = builder.network.interfaces[:1]
+        builder.network.interfaces = builder.network.interfaces[:1]
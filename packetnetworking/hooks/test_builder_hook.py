@@ -1,10 +1,111 @@
-from .builder_hook import BuilderHook
+import mock
+import pytest
+
+from .. import utils
+from .builder_hook import BuilderHook, HookRegistry, hook_method_name
 
 
 class FakeHook(BuilderHook):
     pass
 
 
+# The hooks below don't subclass BuilderHook so the global registry used by
+# the other tests doesn't pick them up, the registry only needs hook_* methods.
+class RecordingHook:
+    def hook_initialized(self, builder, *args, **kwargs):
+        return ("all", args, kwargs)
+
+
+class PlanHook:
+    plans = ["x1.small.x86"]
+
+    def hook_initialized(self, builder):
+        return "plan"
+
+
+class BrokenHook:
+    def hook_initialized(self, builder):
+        return builder.missing_attribute
+
+
+@pytest.fixture
+def context():
+    class Context:
+        metadata = {"plan": "X1.Small.x86"}
+
+    return Context()
+
+
 def test_builder_hook_not_implemented_doesnt_raise_exception(mocked_trigger):
     mocked_trigger("x1.small.x86", (FakeHook, "initialized"))
     # No exception should be raised
+
+
+@pytest.mark.parametrize(
+    "hook_name,method",
+    [
+        ("initialized", "hook_initialized"),
+        ("pre-discovery", "hook_pre_discovery"),
+        ("Pre Discovery", "hook_pre_discovery"),
+    ],
+)
+def test_hook_method_name(hook_name, method):
+    assert hook_method_name(hook_name) == method
+
+
+def test_registry_passes_arguments(context):
+    registry = HookRegistry([RecordingHook])
+    results = registry.trigger("initialized", context, 1, key="value")
+    assert results == [("all", (1,), {"key": "value"})]
+
+
+def test_registry_filters_by_plan(context):
+    registry = HookRegistry([RecordingHook, PlanHook])
+    assert len(registry.trigger("initialized", context)) == 2
+
+    context.metadata = {"plan": "c3.small.x86"}
+    assert len(registry.trigger("initialized", context)) == 1
+
+
+def test_registry_instantiates_hooks_once(context):
+    registry = HookRegistry([RecordingHook])
+    with mock.patch.object(RecordingHook, "__init__", return_value=None) as init:
+        registry.trigger("initialized", context)
+        registry.trigger("initialized", context)
+    init.assert_called_once()
+
+
+def test_registry_propagates_hook_errors(context):
+    registry = HookRegistry([BrokenHook])
+    with pytest.raises(AttributeError):
+        registry.trigger("initialized", context)
+
+
+def test_registry_discovers_indirect_subclasses_and_entry_points(context):
+    class ParentHook(BuilderHook):
+        pass
+
+    class ChildHook(ParentHook):
+        def hook_test_discovery(self, builder):
+            return "child"
+
+    class PluginHook:
+        def hook_test_discovery(self, builder):
+            return "plugin"
+
+    ep = mock.Mock(value="plugin:PluginHook")
+    ep.load.return_value = PluginHook
+    registry = HookRegistry()
+    with mock.patch.object(utils, "entry_points", return_value=[ep]) as mocked_eps:
+        results = registry.trigger("test_discovery", context)
+
+    mocked_eps.assert_called_once_with("packetnetworking.hooks")
+    assert results.count("child") == 1
+    assert results.count("plugin") == 1
+
+
+def test_registry_register_rebuilds_dispatch(context):
+    registry = HookRegistry([])
+    assert registry.trigger("initialized", context) == []
+    registry.register(PlanHook)
+    assert registry.trigger("initialized", context) == ["plan"]
@@ -18,3 +18,29 @@ def test_unmodified_plan_single_interface_hook(mocked_trigger):
     assert len(builder.network.interfaces) == 2
     assert builder.network.interfaces[0]["mac"] == "00:0c:29:51:53:a1"
     assert builder.network.interfaces[1]["mac"] == "00:0c:29:51:53:a2"
+
+
+def test_x1_small_x86_single_interface_hook_restricts_discovery(mocked_trigger):
+    builder = mocked_trigger("x1.small.x86", (SingleInterfaceHook, "pre_discovery"))
+    assert builder.network.discovery.macs == {
+        "00:0c:29:51:53:a1",
+        "00:0c:29:51:53:a2",
+    }
+
+
+def test_x1_small_x86_single_interface_hook_falls_back_to_next_interface(
+    mocked_trigger,
+):
+    builder = mocked_trigger(
+        "x1.small.x86",
+        (SingleInterfaceHook, "pre_discovery"),
+        (SingleInterfaceHook, "initialized"),
+        physical_interfaces=[{"name": "enp1", "mac": "00:0c:29:51:53:a2"}],
+    )
+    assert len(builder.network.interfaces) == 1
+    assert builder.network.interfaces[0]["mac"] == "00:0c:29:51:53:a2"
+
+
+def test_unmodified_plan_single_interface_hook_discovers_all(mocked_trigger):
+    builder = mocked_trigger("unmodified.plan", (SingleInterfaceHook, "pre_discovery"))
+    assert builder.network.discovery.macs is None
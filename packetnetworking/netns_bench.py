@@ -0,0 +1,408 @@
+"""
+Time-to-network-ready benchmark.
+
+Renders the configuration for some metadata, then applies it inside a fresh
+network namespace whose NICs are veth (or dummy) devices carrying the
+metadata's names and MAC addresses, with nothing outside of the host behind
+them. While `ifup -a` runs, the namespace is polled for the moments the bond
+(or primary interface) gets a carrier, every static address is assigned and
+past duplicate address detection, and every route is installed. Comparing
+runs quantifies how template changes (sleeps, route style, bonding options)
+move boot latency before they reach the fleet.
+
+Only ifupdown configurations can be applied this way: networkd, netplan and
+NetworkManager need their daemon, which can't be confined to a namespace.
+
+ifup still runs the host's /etc/network/if-*.d hooks, which bonding needs.
+They run in a private mount namespace with their own /run and an empty
+/etc/resolv.conf (from /etc/netns/<name>/), so resolvconf and the like don't
+touch the host's. Hooks writing elsewhere (/var, /etc) aren't contained, and
+modules such as bonding get loaded into the host's kernel.
+
+    # python -m packetnetworking.netns_bench -M metadata.json -o 'debian 12'
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+from . import cli
+
+log = logging.getLogger()
+
+MILESTONES = ("link", "addresses", "routes", "applied")
+NIC_KINDS = ("veth", "dummy")
+IFUPDOWN_BACKENDS = (None, "ifupdown")
+INTERFACES = "etc/network/interfaces"
+# `ip netns exec` bind mounts the files of /etc/netns/<name>/ over /etc's
+NETNS_ETC = "/etc/netns"
+# run in the mount namespace of `ip netns exec`, which doesn't propagate back
+PRIVATE_RUN = 'mount -t tmpfs tmpfs /run && exec "$@"'
+
+
+def relocate(content, paths, rootfs):
+    """
+    Points the absolute paths of rendered files referenced by `content` (the
+    wait-for-link script, private route batches...) at their copy under
+    `rootfs`.
+    """
+    if not paths:
+        return content
+    pattern = re.compile(
+        "|".join(re.escape("/" + path) for path in sorted(paths, key=len, reverse=True))
+    )
+    return pattern.sub(lambda m: os.path.join(rootfs, m.group(0)[1:]), content)
+
+
+def expected_state(builder):
+    """
+    Returns what a ready network looks like for a built `DistroBuilder`: the
+    link carrying the addresses, the addresses and the IPv4 and IPv6 routes.
+    """
+    network = builder.network
+    if network.bonding.link_aggregation == "individual":
+        link = network.interfaces[0]["name"]
+    else:
+        link = "bond0"
+    ipv4pub = builder.ipv4pub.first
+    ipv4priv = builder.ipv4priv.first
+    ipv6pub = builder.ipv6pub.first
+    addresses = [
+        "{}/{}".format(address.address, address.cidr)
+        for address in (ipv4pub, ipv4priv, ipv6pub)
+        if address
+    ]
+    routes = {"ipv4": ["default"], "ipv6": []}
+    if ipv6pub:
+        routes["ipv6"].append("default")
+    if ipv4pub:
+        routes["ipv4"].extend(network.private_subnets or [])
+    return {"link": link, "addresses": addresses, "routes": routes}
+
+
+def link_ready(links, name):
+    return any(
+        link.get("ifname") == name and "LOWER_UP" in link.get("flags", ())
+        for link in links
+    )
+
+
+def addresses_ready(addresses, expected):
+    assigned = {
+        "{}/{}".format(info["local"], info["prefixlen"])
+        for link in addresses
+        for info in link.get("addr_info", ())
+        if not info.get("tentative")
+    }
+    return set(expected) <= assigned
+
+
+def routes_ready(routes, expected):
+    installed = {route.get("dst") for route in routes}
+    return set(expected) <= installed
+
+
+class Readiness(object):
+    """
+    First time, in seconds since the configuration started being applied, at
+    which each of `MILESTONES` was reached.
+    """
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.times = {milestone: None for milestone in MILESTONES}
+
+    @property
+    def done(self):
+        return all(elapsed is not None for elapsed in self.times.values())
+
+    def reach(self, milestone, elapsed):
+        if self.times[milestone] is None:
+            self.times[milestone] = elapsed
+
+    def update(self, elapsed, links, addresses, routes4, routes6):
+        if link_ready(links, self.expected["link"]):
+            self.reach("link", elapsed)
+        if addresses_ready(addresses, self.expected["addresses"]):
+            self.reach("addresses", elapsed)
+        routes = self.expected["routes"]
+        if routes_ready(routes4, routes["ipv4"]) and routes_ready(
+            routes6, routes["ipv6"]
+        ):
+            self.reach("routes", elapsed)
+
+
+def summarize(runs):
+    """
+    Returns the min, median and max time of each milestone over `runs`, in
+    milliseconds, None for milestones no run reached.
+    """
+    summary = {}
+    for milestone in MILESTONES:
+        times = [run[milestone] * 1000 for run in runs if run[milestone] is not None]
+        if not times:
+            summary[milestone] = None
+            continue
+        summary[milestone] = {
+            "min": min(times),
+            "median": statistics.median(times),
+            "max": max(times),
+            "reached": len(times),
+        }
+    return summary
+
+
+def ip(*args, ns=None):
+    cmd = ["ip"]
+    if ns:
+        cmd += ["-n", ns]
+    return subprocess.run(
+        cmd + list(args), check=True, stdout=subprocess.PIPE
+    ).stdout.decode()
+
+
+def ip_json(*args, ns=None):
+    return json.loads(ip("-j", *args, ns=ns) or "[]")
+
+
+class Namespace(object):
+    """
+    A network namespace holding `nics`, each backed by a veth whose peer sits
+    up in a companion namespace so it has a carrier, or by a dummy device.
+    """
+
+    def __init__(self, name, nics, kind="veth"):
+        if kind not in NIC_KINDS:
+            raise ValueError("Unknown NIC kind '{}'".format(kind))
+        self.name = name
+        self.peer = name + "-peer"
+        self.nics = nics
+        self.kind = kind
+        self.etc = os.path.join(NETNS_ETC, name)
+
+    def __enter__(self):
+        try:
+            os.makedirs(self.etc, exist_ok=True)
+            open(os.path.join(self.etc, "resolv.conf"), "w").close()
+            ip("netns", "add", self.name)
+            if self.kind == "veth":
+                ip("netns", "add", self.peer)
+            for i, nic in enumerate(self.nics):
+                self.add_nic(i, nic)
+        except BaseException:
+            # __exit__ isn't called when __enter__ fails
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for name in (self.name, self.peer):
+            subprocess.run(["ip", "netns", "del", name], stderr=subprocess.DEVNULL)
+        shutil.rmtree(self.etc, ignore_errors=True)
+        return False
+
+    def command(self, *cmd):
+        """
+        Returns the command running `cmd` in the namespace, with a private
+        /run and /etc/resolv.conf.
+        """
+        wrapper = ["sh", "-c", PRIVATE_RUN, "sh"]
+        return ["ip", "netns", "exec", self.name] + wrapper + list(cmd)
+
+    def add_nic(self, i, nic):
+        if self.kind == "dummy":
+            # created in the namespace, the NIC names may be taken on the host
+            ip(
+                "link",
+                "add",
+                nic["name"],
+                "netns",
+                self.name,
+                "address",
+                nic["mac"],
+                "type",
+                "dummy",
+            )
+            return
+        peer = "peer{:d}".format(i)
+        ip(
+            "link",
+            "add",
+            nic["name"],
+            "netns",
+            self.name,
+            "address",
+            nic["mac"],
+            "type",
+            "veth",
+            "peer",
+            "name",
+            peer,
+            "netns",
+            self.peer,
+        )
+        ip("link", "set", peer, "up", ns=self.peer)
+
+    def poll(self):
+        return (
+            ip_json("link", "show", ns=self.name),
+            ip_json("address", "show", ns=self.name),
+            ip_json("-4", "route", "show", ns=self.name),
+            ip_json("-6", "route", "show", ns=self.name),
+        )
+
+
+def render(builder, rootfs):
+    """
+    Builds the distro builder for an initialized `builder`, writes its files
+    under `rootfs` and returns it with the rendered tasks.
+    """
+    os_ = builder.metadata.operating_system
+    distro_builder = builder.get_builder(os_.distro)(builder)
+    distro_builder.build()
+    if distro_builder.backend not in IFUPDOWN_BACKENDS:
+        raise click.ClickException(
+            "Only ifupdown configurations can be applied, not '{}'".format(
+                distro_builder.backend
+            )
+        )
+    tasks = distro_builder.run(rootfs)
+    if INTERFACES not in tasks:
+        raise click.ClickException(
+            "{} {} has no {} to apply".format(os_.distro, os_.version, INTERFACES)
+        )
+    if any(iface.get("dhcp") for iface in builder.network.interfaces):
+        raise click.ClickException("DHCP configurations can't be measured offline")
+
+    path = os.path.join(rootfs, INTERFACES)
+    with open(path) as f:
+        content = f.read()
+    with open(path, "w") as f:
+        f.write(relocate(content, [p for p in tasks if p != INTERFACES], rootfs))
+    return distro_builder, tasks
+
+
+def measure(ns, rootfs, expected, timeout, interval=0.01):
+    """
+    Applies the rendered ifupdown configuration inside `ns`, returning the
+    time each milestone was reached.
+    """
+    state_dir = tempfile.mkdtemp(prefix="ifstate-", dir=rootfs)
+    cmd = ns.command(
+        "ifup", "-a", "-i", os.path.join(rootfs, INTERFACES), "--state-dir", state_dir
+    )
+    readiness = Readiness(expected)
+    start = time.monotonic()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    while not readiness.done:
+        elapsed = time.monotonic() - start
+        if elapsed > timeout:
+            log.warning("Network not ready after {}s".format(timeout))
+            break
+        if proc.poll() is not None:
+            readiness.reach("applied", elapsed)
+        readiness.update(elapsed, *ns.poll())
+        time.sleep(interval)
+    if proc.poll() is None:
+        proc.kill()
+    _, stderr = proc.communicate()
+    if proc.returncode:
+        log.warning("ifup exited with {}: {}".format(proc.returncode, stderr.decode()))
+    return readiness.times
+
+
+def format_summary(summary):
+    lines = ["{:<10} {:>10} {:>10} {:>10}".format("", "min", "median", "max")]
+    for milestone, stats in summary.items():
+        if stats is None:
+            lines.append("{:<10} {:>10}".format(milestone, "-"))
+            continue
+        lines.append(
+            "{:<10} {:>8.1f}ms {:>8.1f}ms {:>8.1f}ms".format(
+                milestone, stats["min"], stats["median"], stats["max"]
+            )
+        )
+    return "\n".join(lines)
+
+
+@click.command()
+@click.option(
+    "-M",
+    "--metadata-file",
+    type=click.File(),
+    required=True,
+    help="Metadata to render the configuration from",
+)
+@click.option(
+    "-o",
+    "--operating-system",
+    required=True,
+    help="Operating System and version (ex: debian 12)",
+)
+@click.option("--network-backend", help="Network configuration backend to render for")
+@click.option("-r", "--runs", default=5, help="Number of times to apply it")
+@click.option(
+    "--nic-kind",
+    type=click.Choice(NIC_KINDS),
+    default="veth",
+    help="Back the NICs with veth pairs or dummy devices",
+)
+@click.option("--timeout", default=60.0, help="Seconds to wait for each run")
+@click.option("--json", "as_json", is_flag=True, help="Print the results as JSON")
+@click.option("-v", "--verbose", count=True, help="Provide more detailed output")
+def main(
+    metadata_file,
+    operating_system,
+    network_backend,
+    runs,
+    nic_kind,
+    timeout,
+    as_json,
+    verbose,
+):
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.WARNING)
+    if os.geteuid() != 0:
+        raise click.ClickException("Network namespaces can only be created by root")
+
+    builder = cli.setup_builder(metadata_file, None)
+    cli.set_os(builder, operating_system, False)
+    cli.set_network_backend(builder, network_backend)
+    # the namespace's NICs stand in for discovery, which skips virtual devices
+    nics = [
+        {"name": iface["name"], "mac": iface["mac"]}
+        for iface in builder.metadata.network.interfaces
+    ]
+    builder.network.physical_interfaces = nics
+    builder.initialize()
+
+    rootfs = tempfile.mkdtemp(prefix="netns-bench-")
+    try:
+        distro_builder, _ = render(builder, rootfs)
+        expected = expected_state(distro_builder)
+        results = []
+        for run in range(runs):
+            with Namespace(
+                "netns-bench-{:d}".format(os.getpid()), nics, nic_kind
+            ) as ns:
+                results.append(measure(ns, rootfs, expected, timeout))
+    finally:
+        shutil.rmtree(rootfs, ignore_errors=True)
+
+    summary = summarize(results)
+    if as_json:
+        json.dump({"runs": results, "summary": summary}, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
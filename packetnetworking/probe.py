@@ -0,0 +1,173 @@
+"""
+In-process NIC hardware probe.
+
+Collects the facts we need about a NIC straight from sysfs and the
+SIOCETHTOOL ioctl, which takes milliseconds where `lshw -json` takes seconds
+on large servers. lshw is only consulted, if installed, for the firmware
+version of NICs whose driver doesn't answer ETHTOOL_GDRVINFO.
+"""
+import array
+import json
+import logging
+import os
+import shutil
+import socket
+import struct
+import subprocess
+
+log = logging.getLogger()
+
+SYSFS_NET = "/sys/class/net/"
+
+SIOCETHTOOL = 0x8946
+ETHTOOL_GDRVINFO = 0x00000003
+# struct ethtool_drvinfo: cmd, driver[32], version[32], fw_version[32],
+# bus_info[32], erom_version[32], reserved2[12] and 5 trailing u32 counters
+ETHTOOL_DRVINFO = struct.Struct("I32s32s32s32s32s12s5I")
+IFNAMSIZ = 16
+
+_lshw_info = None
+
+
+def read_attr(path, default=None):
+    try:
+        with open(path) as f:
+            return f.readline().strip()
+    except OSError:
+        # some attributes (speed, carrier...) error out while the link is down
+        return default
+
+
+def read_int(path, base=10):
+    value = read_attr(path)
+    try:
+        return int(value, base)
+    except (TypeError, ValueError):
+        return None
+
+
+def decode_cstr(value):
+    return value.split(b"\0", 1)[0].decode(errors="replace")
+
+
+def ethtool_drvinfo(name):
+    """
+    Returns the ETHTOOL_GDRVINFO answer for `name` as a dict, None if the ioctl
+    isn't supported for it.
+    """
+    import fcntl
+
+    buf = array.array("B", ETHTOOL_DRVINFO.pack(ETHTOOL_GDRVINFO, *[b""] * 6, *[0] * 5))
+    addr, _ = buf.buffer_info()
+    ifreq = struct.pack("{:d}sP".format(IFNAMSIZ), name.encode()[:IFNAMSIZ], addr)
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            fcntl.ioctl(sock.fileno(), SIOCETHTOOL, ifreq)
+    except OSError as e:
+        log.debug("ETHTOOL_GDRVINFO failed for '{}': {}".format(name, e))
+        return None
+
+    fields = ETHTOOL_DRVINFO.unpack(buf.tobytes())
+    return {
+        "driver": decode_cstr(fields[1]),
+        "version": decode_cstr(fields[2]),
+        "firmware": decode_cstr(fields[3]),
+        "bus_info": decode_cstr(fields[4]),
+    }
+
+
+def get_lshw_info():
+    # Workaround for x.large.arm: Skip framebuffer test ("-disable fb")
+    cmd = ["lshw", "-json", "-disable", "fb"]
+    return json.loads(subprocess.run(cmd, check=True, stdout=subprocess.PIPE).stdout)
+
+
+def lshw_nodes(node):
+    if isinstance(node, list):
+        for item in node:
+            yield from lshw_nodes(item)
+        return
+    yield node
+    for child in node.get("children", ()):
+        yield from lshw_nodes(child)
+
+
+def lshw_firmware(name):
+    """
+    Looks up the firmware version of `name` in lshw's output, only running lshw
+    once and only if it's installed.
+    """
+    global _lshw_info
+    if _lshw_info is None:
+        if not shutil.which("lshw"):
+            return None
+        try:
+            _lshw_info = get_lshw_info()
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            log.debug("lshw fallback failed: {}".format(e))
+            _lshw_info = []
+
+    for node in lshw_nodes(_lshw_info):
+        if node.get("class") == "network" and node.get("logicalname") == name:
+            return node.get("configuration", {}).get("firmware")
+    return None
+
+
+def count_queues(path):
+    try:
+        queues = os.listdir(os.path.join(path, "queues"))
+    except OSError:
+        return {}
+    return {
+        "rx_queues": sum(1 for q in queues if q.startswith("rx-")),
+        "tx_queues": sum(1 for q in queues if q.startswith("tx-")),
+    }
+
+
+def probe(name, sysfs=SYSFS_NET):
+    """
+    Returns the hardware facts and link state of NIC `name`, anything that
+    couldn't be determined is None.
+    """
+    path = os.path.join(sysfs, name)
+    device = os.path.join(path, "device")
+    info = {
+        "pci": None,
+        "vendor_id": read_int(os.path.join(device, "vendor"), 16),
+        "device_id": read_int(os.path.join(device, "device"), 16),
+        "driver": None,
+        "firmware": None,
+        "speed": None,
+        "carrier": None,
+        "operstate": read_attr(os.path.join(path, "operstate")),
+        "numa_node": None,
+        "rx_queues": None,
+        "tx_queues": None,
+    }
+    try:
+        info["pci"] = os.path.basename(os.readlink(device))
+        info["driver"] = os.path.basename(os.readlink(os.path.join(device, "driver")))
+    except OSError:
+        pass
+
+    speed = read_int(os.path.join(path, "speed"))
+    if speed is not None and speed > 0:
+        info["speed"] = speed
+    carrier = read_int(os.path.join(path, "carrier"))
+    if carrier is not None:
+        info["carrier"] = bool(carrier)
+
+    numa_node = read_int(os.path.join(device, "numa_node"))
+    if numa_node is not None and numa_node >= 0:
+        info["numa_node"] = numa_node
+    info.update(count_queues(path))
+
+    drvinfo = ethtool_drvinfo(name)
+    if drvinfo:
+        info["firmware"] = drvinfo["firmware"] or None
+        info["driver"] = info["driver"] or drvinfo["driver"] or None
+        # virtio and friends hang off another bus, the ioctl knows the PCI slot
+        info["pci"] = drvinfo["bus_info"] or info["pci"]
+    else:
+        info["firmware"] = lshw_firmware(name)
+    return info
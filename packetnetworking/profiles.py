@@ -0,0 +1,288 @@
+"""
+Network profiles.
+
+Defaults for how hosts are networked, per plan: bonding options, MTUs, NIC
+tuning, packet steering, sysctls, IPv6 fast readiness and the resolver. Each
+setting starts from its default (`DEFAULT_*` where there's more than one
+value), is updated by the plan's entry in the matching `PLAN_*` table, if
+any, and finally by the metadata's `network` section.
+
+Bonding options are named after the bonding driver's parameters and NIC
+tuning after ethtool's, templates only translate them to their distro's
+syntax.
+"""
+import logging
+
+log = logging.getLogger()
+
+# Rendered in this order, an option set to None is left out
+BONDING_OPTIONS = (
+    "miimon",
+    "downdelay",
+    "updelay",
+    "arp_interval",
+    "arp_ip_target",
+    "xmit_hash_policy",
+    "lacp_rate",
+    "ad_select",
+    "min_links",
+)
+
+DEFAULT_BONDING = {
+    "miimon": 100,
+    "downdelay": 200,
+    "updelay": 200,
+    "arp_interval": None,
+    "arp_ip_target": None,
+    "xmit_hash_policy": "layer3+4",
+    "lacp_rate": 1,
+    "ad_select": None,
+    "min_links": None,
+}
+
+# 4 port plans, picking the aggregator with the most bandwidth rather than the
+# first one keeps a failed link from leaving the bond on its smaller half.
+PLAN_BONDING = {
+    "n3.xlarge.x86": {"ad_select": "bandwidth"},
+}
+
+# Plans whose fabric carries jumbo frames end to end
+PLAN_MTU = {
+    "n3.xlarge.x86": 9000,
+}
+
+# Many-core plans whose NIC interrupts otherwise land on a handful of CPUs
+PLAN_STEERING = ("n2.xlarge.x86", "m2.xlarge.x86")
+
+# Plans whose static IPv6 addresses are usable as soon as they're configured:
+# no duplicate address detection on them and no router advertisements
+# accepted. Opt-in, e.g. ("n3.xlarge.x86",), `network.ipv6_fast_ready`
+# overrides it either way.
+PLAN_IPV6_FAST_READY = ()
+
+
+def ipv6_fast_ready(plan=None, override=None):
+    if override is not None:
+        return bool(override)
+    return (plan or "").lower() in PLAN_IPV6_FAST_READY
+
+
+LACP_MODES = (4, "4", "802.3ad")
+LACP_ONLY_OPTIONS = ("lacp_rate", "ad_select", "min_links")
+MII_OPTIONS = ("miimon", "downdelay", "updelay")
+
+
+def drop_unsupported(options, mode):
+    """
+    Unsets the options the bonding driver rejects in `mode`, or in combination
+    with the other options.
+    """
+    lacp = mode in LACP_MODES
+    if options["arp_interval"]:
+        if lacp:
+            log.warning("ARP monitoring isn't supported with 802.3ad, ignoring it")
+            options["arp_interval"] = options["arp_ip_target"] = None
+        else:
+            # the bonding driver runs a single link monitor
+            for key in MII_OPTIONS:
+                options[key] = None
+    if not lacp:
+        for key in LACP_ONLY_OPTIONS:
+            options[key] = None
+
+
+def bonding_options(mode, plan=None, overrides=None):
+    """
+    Returns the options for a bond in `mode`, in the order they should be
+    rendered and starting with the mode itself.
+    """
+    options = dict(DEFAULT_BONDING)
+    options.update(PLAN_BONDING.get((plan or "").lower(), {}))
+    for key in BONDING_OPTIONS:
+        if overrides and key in overrides:
+            options[key] = overrides[key]
+
+    if isinstance(options["arp_ip_target"], (list, tuple)):
+        options["arp_ip_target"] = ",".join(options["arp_ip_target"])
+
+    drop_unsupported(options, mode)
+
+    rendered = {"mode": mode}
+    for key in BONDING_OPTIONS:
+        if options[key] is not None:
+            rendered[key] = options[key]
+    return rendered
+
+
+# NIC tuning, applied to every physical NIC, options of each section are named
+# after their ethtool parameter
+NIC_TUNING_OPTIONS = {
+    "rings": ("rx", "tx"),
+    "channels": ("combined", "rx", "tx"),
+    "offloads": ("gro", "gso", "tso", "lro"),
+    "coalesce": ("adaptive_rx", "adaptive_tx", "rx_usecs", "tx_usecs"),
+}
+
+PLAN_NIC_TUNING = {
+    "n3.xlarge.x86": {"rings": {"rx": 4096, "tx": 4096}},
+}
+
+
+def nic_tuning(plan=None, *overrides):
+    """
+    Returns the NIC tuning for `plan`, updated by each of `overrides` in turn
+    (the metadata's `network.tuning`, then the interface's `tuning`). Sections
+    only hold the options that are set.
+    """
+    tuning = {section: {} for section in NIC_TUNING_OPTIONS}
+    layers = [PLAN_NIC_TUNING.get((plan or "").lower())] + list(overrides)
+    for layer in layers:
+        for section, options in (layer or {}).items():
+            if section not in NIC_TUNING_OPTIONS:
+                log.warning("Ignoring unknown NIC tuning section '{}'".format(section))
+                continue
+            for key, value in options.items():
+                if key not in NIC_TUNING_OPTIONS[section]:
+                    log.warning(
+                        "Ignoring unknown NIC tuning option '{}.{}'".format(
+                            section, key
+                        )
+                    )
+                    continue
+                tuning[section][key] = value
+
+    for section, keys in NIC_TUNING_OPTIONS.items():
+        options = tuning[section]
+        tuning[section] = {k: options[k] for k in keys if options.get(k) is not None}
+    return tuning
+
+
+# Network stack sysctls written to etc/sysctl.d/ on every host. Larger socket
+# buffer limits let single flows fill 10G+ links, a value set to None is left
+# at the kernel's default.
+DEFAULT_SYSCTL = {
+    "net.core.rmem_max": 16777216,
+    "net.core.wmem_max": 16777216,
+    "net.ipv4.tcp_rmem": (4096, 131072, 16777216),
+    "net.ipv4.tcp_wmem": (4096, 16384, 16777216),
+    "net.core.netdev_max_backlog": 5000,
+}
+
+# 25G/100G plans, with deeper buffers and backlog, BBR pacing over fq and
+# socket busy polling for the latency sensitive workloads they host.
+PLAN_SYSCTL = {
+    "n3.xlarge.x86": {
+        "net.core.rmem_max": 67108864,
+        "net.core.wmem_max": 67108864,
+        "net.ipv4.tcp_rmem": (4096, 131072, 67108864),
+        "net.ipv4.tcp_wmem": (4096, 16384, 67108864),
+        "net.core.netdev_max_backlog": 250000,
+        "net.core.default_qdisc": "fq",
+        "net.ipv4.tcp_congestion_control": "bbr",
+        "net.core.busy_poll": 50,
+        "net.core.busy_read": 50,
+    },
+}
+
+
+# Lets addresses be used while duplicate address detection is still running,
+# for the interfaces whose configuration can't turn it off
+IPV6_FAST_READY_SYSCTL = {
+    "net.ipv6.conf.default.optimistic_dad": 1,
+    "net.ipv6.conf.default.use_optimistic": 1,
+}
+
+
+def ipv6_fast_ready_sysctl(link=None):
+    """
+    Returns `IPV6_FAST_READY_SYSCTL` along with the same settings for `link`,
+    which may already exist by the time the defaults are applied. systemd's
+    udev rules apply them again once the interface shows up.
+    """
+    settings = dict(IPV6_FAST_READY_SYSCTL)
+    if link:
+        for key, value in IPV6_FAST_READY_SYSCTL.items():
+            settings[key.replace(".default.", ".{}.".format(link))] = value
+    return settings
+
+
+def sysctl_settings(plan=None, overrides=None, ipv6_fast_ready=False, link=None):
+    """
+    Returns the sysctls for `plan`, updated by `overrides` (the metadata's
+    `network.sysctl`). Multi-valued settings are joined with spaces, settings
+    set to None are left out.
+    """
+    settings = dict(DEFAULT_SYSCTL)
+    settings.update(PLAN_SYSCTL.get((plan or "").lower(), {}))
+    if ipv6_fast_ready:
+        settings.update(ipv6_fast_ready_sysctl(link))
+    settings.update(overrides or {})
+
+    rendered = {}
+    for key, value in settings.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = " ".join(str(v) for v in value)
+        elif isinstance(value, bool):
+            value = int(value)
+        rendered[key] = value
+    return rendered
+
+
+# Resolver settings, the first four are written to resolv.conf's `options`
+# line and the others to systemd-resolved's [Resolve] section, a setting set
+# to None (or False for resolv.conf flags) is left at the resolver's default.
+# Two 2s attempts per nameserver rather than glibc's two 5s ones keep a dead
+# nameserver from stalling every lookup.
+DEFAULT_RESOLVER = {
+    "timeout": 2,
+    "attempts": 2,
+    "rotate": False,
+    "single_request_reopen": False,
+    "cache": None,
+    "dns_stub_listener": None,
+    "fallback_dns": None,
+}
+RESOLV_CONF_OPTIONS = ("timeout", "attempts", "rotate", "single_request_reopen")
+RESOLVED_SETTINGS = {
+    "cache": "Cache",
+    "dns_stub_listener": "DNSStubListener",
+    "fallback_dns": "FallbackDNS",
+}
+
+
+def resolved_value(value):
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, (list, tuple)):
+        return " ".join(value)
+    return value
+
+
+def resolver_settings(overrides=None):
+    """
+    Returns the resolver profile updated by `overrides` (the metadata's
+    `network.resolver`), as the resolv.conf `options` and the
+    systemd-resolved (key, value) settings to render.
+    """
+    settings = dict(DEFAULT_RESOLVER)
+    for key, value in (overrides or {}).items():
+        if key not in DEFAULT_RESOLVER:
+            log.warning("Ignoring unknown resolver option '{}'".format(key))
+            continue
+        settings[key] = value
+
+    options = []
+    for key in RESOLV_CONF_OPTIONS:
+        value = settings[key]
+        if value is None or value is False:
+            continue
+        name = key.replace("_", "-")
+        options.append(name if value is True else "{}:{}".format(name, value))
+    resolved = [
+        (name, resolved_value(settings[key]))
+        for key, name in RESOLVED_SETTINGS.items()
+        if settings[key] is not None
+    ]
+    return {"options": options, "resolved": resolved}
@@ -0,0 +1,122 @@
+"""
+Profiling support for the `--profile` cli option.
+
+Only imported when profiling has been requested. `Profiler` wraps a run and
+writes either a cProfile pstats dump, or a collapsed stack file (one
+`frame;frame;frame microseconds` line per unique stack) which can be fed to
+flamegraph.pl, speedscope or inferno. Optionally a tracemalloc report of the
+top allocation sites is written next to it.
+"""
+import logging
+import os
+import sys
+import time
+
+log = logging.getLogger()
+
+FORMATS = ("pstats", "collapsed")
+DEFAULT_PATH = "packet-networking.prof"
+
+
+def frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return "{}:{}:{}".format(module, code.co_name, code.co_firstlineno)
+
+
+def cfunc_label(func):
+    module = getattr(func, "__module__", None) or "builtins"
+    name = getattr(func, "__qualname__", None) or getattr(func, "__name__", "?")
+    return "{}:{}".format(module, name)
+
+
+class CollapsedStackProfiler(object):
+    """
+    Deterministic profiler recording the self time of every unique call stack.
+    """
+
+    def __init__(self):
+        self.stacks = {}
+        self._stack = []
+
+    def _profile(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        if event == "call":
+            self._stack.append([frame_label(frame), now, 0])
+        elif event == "c_call":
+            self._stack.append([cfunc_label(arg), now, 0])
+        elif event in ("return", "c_return", "c_exception"):
+            if not self._stack:
+                # returning from a frame entered before profiling started
+                return
+            label, start, children = self._stack.pop()
+            elapsed = now - start
+            key = tuple(entry[0] for entry in self._stack) + (label,)
+            self.stacks[key] = self.stacks.get(key, 0) + elapsed - children
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def enable(self):
+        sys.setprofile(self._profile)
+
+    def disable(self):
+        sys.setprofile(None)
+
+    def dump_stats(self, path):
+        with open(path, "w") as f:
+            for stack, elapsed in sorted(self.stacks.items()):
+                micros = elapsed // 1000
+                if micros:
+                    f.write("{} {:d}\n".format(";".join(stack), micros))
+
+
+class Profiler(object):
+    def __init__(self, path=None, fmt="pstats", memory_top=0):
+        if fmt not in FORMATS:
+            raise ValueError("Unknown profile format '{}'".format(fmt))
+        self.path = path or DEFAULT_PATH
+        self.fmt = fmt
+        self.memory_top = memory_top
+        if fmt == "collapsed":
+            self.profiler = CollapsedStackProfiler()
+        else:
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+
+    @property
+    def memory_path(self):
+        return self.path + ".tracemalloc.txt"
+
+    def __enter__(self):
+        if self.memory_top:
+            import tracemalloc
+
+            tracemalloc.start()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.disable()
+        self.profiler.dump_stats(self.path)
+        log.info("Profile ({}) written to '{}'".format(self.fmt, self.path))
+        if self.memory_top:
+            self.write_memory_report()
+        return False
+
+    def write_memory_report(self):
+        import tracemalloc
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = snapshot.statistics("lineno")[: self.memory_top]
+        with open(self.memory_path, "w") as f:
+            f.write(
+                "current={:d}B peak={:d}B top {:d} allocation sites:\n".format(
+                    current, peak, len(stats)
+                )
+            )
+            for stat in stats:
+                f.write("{}\n".format(stat))
+        log.info("Allocation report written to '{}'".format(self.memory_path))
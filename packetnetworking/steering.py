@@ -0,0 +1,106 @@
+"""
+Receive/transmit packet steering.
+
+Plans how the queues and interrupts of a NIC are spread over the CPUs of its
+NUMA node: every rx queue gets an RPS mask and every tx queue an XPS mask
+covering its share of the node's CPUs, and the NIC's interrupts are handed
+out round robin over the same CPUs by the generated `packet-steering` script.
+"""
+import glob
+import os
+
+SYSFS = "/sys"
+
+
+def parse_cpulist(cpulist):
+    """
+    Parses the kernel's cpulist format ("0-3,8,10-11") into a list of CPUs.
+    """
+    cpus = []
+    for part in cpulist.strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+def cpu_mask(cpus):
+    """
+    Returns the hex CPU mask for `cpus`, in 32 bit groups separated by commas
+    as the kernel reads and writes them.
+    """
+    mask = 0
+    for cpu in cpus:
+        mask |= 1 << cpu
+    groups = []
+    while True:
+        groups.append(mask & 0xFFFFFFFF)
+        mask >>= 32
+        if not mask:
+            break
+    return ",".join(
+        ["{:x}".format(groups[-1])] + ["{:08x}".format(g) for g in groups[-2::-1]]
+    )
+
+
+def read_topology(sysfs=SYSFS):
+    """
+    Returns the online CPUs of each NUMA node, all of them under node 0 when
+    the kernel doesn't expose any nodes.
+    """
+    topology = {}
+    for path in glob.glob(os.path.join(sysfs, "devices/system/node/node[0-9]*")):
+        node = int(os.path.basename(path).replace("node", ""))
+        try:
+            with open(os.path.join(path, "cpulist")) as f:
+                cpus = parse_cpulist(f.read())
+        except OSError:
+            continue
+        if cpus:
+            topology[node] = cpus
+    if not topology:
+        try:
+            with open(os.path.join(sysfs, "devices/system/cpu/online")) as f:
+                topology[0] = parse_cpulist(f.read())
+        except OSError:
+            pass
+    return topology
+
+
+def split(cpus, count):
+    """
+    Splits `cpus` into `count` contiguous groups of near equal size, handing
+    out the CPUs round robin when there are more groups than CPUs.
+    """
+    if count <= 0:
+        return []
+    if len(cpus) < count:
+        return [[cpus[i % len(cpus)]] for i in range(count)]
+    size, extra = divmod(len(cpus), count)
+    groups = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(cpus[start:end])
+        start = end
+    return groups
+
+
+def plan(hardware, topology):
+    """
+    Returns the steering of a NIC from its probed `hardware`, None if its
+    queues are unknown.
+    """
+    if not hardware or not hardware.get("rx_queues") or not topology:
+        return None
+    cpus = topology.get(hardware.get("numa_node"))
+    if not cpus:
+        cpus = sorted(cpu for node_cpus in topology.values() for cpu in node_cpus)
+    return {
+        "cpus": cpus,
+        "rps": [cpu_mask(group) for group in split(cpus, hardware["rx_queues"])],
+        "xps": [
+            cpu_mask(group) for group in split(cpus, hardware.get("tx_queues") or 0)
+        ],
+    }
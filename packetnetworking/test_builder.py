@@ -54,6 +54,19 @@ def test_builder_initializes(mockit, fake_metadata):
     assert builder.initialized is True
 
 
+def test_builder_uses_preset_physical_interfaces(mockit, fake_metadata):
+    builder = Builder(fake_metadata())
+    builder.network.physical_interfaces = [
+        {"name": "enp0", "mac": "00:0c:29:51:53:a1"},
+        {"name": "enp1", "mac": "00:0c:29:51:53:a2"},
+    ]
+    with mockit(utils.get_interfaces) as mocked_ifaces:
+        builder.initialize()
+
+    mocked_ifaces.assert_not_called()
+    assert [iface.name for iface in builder.network.interfaces] == ["enp0", "enp1"]
+
+
 def test_builder_raises_exception_if_not_initialized(mockit, fake_metadata):
     builder = Builder()
     with pytest.raises(Exception):
@@ -85,3 +98,156 @@ def test_builder_runs(mockit, fake_metadata):
         builder.run("/path/to/rootfs")
 
     mocked_get_builder.assert_called_with(builder.metadata.operating_system.distro)
+
+
+def test_builder_triggers_pre_discovery_before_discovery(mockit, fake_metadata):
+    builder = Builder(fake_metadata())
+    phys_interfaces = [
+        {"name": "enp0", "mac": "00:0c:29:51:53:a1"},
+        {"name": "enp1", "mac": "00:0c:29:51:53:a2"},
+    ]
+    calls = []
+
+    def trigger(hook, *args, **kwargs):
+        calls.append(hook)
+        if hook == "pre_discovery":
+            builder.network.discovery.restrict_macs(["00:0c:29:51:53:a1"])
+
+    def get_interfaces(discovery=None):
+        calls.append("discovery")
+        assert discovery.macs == {"00:0c:29:51:53:a1"}
+        return phys_interfaces
+
+    with mockit(utils.get_interfaces, side_effect=get_interfaces):
+        with mock.patch.object(builder, "trigger", side_effect=trigger):
+            builder.initialize()
+
+    assert calls == ["pre_discovery", "discovery", "initialized"]
+
+
+def test_network_data_records_link_state(mockit, fake_metadata):
+    builder = Builder(fake_metadata())
+    phys_interfaces = [
+        {"name": "enp0", "mac": "00:0c:29:51:53:a1", "carrier": False},
+        {"name": "enp1", "mac": "00:0c:29:51:53:a2"},
+    ]
+    with mockit(utils.get_interfaces, return_value=phys_interfaces):
+        builder.initialize()
+
+    enp0, enp1 = builder.network.interfaces
+    assert (enp0.carrier, enp0.operstate, enp0.speed, enp0.link_rank) == (
+        False,
+        None,
+        None,
+        2,
+    )
+    assert (enp1.carrier, enp1.operstate, enp1.speed, enp1.link_rank) == (
+        None,
+        None,
+        None,
+        1,
+    )
+
+
+@pytest.mark.parametrize(
+    "plan,mtu,expected",
+    [
+        ("c3.small.x86", None, {"bond0": None, "enp2": None}),
+        ("n3.xlarge.x86", None, {"bond0": 9000, "enp2": 9000}),
+        ("n3.xlarge.x86", 1500, {"bond0": 1500, "enp2": 1500}),
+        ("c3.small.x86", {"bond0": 9000}, {"bond0": 9000, "enp2": None}),
+        (
+            "c3.small.x86",
+            {"default": 9000, "eth2": 1500},
+            {"bond0": 9000, "enp2": 1500},
+        ),
+    ],
+    ids=["none", "plan", "number", "bond", "interface"],
+)
+def test_network_data_resolves_mtu(mockit, fake_metadata, plan, mtu, expected):
+    metadata = fake_metadata()
+    metadata["plan"] = plan
+    metadata.network["mtu"] = mtu
+    metadata.network["interfaces"] = [
+        {"name": "eth0", "mac": "00:0c:29:51:53:a1", "bond": "bond0", "mtu": 1400},
+        {"name": "eth1", "mac": "00:0c:29:51:53:a2", "bond": "bond0"},
+        {"name": "eth2", "mac": "00:0c:29:51:53:a3"},
+    ]
+    phys_interfaces = [
+        {"name": "enp0", "mac": "00:0c:29:51:53:a1"},
+        {"name": "enp1", "mac": "00:0c:29:51:53:a2"},
+        {"name": "enp2", "mac": "00:0c:29:51:53:a3"},
+    ]
+    builder = Builder(metadata)
+    with mockit(utils.get_interfaces, return_value=phys_interfaces):
+        builder.initialize()
+
+    network = builder.network
+    assert network.mtu.bonds["bond0"] == expected["bond0"]
+    enp0, enp1, enp2 = network.interfaces
+    # slaves follow their bond, whatever their own MTU
+    assert enp0.mtu == enp1.mtu == expected["bond0"]
+    assert enp2.mtu == expected["enp2"]
+
+
+@pytest.mark.parametrize(
+    "plan,enabled,expected",
+    [
+        ("c3.small.x86", None, False),
+        ("n2.xlarge.x86", None, True),
+        ("n2.xlarge.x86", False, False),
+        ("c3.small.x86", True, True),
+    ],
+    ids=["default", "plan", "disabled", "enabled"],
+)
+def test_network_data_plans_steering(mockit, fake_metadata, plan, enabled, expected):
+    metadata = fake_metadata()
+    metadata["plan"] = plan
+    metadata.network["steering"] = enabled
+    hardware = {"numa_node": 0, "rx_queues": 2, "tx_queues": 2}
+    phys_interfaces = [
+        {"name": "enp0", "mac": "00:0c:29:51:53:a1", "hardware": hardware},
+        {"name": "enp1", "mac": "00:0c:29:51:53:a2"},
+    ]
+    builder = Builder(metadata)
+    with mockit(utils.get_interfaces, return_value=phys_interfaces):
+        with mock.patch(
+            "packetnetworking.steering.read_topology", return_value={0: [0, 1]}
+        ) as read_topology:
+            builder.initialize()
+
+    enp0, enp1 = builder.network.interfaces
+    assert read_topology.called == expected
+    assert enp1.steering is None
+    if expected:
+        assert enp0.steering == {"cpus": [0, 1], "rps": ["1", "2"], "xps": ["1", "2"]}
+    else:
+        assert enp0.steering is None
+
+
+def test_builder_collapses_private_subnets(mockit, fake_metadata):
+    subnets = ["10.0.0.0/8", "10.32.0.0/11", "172.17.0.0/16", "172.16.0.0/16"]
+    builder = Builder(fake_metadata({"private_subnets": subnets}))
+    phys_interfaces = [{"name": "enp0", "mac": "00:0c:29:51:53:a1"}]
+    with mockit(utils.get_interfaces, return_value=phys_interfaces):
+        builder.initialize()
+    assert builder.network.private_subnets == ["10.0.0.0/8", "172.16.0.0/15"]
+
+
+@pytest.mark.parametrize(
+    "timeout,expected",
+    [(0.5, 1), ("2", 2), (3, 3), ("soon", 4), (-1, 4), (None, 4)],
+)
+def test_network_data_link_wait_timeout_is_whole_seconds(
+    mockit, fake_metadata, timeout, expected
+):
+    metadata = {"network": {"link_wait": {"timeout": timeout}}}
+    builder = Builder(fake_metadata(metadata))
+    phys_interfaces = [
+        {"name": "enp0", "mac": "00:0c:29:51:53:a1"},
+        {"name": "enp1", "mac": "00:0c:29:51:53:a2"},
+    ]
+    with mockit(utils.get_interfaces, return_value=phys_interfaces):
+        builder.initialize()
+
+    assert builder.network.link_wait.timeout == expected
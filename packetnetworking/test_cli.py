@@ -1,4 +1,5 @@
 import copy
+import os
 import re
 import time
 import json
@@ -56,6 +57,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     0,  # verbose
                     False,  # quiet
                 ),
@@ -72,6 +74,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     0,  # verbose
                     False,  # quiet
                 ),
@@ -88,6 +91,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     0,  # verbose
                     False,  # quiet
                 ),
@@ -104,6 +108,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     0,  # verbose
                     False,  # quiet
                 ),
@@ -120,6 +125,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     0,  # verbose
                     False,  # quiet
                 ),
@@ -136,6 +142,7 @@ def assert_output(test, result):
                     "test version",  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     0,  # verbose
                     False,  # quiet
                 ),
@@ -152,6 +159,7 @@ def assert_output(test, result):
                     "test version",  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     0,  # verbose
                     False,  # quiet
                 ),
@@ -168,12 +176,30 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     "1.2.3.4,2.3.4.5",  # resolvers
+                    None,  # network_backend
                     0,  # verbose
                     False,  # quiet
                 ),
             },
             id="--resolvers defined",
         ),
+        pytest.param(
+            {
+                "args": default_args + ["--network-backend", "networkd"],
+                "exit_code": 0,
+                "called_with": (
+                    None,  # metadata_file
+                    "http://metadata.packet.net/metadata",  # metadata_url
+                    None,  # operating_system
+                    "packet-networking-test",  # rootfs
+                    None,  # resolvers
+                    "networkd",  # network_backend
+                    0,  # verbose
+                    False,  # quiet
+                ),
+            },
+            id="--network-backend defined",
+        ),
         pytest.param(
             {
                 "args": default_args + ["-v"],
@@ -184,6 +210,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     1,  # verbose
                     False,  # quiet
                 ),
@@ -200,6 +227,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     2,  # verbose
                     False,  # quiet
                 ),
@@ -216,6 +244,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     3,  # verbose
                     False,  # quiet
                 ),
@@ -232,6 +261,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     1,  # verbose
                     False,  # quiet
                 ),
@@ -248,6 +278,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     2,  # verbose
                     False,  # quiet
                 ),
@@ -264,6 +295,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     3,  # verbose
                     False,  # quiet
                 ),
@@ -280,6 +312,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     0,  # verbose
                     True,  # quiet
                 ),
@@ -296,6 +329,7 @@ def assert_output(test, result):
                     None,  # operating_system
                     "packet-networking-test",  # rootfs
                     None,  # resolvers
+                    None,  # network_backend
                     0,  # verbose
                     True,  # quiet
                 ),
@@ -380,6 +414,7 @@ def test_try_run_with_url(mockit, metadata):
             None,
             None,
             None,
+            None,
         )
     # fmt: on
 
@@ -403,6 +438,7 @@ def test_try_run_with_file(mockit, metadata):
             None,
             None,
             None,
+            None,
         )
     # fmt: on
 
@@ -526,3 +562,46 @@ def test_set_resolvers(md_resolvers, resolvers, expected, metadata):
     cli.set_resolvers(b, resolvers)
 
     assert b.network.resolvers == expected
+
+
+@pytest.mark.parametrize(
+    "md_backend,backend,expected",
+    [
+        pytest.param(None, None, None, id="None"),
+        pytest.param("networkd", None, "networkd", id="Metadata"),
+        pytest.param("networkd", "IFUPDOWN", "ifupdown", id="Override"),
+    ],
+)
+def test_set_network_backend(md_backend, backend, expected, mockit, metadata):
+    md = metadata(test_metadata)
+    md["network"]["backend"] = md_backend
+    b = builder.Builder(md)
+
+    cli.set_network_backend(b, backend)
+    with mockit(utils.get_interfaces, return_value=test_phys_interfaces):
+        b.initialize()
+
+    assert b.network.backend == expected
+
+
+def test_cli_profile_writes_pstats(mockit):
+    runner = CliRunner()
+    with runner.isolated_filesystem(), mockit(cli.try_run) as mocked_try_run:
+        result = runner.invoke(cli.cli, default_args + ["--profile", "run.prof"])
+        profile_written = os.path.exists("run.prof")
+        default_written = os.path.exists("packet-networking.prof")
+
+    assert result.exit_code == 0
+    mocked_try_run.assert_called_once()
+    assert profile_written
+    assert not default_written
+
+
+def test_cli_profile_without_path_uses_default(mockit):
+    runner = CliRunner()
+    with runner.isolated_filesystem(), mockit(cli.try_run):
+        result = runner.invoke(cli.cli, ["--profile"] + default_args)
+        default_written = os.path.exists("packet-networking.prof")
+
+    assert result.exit_code == 0
+    assert default_written
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from . import utils
+
+# Modules that must not be imported just by loading the cli, they are only
+# needed once metadata is fetched from a url or a distro builder is picked.
+deferred_modules = (
+    "requests",
+    "urllib3",
+    "jinja2",
+    "packetnetworking.distros.distro_builder",
+    "packetnetworking.distros.alpine",
+    "packetnetworking.distros.debian",
+    "packetnetworking.distros.redhat",
+)
+
+
+def imported_modules(statement):
+    """Returns the modules imported by `statement` according to -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=os.path.dirname(utils.package_dir),
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    modules = set()
+    for line in result.stderr.decode().splitlines():
+        if not line.startswith("import time:"):
+            continue
+        modules.add(line.rsplit("|", 1)[-1].strip())
+    return modules
+
+
+def was_imported(module, modules):
+    # modules imported through importlib.import_module aren't reported by
+    # -X importtime, their submodules imported with `import` are.
+    prefix = module + "."
+    return any(m == module or m.startswith(prefix) for m in modules)
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        pytest.param("import packetnetworking", id="package"),
+        pytest.param("import packetnetworking.cli", id="cli"),
+        pytest.param("from packetnetworking import Builder", id="Builder"),
+    ],
+)
+def test_import_defers_heavy_modules(statement):
+    modules = imported_modules(statement)
+    assert "packetnetworking" in modules
+    for module in deferred_modules:
+        assert not was_imported(module, modules)
+
+
+def test_get_builder_only_imports_selected_distro():
+    modules = imported_modules(
+        "from packetnetworking import Builder; Builder().get_builder('debian')"
+    )
+    assert was_imported("jinja2", modules)
+    assert was_imported("packetnetworking.distros.debian", modules)
+    assert not was_imported("packetnetworking.distros.alpine", modules)
+    assert not was_imported("packetnetworking.distros.redhat", modules)
+    assert not was_imported("requests", modules)
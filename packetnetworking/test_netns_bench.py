@@ -0,0 +1,249 @@
+import os
+import subprocess
+
+import click
+import mock
+import pytest
+
+from . import netns_bench
+from .builder import Builder
+
+
+@pytest.fixture
+def bench_builder(metadata):
+    def _bench_builder(distro="debian", version="12", backend=None, public=True):
+        interfaces = [
+            {"name": "eth0", "mac": "00:0c:29:51:53:a1", "bond": "bond0"},
+            {"name": "eth1", "mac": "00:0c:29:51:53:a2", "bond": "bond0"},
+        ]
+        builder = Builder(
+            metadata(
+                {
+                    "operating_system": {"distro": distro, "version": version},
+                    "network": {"interfaces": interfaces, "backend": backend},
+                },
+                public=public,
+            )
+        )
+        builder.network.physical_interfaces = [
+            {"name": iface["name"], "mac": iface["mac"]} for iface in interfaces
+        ]
+        return builder.initialize()
+
+    return _bench_builder
+
+
+def test_relocate_points_paths_under_rootfs():
+    content = "up /etc/network/wait-link bond0\nup ip -b /etc/network/wait-link.d\n"
+    relocated = netns_bench.relocate(
+        content, ["etc/network/wait-link", "etc/network/wait-link.d"], "/tmp/root"
+    )
+    assert relocated == (
+        "up /tmp/root/etc/network/wait-link bond0\n"
+        "up ip -b /tmp/root/etc/network/wait-link.d\n"
+    )
+
+
+def test_relocate_without_paths():
+    assert netns_bench.relocate("auto lo\n", [], "/tmp/root") == "auto lo\n"
+
+
+def test_render_writes_relocated_interfaces(bench_builder, tmp_path):
+    rootfs = str(tmp_path)
+    _, tasks = netns_bench.render(bench_builder(), rootfs)
+
+    assert netns_bench.INTERFACES in tasks
+    with open(os.path.join(rootfs, netns_bench.INTERFACES)) as f:
+        content = f.read()
+    for path in tasks:
+        if path != netns_bench.INTERFACES:
+            assert " /" + path not in content
+
+
+def test_render_rejects_daemon_backends(bench_builder, tmp_path):
+    builder = bench_builder(backend="networkd")
+    with pytest.raises(click.ClickException):
+        netns_bench.render(builder, str(tmp_path))
+
+
+def test_expected_state_bonded(bench_builder, tmp_path):
+    distro_builder, _ = netns_bench.render(bench_builder(), str(tmp_path))
+    expected = netns_bench.expected_state(distro_builder)
+
+    ipv4pub = distro_builder.ipv4pub.first
+    ipv4priv = distro_builder.ipv4priv.first
+    ipv6pub = distro_builder.ipv6pub.first
+    assert expected["link"] == "bond0"
+    assert expected["addresses"] == [
+        "{}/{}".format(ipv4pub.address, ipv4pub.cidr),
+        "{}/{}".format(ipv4priv.address, ipv4priv.cidr),
+        "{}/{}".format(ipv6pub.address, ipv6pub.cidr),
+    ]
+    assert expected["routes"] == {
+        "ipv4": ["default", "10.0.0.0/8"],
+        "ipv6": ["default"],
+    }
+
+
+def test_expected_state_private_only(bench_builder, tmp_path):
+    distro_builder, _ = netns_bench.render(bench_builder(public=False), str(tmp_path))
+    expected = netns_bench.expected_state(distro_builder)
+
+    ipv4priv = distro_builder.ipv4priv.first
+    assert expected["addresses"] == ["{}/{}".format(ipv4priv.address, ipv4priv.cidr)]
+    assert expected["routes"] == {"ipv4": ["default"], "ipv6": []}
+
+
+LINKS = [
+    {"ifname": "lo", "flags": ["LOOPBACK", "UP", "LOWER_UP"]},
+    {"ifname": "bond0", "flags": ["BROADCAST", "MULTICAST", "MASTER", "UP"]},
+]
+ADDRESSES = [
+    {
+        "ifname": "bond0",
+        "addr_info": [
+            {"family": "inet", "local": "139.178.86.11", "prefixlen": 31},
+            {
+                "family": "inet6",
+                "local": "2604:1380:1::1",
+                "prefixlen": 127,
+                "tentative": True,
+            },
+        ],
+    }
+]
+
+
+def test_link_ready():
+    assert not netns_bench.link_ready(LINKS, "bond0")
+    assert not netns_bench.link_ready(LINKS, "eth0")
+    links = [{"ifname": "bond0", "flags": ["MASTER", "UP", "LOWER_UP"]}]
+    assert netns_bench.link_ready(links, "bond0")
+
+
+def test_addresses_ready_ignores_tentative_addresses():
+    assert netns_bench.addresses_ready(ADDRESSES, ["139.178.86.11/31"])
+    assert not netns_bench.addresses_ready(
+        ADDRESSES, ["139.178.86.11/31", "2604:1380:1::1/127"]
+    )
+
+
+def test_routes_ready():
+    routes = [
+        {"dst": "default", "gateway": "139.178.86.10"},
+        {"dst": "139.178.86.10/31"},
+    ]
+    assert netns_bench.routes_ready(routes, ["default"])
+    assert not netns_bench.routes_ready(routes, ["default", "10.0.0.0/8"])
+    assert netns_bench.routes_ready([], [])
+
+
+def test_readiness_records_first_time_reached():
+    expected = {
+        "link": "bond0",
+        "addresses": ["139.178.86.11/31"],
+        "routes": {"ipv4": ["default"], "ipv6": []},
+    }
+    readiness = netns_bench.Readiness(expected)
+    links = [{"ifname": "bond0", "flags": ["UP", "LOWER_UP"]}]
+    readiness.update(0.1, links, [], [], [])
+    readiness.update(0.2, links, ADDRESSES, [{"dst": "default"}], [])
+    readiness.update(0.3, links, ADDRESSES, [{"dst": "default"}], [])
+
+    assert readiness.times == {
+        "link": 0.1,
+        "addresses": 0.2,
+        "routes": 0.2,
+        "applied": None,
+    }
+    assert not readiness.done
+    readiness.reach("applied", 0.4)
+    assert readiness.done
+
+
+def test_summarize():
+    runs = [
+        {"link": 0.1, "addresses": 0.3, "routes": 0.4, "applied": 1.0},
+        {"link": 0.2, "addresses": 0.2, "routes": 0.5, "applied": 2.0},
+        {"link": 0.3, "addresses": None, "routes": 0.6, "applied": 3.0},
+    ]
+    summary = netns_bench.summarize(runs)
+
+    assert summary["link"] == pytest.approx(
+        {"min": 100, "median": 200, "max": 300, "reached": 3}
+    )
+    assert summary["addresses"] == pytest.approx(
+        {"min": 200, "median": 250, "max": 300, "reached": 2}
+    )
+    assert netns_bench.summarize([{m: None for m in netns_bench.MILESTONES}]) == {
+        m: None for m in netns_bench.MILESTONES
+    }
+
+
+def test_format_summary():
+    summary = netns_bench.summarize(
+        [{"link": 0.1, "addresses": 0.2, "routes": 0.3, "applied": None}]
+    )
+    lines = netns_bench.format_summary(summary).splitlines()
+    assert lines[1].split() == ["link", "100.0ms", "100.0ms", "100.0ms"]
+    assert lines[-1].split() == ["applied", "-"]
+
+
+def test_namespace_rejects_unknown_nic_kind():
+    with pytest.raises(ValueError):
+        netns_bench.Namespace("bench", [], "macvlan")
+
+
+def test_namespace_command_isolates_run_and_resolv_conf():
+    ns = netns_bench.Namespace("bench", [])
+    cmd = ns.command("ifup", "-a")
+    assert cmd[:4] == ["ip", "netns", "exec", "bench"]
+    assert ns.etc == "/etc/netns/bench"
+
+    # the wrapper hands its arguments over untouched once /run is replaced
+    wrapper = cmd[4:]
+    wrapper[2] = wrapper[2].replace("mount -t tmpfs tmpfs /run", "true")
+    out = subprocess.run(
+        wrapper[:-2] + ["echo", "a b", "$c"], stdout=subprocess.PIPE, check=True
+    )
+    assert out.stdout == b"a b $c\n"
+
+
+def test_namespace_adds_dummy_nics_in_the_namespace(monkeypatch, tmp_path):
+    monkeypatch.setattr(netns_bench, "NETNS_ETC", str(tmp_path))
+    nics = [{"name": "eth0", "mac": "00:0c:29:51:53:a1"}]
+    with mock.patch.object(netns_bench, "ip") as ip:
+        netns_bench.Namespace("bench", nics, "dummy").__enter__()
+
+    assert ip.call_args_list == [
+        mock.call("netns", "add", "bench"),
+        mock.call(
+            "link",
+            "add",
+            "eth0",
+            "netns",
+            "bench",
+            "address",
+            "00:0c:29:51:53:a1",
+            "type",
+            "dummy",
+        ),
+    ]
+
+
+def test_namespace_cleans_up_when_setup_fails(monkeypatch, tmp_path):
+    monkeypatch.setattr(netns_bench, "NETNS_ETC", str(tmp_path))
+    nics = [{"name": "eth0", "mac": "00:0c:29:51:53:a1"}]
+    ns = netns_bench.Namespace("bench", nics)
+    error = subprocess.CalledProcessError(2, ["ip"])
+    with mock.patch.object(netns_bench, "ip", side_effect=[None, None, error]):
+        with mock.patch("subprocess.run") as run:
+            with pytest.raises(subprocess.CalledProcessError):
+                with ns:
+                    pass
+
+    assert run.call_args_list == [
+        mock.call(["ip", "netns", "del", "bench"], stderr=subprocess.DEVNULL),
+        mock.call(["ip", "netns", "del", "bench-peer"], stderr=subprocess.DEVNULL),
+    ]
+    assert not os.path.exists(ns.etc)
@@ -0,0 +1,126 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from . import probe, utils
+
+
+@pytest.fixture(autouse=True)
+def no_lshw_cache():
+    with patch.object(probe, "_lshw_info", None):
+        yield
+
+
+def test_probe_reads_sysfs_and_ethtool(fake_sysfs):
+    fake_sysfs.add_netdev(
+        "enp1s0f0",
+        "b8:59:9f:11:22:33",
+        driver="mlx5_core",
+        pci="0000:01:00.0",
+        speed=25000,
+        carrier=1,
+        operstate="up",
+        device__vendor="0x15b3",
+        device__device="0x1015",
+        device__numa_node=1,
+        **{
+            "queues__rx-0__rps_cpus": 0,
+            "queues__rx-1__rps_cpus": 0,
+            "queues__tx-0__xps_cpus": 0,
+            "queues__tx-1__xps_cpus": 0,
+        },
+    )
+    drvinfo = {
+        "driver": "mlx5_core",
+        "version": "5.15",
+        "firmware": "14.32.1010 (MT_2420110034)",
+        "bus_info": "0000:01:00.0",
+    }
+    with patch.object(probe, "ethtool_drvinfo", return_value=drvinfo), patch.object(
+        probe, "lshw_firmware"
+    ) as lshw_firmware:
+        info = probe.probe("enp1s0f0", utils.SYSFS_NET)
+
+    lshw_firmware.assert_not_called()
+    assert info == {
+        "pci": "0000:01:00.0",
+        "vendor_id": 0x15B3,
+        "device_id": 0x1015,
+        "driver": "mlx5_core",
+        "firmware": "14.32.1010 (MT_2420110034)",
+        "speed": 25000,
+        "carrier": True,
+        "operstate": "up",
+        "numa_node": 1,
+        "rx_queues": 2,
+        "tx_queues": 2,
+    }
+
+
+def test_probe_link_down(fake_sysfs):
+    # the kernel reports -1 for the speed of a NIC without link
+    fake_sysfs.add_netdev("eth0", "b8:59:9f:11:22:33", driver="ixgbe", speed=-1)
+    with patch.object(probe, "ethtool_drvinfo", return_value=None), patch.object(
+        probe, "lshw_firmware", return_value=None
+    ):
+        info = probe.probe("eth0", utils.SYSFS_NET)
+
+    assert info["driver"] == "ixgbe"
+    assert info["speed"] is None
+    assert info["carrier"] is None
+    assert info["vendor_id"] is None
+    assert info["numa_node"] is None
+    assert info["rx_queues"] is None
+
+
+def test_probe_missing_device(fake_sysfs):
+    with patch.object(probe, "ethtool_drvinfo", return_value=None), patch.object(
+        probe, "lshw_firmware", return_value=None
+    ):
+        info = probe.probe("missing", utils.SYSFS_NET)
+
+    assert set(info.values()) == {None}
+
+
+def test_ethtool_drvinfo_unsupported():
+    assert probe.ethtool_drvinfo("pn-missing0") is None
+
+
+LSHW = {
+    "id": "computer",
+    "class": "system",
+    "children": [
+        {
+            "id": "core",
+            "class": "bus",
+            "children": [
+                {
+                    "id": "network:0",
+                    "class": "network",
+                    "logicalname": "eth0",
+                    "configuration": {"driver": "ixgbe", "firmware": "0x800003e7"},
+                },
+                {"id": "network:1", "class": "network", "logicalname": "eth1"},
+            ],
+        }
+    ],
+}
+
+
+def test_lshw_firmware_runs_lshw_once():
+    with patch("shutil.which", return_value="/usr/bin/lshw"), patch(
+        "subprocess.run"
+    ) as mocked_run:
+        mocked_run.return_value.stdout = json.dumps(LSHW).encode()
+        assert probe.lshw_firmware("eth0") == "0x800003e7"
+        assert probe.lshw_firmware("eth1") is None
+        assert probe.lshw_firmware("eth2") is None
+
+    mocked_run.assert_called_once()
+
+
+def test_lshw_firmware_without_lshw():
+    with patch("shutil.which", return_value=None), patch("subprocess.run") as run:
+        assert probe.lshw_firmware("eth0") is None
+    run.assert_not_called()
@@ -0,0 +1,176 @@
+import pytest
+
+from . import profiles
+
+
+def test_bonding_options_defaults():
+    assert profiles.bonding_options(4) == {
+        "mode": 4,
+        "miimon": 100,
+        "downdelay": 200,
+        "updelay": 200,
+        "xmit_hash_policy": "layer3+4",
+        "lacp_rate": 1,
+    }
+
+
+def test_bonding_options_plan_defaults():
+    options = profiles.bonding_options(4, plan="N3.XLarge.x86")
+    assert options["ad_select"] == "bandwidth"
+    assert "ad_select" not in profiles.bonding_options(4, plan="c3.small.x86")
+
+
+def test_bonding_options_metadata_overrides_plan():
+    overrides = {
+        "mode": 4,
+        "link_aggregation": "bonded",
+        "ad_select": "count",
+        "lacp_rate": "slow",
+        "min_links": 1,
+        "xmit_hash_policy": "layer2+3",
+    }
+    options = profiles.bonding_options(4, "n3.xlarge.x86", overrides)
+    assert list(options.items()) == [
+        ("mode", 4),
+        ("miimon", 100),
+        ("downdelay", 200),
+        ("updelay", 200),
+        ("xmit_hash_policy", "layer2+3"),
+        ("lacp_rate", "slow"),
+        ("ad_select", "count"),
+        ("min_links", 1),
+    ]
+
+
+def test_bonding_options_override_can_unset_default():
+    options = profiles.bonding_options(4, overrides={"xmit_hash_policy": None})
+    assert "xmit_hash_policy" not in options
+
+
+@pytest.mark.parametrize("mode", [1, "active-backup"])
+def test_bonding_options_drop_lacp_options(mode):
+    options = profiles.bonding_options(mode, overrides={"min_links": 1})
+    assert not set(profiles.LACP_ONLY_OPTIONS) & set(options)
+
+
+def test_bonding_options_arp_monitoring_replaces_miimon():
+    overrides = {"arp_interval": 250, "arp_ip_target": ["10.0.0.1", "10.0.0.2"]}
+    options = profiles.bonding_options(1, overrides=overrides)
+    assert options == {
+        "mode": 1,
+        "arp_interval": 250,
+        "arp_ip_target": "10.0.0.1,10.0.0.2",
+        "xmit_hash_policy": "layer3+4",
+    }
+
+
+def test_bonding_options_arp_monitoring_ignored_with_lacp():
+    options = profiles.bonding_options(4, overrides={"arp_interval": 250})
+    assert "arp_interval" not in options
+    assert options["miimon"] == 100
+
+
+def test_nic_tuning_layers():
+    tuning = profiles.nic_tuning(
+        "n3.xlarge.x86",
+        {"rings": {"tx": 2048}, "offloads": {"lro": False, "gro": True}},
+        {"offloads": {"gro": None}, "channels": {"combined": 8}},
+    )
+    assert tuning == {
+        "rings": {"rx": 4096, "tx": 2048},
+        "channels": {"combined": 8},
+        "offloads": {"lro": False},
+        "coalesce": {},
+    }
+
+
+def test_nic_tuning_ignores_unknown_options():
+    tuning = profiles.nic_tuning(
+        None, {"rings": {"rx": 512, "huge": 1}, "queues": {"rx": 1}}
+    )
+    assert tuning == {
+        "rings": {"rx": 512},
+        "channels": {},
+        "offloads": {},
+        "coalesce": {},
+    }
+
+
+def test_sysctl_settings_default():
+    settings = profiles.sysctl_settings()
+    assert settings["net.core.rmem_max"] == 16777216
+    assert settings["net.ipv4.tcp_rmem"] == "4096 131072 16777216"
+    assert "net.ipv4.tcp_congestion_control" not in settings
+
+
+def test_sysctl_settings_layers():
+    settings = profiles.sysctl_settings(
+        "N3.xlarge.x86",
+        {
+            "net.core.busy_poll": None,
+            "net.ipv6.conf.default.optimistic_dad": True,
+            "net.ipv4.tcp_wmem": [4096, 65536, 33554432],
+        },
+    )
+    assert settings["net.core.netdev_max_backlog"] == 250000
+    assert settings["net.ipv4.tcp_congestion_control"] == "bbr"
+    assert settings["net.ipv4.tcp_wmem"] == "4096 65536 33554432"
+    assert settings["net.ipv6.conf.default.optimistic_dad"] == 1
+    assert "net.core.busy_poll" not in settings
+
+
+def test_resolver_settings_default():
+    assert profiles.resolver_settings() == {
+        "options": ["timeout:2", "attempts:2"],
+        "resolved": [],
+    }
+
+
+def test_resolver_settings_overrides():
+    settings = profiles.resolver_settings(
+        {
+            "timeout": 1,
+            "attempts": None,
+            "rotate": True,
+            "single_request_reopen": True,
+            "cache": "no-negative",
+            "dns_stub_listener": False,
+            "fallback_dns": ["1.1.1.1", "2606:4700:4700::1111"],
+            "ndots": 2,
+        }
+    )
+    assert settings == {
+        "options": ["timeout:1", "rotate", "single-request-reopen"],
+        "resolved": [
+            ("Cache", "no-negative"),
+            ("DNSStubListener", "no"),
+            ("FallbackDNS", "1.1.1.1 2606:4700:4700::1111"),
+        ],
+    }
+
+
+def test_ipv6_fast_ready(monkeypatch):
+    assert profiles.ipv6_fast_ready("n3.xlarge.x86") is False
+    assert profiles.ipv6_fast_ready("n3.xlarge.x86", True) is True
+    monkeypatch.setattr(profiles, "PLAN_IPV6_FAST_READY", ("n3.xlarge.x86",))
+    assert profiles.ipv6_fast_ready("N3.xlarge.x86") is True
+    assert profiles.ipv6_fast_ready("n3.xlarge.x86", False) is False
+
+
+def test_sysctl_settings_ipv6_fast_ready():
+    settings = profiles.sysctl_settings(
+        None, {"net.ipv6.conf.default.use_optimistic": None}, ipv6_fast_ready=True
+    )
+    assert settings["net.ipv6.conf.default.optimistic_dad"] == 1
+    assert "net.ipv6.conf.default.use_optimistic" not in settings
+    assert "net.ipv6.conf.default.optimistic_dad" not in profiles.sysctl_settings()
+
+
+def test_sysctl_settings_ipv6_fast_ready_link():
+    settings = profiles.sysctl_settings(None, ipv6_fast_ready=True, link="bond0")
+    assert settings["net.ipv6.conf.default.use_optimistic"] == 1
+    assert settings["net.ipv6.conf.bond0.optimistic_dad"] == 1
+    assert settings["net.ipv6.conf.bond0.use_optimistic"] == 1
+    assert "net.ipv6.conf.bond0.optimistic_dad" not in profiles.sysctl_settings(
+        link="bond0"
+    )
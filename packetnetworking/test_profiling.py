@@ -0,0 +1,65 @@
+import pstats
+
+import pytest
+
+from . import profiling
+
+
+def leaf():
+    return sum(range(1000))
+
+
+def branch():
+    return leaf() + leaf()
+
+
+def test_collapsed_stack_profiler_records_stacks():
+    profiler = profiling.CollapsedStackProfiler()
+    profiler.enable()
+    branch()
+    profiler.disable()
+
+    branch_label = "{}:branch:{}".format(__name__, branch.__code__.co_firstlineno)
+    leaf_label = "{}:leaf:{}".format(__name__, leaf.__code__.co_firstlineno)
+    assert (branch_label,) in profiler.stacks
+    assert (branch_label, leaf_label) in profiler.stacks
+
+
+def test_profiler_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        profiling.Profiler("out.prof", "svg")
+
+
+def test_profiler_writes_pstats(tmp_path):
+    path = str(tmp_path / "run.prof")
+    with profiling.Profiler(path):
+        branch()
+
+    stats = pstats.Stats(path)
+    assert any(func[2] == "leaf" for func in stats.stats)
+
+
+def test_profiler_writes_collapsed_stacks(tmp_path):
+    path = tmp_path / "run.folded"
+    with profiling.Profiler(str(path), "collapsed"):
+        for _ in range(200):
+            branch()
+
+    lines = path.read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, micros = line.rsplit(" ", 1)
+        assert int(micros) > 0
+    assert any(":leaf:" in line for line in lines)
+
+
+def test_profiler_writes_memory_report(tmp_path):
+    path = str(tmp_path / "run.prof")
+    profiler = profiling.Profiler(path, memory_top=3)
+    with profiler:
+        [bytearray(1024) for _ in range(100)]
+
+    with open(profiler.memory_path) as f:
+        report = f.read().splitlines()
+    assert report[0].startswith("current=")
+    assert 1 <= len(report[1:]) <= 3
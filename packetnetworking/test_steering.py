@@ -0,0 +1,71 @@
+import pytest
+
+from . import steering
+
+
+@pytest.mark.parametrize(
+    "cpulist,cpus",
+    [("0", [0]), ("0-3", [0, 1, 2, 3]), ("0-1,8,10-11\n", [0, 1, 8, 10, 11]), ("", [])],
+)
+def test_parse_cpulist(cpulist, cpus):
+    assert steering.parse_cpulist(cpulist) == cpus
+
+
+@pytest.mark.parametrize(
+    "cpus,mask",
+    [
+        ([0], "1"),
+        ([0, 1, 2, 3], "f"),
+        ([4, 5, 6, 7], "f0"),
+        ([32], "1,00000000"),
+        ([0, 33, 70], "40,00000002,00000001"),
+    ],
+)
+def test_cpu_mask(cpus, mask):
+    assert steering.cpu_mask(cpus) == mask
+
+
+def test_split():
+    assert steering.split([0, 1, 2, 3, 4], 2) == [[0, 1, 2], [3, 4]]
+    assert steering.split([0, 1], 3) == [[0], [1], [0]]
+    assert steering.split([0, 1], 0) == []
+
+
+def test_read_topology(tmp_path):
+    for node, cpulist in ((0, "0-3"), (1, "4-7")):
+        path = tmp_path / "devices" / "system" / "node" / "node{}".format(node)
+        path.mkdir(parents=True)
+        (path / "cpulist").write_text(cpulist + "\n")
+    assert steering.read_topology(str(tmp_path)) == {0: [0, 1, 2, 3], 1: [4, 5, 6, 7]}
+
+
+def test_read_topology_without_numa(tmp_path):
+    path = tmp_path / "devices" / "system" / "cpu"
+    path.mkdir(parents=True)
+    (path / "online").write_text("0-1\n")
+    assert steering.read_topology(str(tmp_path)) == {0: [0, 1]}
+
+
+def test_plan_uses_numa_local_cpus():
+    topology = {0: [0, 1, 2, 3], 1: [4, 5, 6, 7]}
+    hardware = {"numa_node": 1, "rx_queues": 2, "tx_queues": 4}
+    assert steering.plan(hardware, topology) == {
+        "cpus": [4, 5, 6, 7],
+        "rps": ["30", "c0"],
+        "xps": ["10", "20", "40", "80"],
+    }
+
+
+def test_plan_without_numa_node_uses_all_cpus():
+    topology = {0: [0, 1], 1: [2, 3]}
+    hardware = {"numa_node": None, "rx_queues": 1, "tx_queues": 1}
+    assert steering.plan(hardware, topology) == {
+        "cpus": [0, 1, 2, 3],
+        "rps": ["f"],
+        "xps": ["f"],
+    }
+
+
+def test_plan_without_queues():
+    assert steering.plan({"rx_queues": None}, {0: [0]}) is None
+    assert steering.plan(None, {0: [0]}) is None
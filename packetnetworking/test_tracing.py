@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from . import tracing
+
+
+@pytest.fixture
+def tracer():
+    tracer = tracing.enable(traceparent="")
+    yield tracer
+    tracing.disable()
+
+
+def test_span_is_noop_when_disabled():
+    assert tracing.get_tracer() is None
+    with tracing.span("disabled", key="value") as span:
+        span.set_attribute("other", 1)
+    assert span is tracing.NOOP_SPAN
+
+
+def test_spans_are_nested(tracer):
+    with tracing.span("parent") as parent:
+        with tracing.span("child", iface="enp0") as child:
+            pass
+
+    assert tracer.spans == [child, parent]
+    assert parent.parent_span_id is None
+    assert child.parent_span_id == parent.span_id
+    assert child.attributes == {"iface": "enp0"}
+
+
+def test_span_records_errors(tracer):
+    with pytest.raises(LookupError):
+        with tracing.span("failing"):
+            raise LookupError("no interfaces")
+
+    otlp = tracer.spans[0].as_otlp()
+    assert otlp["status"] == {
+        "code": tracing.STATUS_CODE_ERROR,
+        "message": "LookupError: no interfaces",
+    }
+
+
+def test_tracer_continues_traceparent():
+    tracer = tracing.Tracer.from_traceparent(
+        "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    )
+    with tracer.span("child") as span:
+        pass
+
+    assert tracer.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert span.parent_span_id == "b7ad6b7169203331"
+
+
+def test_tracer_ignores_malformed_traceparent():
+    tracer = tracing.Tracer.from_traceparent("garbage")
+    assert len(tracer.trace_id) == 32
+    assert tracer.parent_span_id is None
+
+
+def test_tracer_exports_otlp_json(tracer, tmp_path):
+    with tracing.span("write", path="etc/hostname", bytes=12, ok=True):
+        pass
+
+    target = tmp_path / "trace.json"
+    tracer.export(str(target))
+    with open(str(target)) as f:
+        exported = json.load(f)
+
+    resource_spans = exported["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "packet-networking"}}
+    ]
+    span = resource_spans["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "write"
+    assert span["traceId"] == tracer.trace_id
+    assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+    assert span["attributes"] == [
+        {"key": "path", "value": {"stringValue": "etc/hostname"}},
+        {"key": "bytes", "value": {"intValue": "12"}},
+        {"key": "ok", "value": {"boolValue": True}},
+    ]
@@ -1,5 +1,8 @@
 from . import utils
 from unittest.mock import patch
+import ipaddress
+import sys
+import types
 
 import pytest
 
@@ -85,3 +88,330 @@ def test_resolve_path(
     assert mocked_readlink.call_count == readlinkcnt
     if not recerr:
         assert result == expected
+
+
+@pytest.mark.parametrize(
+    "discovery,expected",
+    [
+        pytest.param(None, ["enp0", "enp1", "enp2"], id="No filter"),
+        pytest.param(
+            utils.DiscoveryFilter(macs=["00:0C:29:51:53:A1"]), ["enp0"], id="MACs"
+        ),
+        pytest.param(
+            utils.DiscoveryFilter(drivers=["ixgbe"]), ["enp1", "enp2"], id="Drivers"
+        ),
+        pytest.param(
+            utils.DiscoveryFilter(
+                macs=["00:0c:29:51:53:a1", "00:0c:29:51:53:a2"], drivers=["ixgbe"]
+            ),
+            ["enp1"],
+            id="MACs and drivers",
+        ),
+    ],
+)
+def test_get_devices_info_filters_drivers_and_macs(fake_sysfs, discovery, expected):
+    fake_sysfs.add_netdev("enp0", "00:0c:29:51:53:a1", driver="mlx5_core")
+    fake_sysfs.add_netdev("enp1", "00:0c:29:51:53:a2", driver="ixgbe")
+    fake_sysfs.add_netdev("enp2", "00:0c:29:51:53:a3", driver="ixgbe")
+    fake_sysfs.add_netdev("veth0", "00:0c:29:51:53:a4", driver="veth")
+    nics = utils.get_devices_info(discovery)
+    assert sorted(nic["logicalname"] for nic in nics) == expected
+
+
+def test_discovery_filter_restrictions_intersect():
+    discovery = utils.DiscoveryFilter(macs=["00:0c:29:51:53:a1", "00:0c:29:51:53:a2"])
+    discovery.restrict_macs(["00:0C:29:51:53:A2", "00:0c:29:51:53:a3"])
+    assert discovery.macs == {"00:0c:29:51:53:a2"}
+
+
+@pytest.fixture
+def populated_sysfs(fake_sysfs):
+    fake_sysfs.add_netdev("enp0", "00:0c:29:51:53:a1", driver="ixgbe")
+    fake_sysfs.add_netdev("enp1", "00:0c:29:51:53:a2", driver="ixgbe")
+    fake_sysfs.add_netdev("enp2", "00:0c:29:51:53:a3", driver="virtio-pci")
+    fake_sysfs.add_netdev("lo", "00:00:00:00:00:00")
+    fake_sysfs.add_netdev("docker0", "02:42:ac:11:00:01")
+    for i in range(50):
+        fake_sysfs.add_netdev("veth{}".format(i), "02:42:ac:11:01:{:02x}".format(i))
+    return fake_sysfs
+
+
+def test_get_devices_info_skips_virtual_and_ignored_devices(populated_sysfs):
+    with patch("builtins.print") as mocked_print:
+        devs = utils.get_devices_info()
+
+    mocked_print.assert_not_called()
+    assert sorted(devs, key=lambda dev: dev["logicalname"]) == [
+        {
+            "logicalname": "enp0",
+            "mac": "00:0c:29:51:53:a1",
+            "driver": "ixgbe",
+            "ifindex": 2,
+        },
+        {
+            "logicalname": "enp1",
+            "mac": "00:0c:29:51:53:a2",
+            "driver": "ixgbe",
+            "ifindex": 3,
+        },
+    ]
+
+
+def test_get_devices_info_applies_discovery_filter(populated_sysfs):
+    discovery = utils.DiscoveryFilter(macs=["00:0c:29:51:53:a2"])
+    devs = utils.get_devices_info(discovery)
+    assert [dev["logicalname"] for dev in devs] == ["enp1"]
+
+
+def test_get_interfaces_scans_once_and_follows_renames(populated_sysfs):
+    renamed = {2: "eno1", 3: "eno2"}
+    udev_info = {
+        "eno1": [b"E: ID_NET_NAME_ONBOARD=eno1", b"E: ID_NET_NAME_MAC=enx000c295153a1"],
+        "eno2": [b"E: ID_NET_NAME_PATH=enp3s0f1"],
+    }
+    # fmt: off
+    with patch.object(utils, "get_devices_info", wraps=utils.get_devices_info) as scan, \
+            patch("subprocess.run") as mocked_run, \
+            patch("socket.if_indextoname", side_effect=renamed.get), \
+            patch.object(utils, "get_udev_info", side_effect=udev_info.get), \
+            patch.object(utils.probe, "probe", return_value={}):
+        mocked_run.return_value.returncode = 0
+        nics = utils.get_interfaces()
+    # fmt: on
+
+    scan.assert_called_once()
+    commands = [c.args[0] for c in mocked_run.call_args_list]
+    assert commands.count(["udevadm", "settle"]) == 1
+    assert len([c for c in commands if c[:2] == ["udevadm", "test"]]) == 2
+    nics = sorted(nics, key=lambda nic: nic["mac"])
+    assert [nic["name"] for nic in nics] == ["eno1", "enp3s0f1"]
+    assert [nic["names"]["LOGICAL"] for nic in nics] == ["eno1", "eno2"]
+
+
+def test_current_name_falls_back_to_scanned_name():
+    with patch("socket.if_indextoname", side_effect=OSError):
+        assert utils.current_name({"logicalname": "enp0", "ifindex": 9}) == "enp0"
+    assert utils.current_name({"logicalname": "enp0"}) == "enp0"
+
+
+def test_get_interfaces_records_link_state(fake_sysfs):
+    fake_sysfs.add_netdev(
+        "enp0",
+        "00:0c:29:51:53:a1",
+        driver="ixgbe",
+        carrier=1,
+        operstate="up",
+        speed=10000,
+    )
+    fake_sysfs.add_netdev("enp1", "00:0c:29:51:53:a2", driver="ixgbe", operstate="down")
+    # fmt: off
+    with patch("subprocess.run") as mocked_run, \
+            patch("socket.if_indextoname", side_effect=OSError), \
+            patch.object(utils, "get_udev_info", return_value=[]), \
+            patch.object(utils.probe, "ethtool_drvinfo", return_value=None), \
+            patch.object(utils.probe, "lshw_firmware", return_value=None):
+        mocked_run.return_value.returncode = 0
+        nics = utils.get_interfaces()
+    # fmt: on
+
+    nics = {nic["names"]["LOGICAL"]: nic for nic in nics}
+    assert nics["enp0"]["carrier"] is True
+    assert nics["enp0"]["operstate"] == "up"
+    assert nics["enp0"]["speed"] == 10000
+    assert nics["enp1"]["carrier"] is None
+    assert nics["enp1"]["operstate"] == "down"
+    assert nics["enp1"]["speed"] is None
+
+
+@pytest.mark.parametrize(
+    "carrier,rank", [(True, 0), (None, 1), (False, 2)], ids=["up", "unknown", "down"]
+)
+def test_link_rank(carrier, rank):
+    assert utils.link_rank({"carrier": carrier}) == rank
+    if carrier is None:
+        assert utils.link_rank({}) == rank
+
+
+NIC_TUNING = {
+    "rings": {"rx": 4096, "tx": 4096},
+    "channels": {"combined": 16},
+    "offloads": {"gro": True, "lro": False},
+    "coalesce": {"adaptive_rx": False, "rx_usecs": 50},
+}
+
+
+def test_ethtool_commands():
+    assert utils.ethtool_commands("enp0", NIC_TUNING) == [
+        "-G enp0 rx 4096 tx 4096",
+        "-L enp0 combined 16",
+        "-K enp0 gro on lro off",
+        "-C enp0 adaptive-rx off rx-usecs 50",
+    ]
+    empty = {"rings": {}, "channels": {}, "offloads": {}, "coalesce": {}}
+    assert utils.ethtool_commands("enp0", empty) == []
+
+
+def test_systemd_link_tuning():
+    assert utils.systemd_link_tuning(NIC_TUNING) == [
+        ("RxBufferSize", 4096),
+        ("TxBufferSize", 4096),
+        ("CombinedChannels", 16),
+        ("GenericReceiveOffload", "yes"),
+        ("LargeReceiveOffload", "no"),
+        ("UseAdaptiveRxCoalesce", "no"),
+        ("RxCoalesceSec", "50us"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "subnets,expected",
+    [
+        (["10.0.0.0/8"], ["10.0.0.0/8"]),
+        (["192.168.1.0/24", "192.168.0.0/24"], ["192.168.0.0/23"]),
+        (
+            ["10.1.0.0/16", "172.16.0.0/12", "10.0.0.0/8"],
+            ["10.0.0.0/8", "172.16.0.0/12"],
+        ),
+        (["192.168.5.0/24", "172.16.0.0/12"], ["192.168.5.0/24", "172.16.0.0/12"]),
+        (["10.0.0.1/8", "bogus", "fd00::/8"], ["10.0.0.0/8"]),
+        ([], []),
+    ],
+    ids=["single", "adjacent", "contained", "order", "invalid", "empty"],
+)
+def test_collapse_subnets(subnets, expected):
+    assert utils.collapse_subnets(subnets) == expected
+
+
+def test_collapse_subnets_drops_onlink_subnets():
+    subnets = ["10.0.0.0/8", "10.70.12.0/30", "192.168.0.0/16"]
+    onlink = ["10.70.12.0/29", "2604:1380::/127"]
+    assert utils.collapse_subnets(subnets, onlink) == ["10.0.0.0/8", "192.168.0.0/16"]
+
+
+def test_parse_nameservers():
+    lines = [
+        "# generated\n",
+        "nameserver 147.75.207.207\n",
+        "nameserver 2001:4860:4860::8888\n",
+        "nameserver fe80::1%eth0\n",
+        "nameserver 147.75.207.208%eth0\n",
+        "nameserver fe80::2%\n",
+        "nameserver not-an-address\n",
+        "search example.com\n",
+        "options rotate\n",
+    ]
+    assert utils.parse_nameservers(lines) == (
+        "147.75.207.207",
+        "2001:4860:4860::8888",
+        "fe80::1%eth0",
+    )
+
+
+def test_parse_nameservers_keeps_zones_without_zone_support():
+    real_ip_address = ipaddress.ip_address
+
+    def ip_address(address):
+        if "%" in address:
+            raise ValueError("zones need python 3.9")
+        return real_ip_address(address)
+
+    with patch("ipaddress.ip_address", side_effect=ip_address):
+        assert utils.parse_nameservers(["nameserver fe80::1%eth0\n"]) == (
+            "fe80::1%eth0",
+        )
+
+
+def test_split_resolvers():
+    resolvers = [
+        "147.75.207.207",
+        "2001:4860:4860::8888",
+        "147.75.207.208",
+        "fe80::1%eth0",
+    ]
+    assert utils.split_resolvers(resolvers) == (
+        ["147.75.207.207", "147.75.207.208"],
+        ["2001:4860:4860::8888", "fe80::1%eth0"],
+    )
+
+
+def test_systemd_bond_options():
+    options = {
+        "mode": 4,
+        "miimon": 100,
+        "xmit_hash_policy": "layer3+4",
+        "lacp_rate": 1,
+        "ad_select": "bandwidth",
+        "min_links": 1,
+        "arp_ip_target": "10.0.0.1,10.0.0.2",
+        "unknown": 1,
+    }
+    assert utils.systemd_bond_options(options) == [
+        ("Mode", "802.3ad"),
+        ("MIIMonitorSec", "100ms"),
+        ("TransmitHashPolicy", "layer3+4"),
+        ("LACPTransmitRate", "fast"),
+        ("AdSelect", "bandwidth"),
+        ("MinLinks", 1),
+        ("ARPIPTargets", "10.0.0.1 10.0.0.2"),
+    ]
+    assert utils.systemd_bond_options({"mode": "active-backup"}) == [
+        ("Mode", "active-backup")
+    ]
+
+
+def test_netplan_bond_parameters():
+    options = {
+        "mode": "active-backup",
+        "miimon": 100,
+        "xmit_hash_policy": "layer3+4",
+        "arp_ip_target": "10.0.0.1,10.0.0.2",
+        "unknown": 1,
+    }
+    assert utils.netplan_bond_parameters(options) == [
+        ("mode", '"active-backup"'),
+        ("mii-monitor-interval", 100),
+        ("transmit-hash-policy", '"layer3+4"'),
+        ("arp-ip-targets", "[10.0.0.1, 10.0.0.2]"),
+    ]
+    assert utils.netplan_bond_parameters({"mode": 4, "lacp_rate": 1}) == [
+        ("mode", '"802.3ad"'),
+        ("lacp-rate", '"fast"'),
+    ]
+
+
+def test_netplan_offloads():
+    tuning = {"rings": {"rx": 4096}, "offloads": {"gro": True, "lro": False}}
+    assert utils.netplan_offloads(tuning) == [
+        ("generic-receive-offload", "true"),
+        ("large-receive-offload", "false"),
+    ]
+
+
+def test_networkmanager_ethtool():
+    tuning = {
+        "rings": {"rx": 4096},
+        "channels": {"combined": 8},
+        "offloads": {"gro": True, "lro": False},
+        "coalesce": {"adaptive_rx": False, "rx_usecs": 50},
+    }
+    assert utils.networkmanager_ethtool(tuning) == [
+        ("ring-rx", 4096),
+        ("channels-combined", 8),
+        ("feature-gro", "true"),
+        ("feature-lro", "false"),
+        ("coalesce-adaptive-rx", 0),
+        ("coalesce-rx-usecs", 50),
+    ]
+
+
+def test_entry_points_falls_back_to_importlib_metadata(monkeypatch):
+    import importlib
+
+    ep = object()
+    backport = types.SimpleNamespace(
+        entry_points=lambda: {"packetnetworking.distros": [ep]}
+    )
+    monkeypatch.delattr(importlib, "metadata")
+    monkeypatch.setitem(sys.modules, "importlib.metadata", None)
+    monkeypatch.setitem(sys.modules, "importlib_metadata", backport)
+    assert utils.entry_points("packetnetworking.distros") == [ep]
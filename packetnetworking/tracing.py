@@ -0,0 +1,184 @@
+"""
+Optional span recording for provisioning runs.
+
+Nothing is recorded until `enable` is called, until then `span` hands back a
+shared no-op context manager so instrumented code pays for a single global
+lookup. Recorded spans are exported as OTLP/JSON, either to a file or to an
+OTLP/HTTP collector (`http(s)://.../v1/traces`).
+"""
+import logging
+import os
+import time
+
+log = logging.getLogger()
+
+SERVICE_NAME = "packet-networking"
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_ERROR = 2
+
+_tracer = None
+
+
+class NoopSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_attributes(attributes):
+    return [{"key": k, "value": otlp_value(v)} for k, v in attributes.items()]
+
+
+class Span(object):
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = dict(attributes)
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = None
+        self.start = None
+        self.end = None
+        self.error = None
+
+    def __enter__(self):
+        self.parent_span_id = self.tracer.current_span_id()
+        self.tracer.stack.append(self)
+        self.start = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.time_ns()
+        if exc_type is not None:
+            self.error = "{}: {}".format(exc_type.__name__, exc)
+        self.tracer.stack.remove(self)
+        self.tracer.spans.append(self)
+        return False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def as_otlp(self):
+        span = {
+            "traceId": self.tracer.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": otlp_attributes(self.attributes),
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.error:
+            span["status"] = {"code": STATUS_CODE_ERROR, "message": self.error}
+        return span
+
+
+class Tracer(object):
+    def __init__(self, trace_id=None, parent_span_id=None, resource=None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.parent_span_id = parent_span_id
+        self.resource = {"service.name": SERVICE_NAME}
+        self.resource.update(resource or {})
+        self.spans = []
+        self.stack = []
+
+    @classmethod
+    def from_traceparent(cls, traceparent, **kwargs):
+        """
+        Continues the trace of a W3C `traceparent` header value
+        (`00-<trace-id>-<parent-id>-<flags>`), so spans are stitched into the
+        provisioning trace that launched us.
+        """
+        try:
+            _, trace_id, parent_span_id, _ = traceparent.strip().split("-")
+        except (AttributeError, ValueError):
+            log.warning("Ignoring malformed traceparent '{}'".format(traceparent))
+            return cls(**kwargs)
+        return cls(trace_id=trace_id, parent_span_id=parent_span_id, **kwargs)
+
+    def current_span_id(self):
+        if self.stack:
+            return self.stack[-1].span_id
+        return self.parent_span_id
+
+    def span(self, name, **attributes):
+        return Span(self, name, attributes)
+
+    def as_otlp(self):
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": otlp_attributes(self.resource)},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [span.as_otlp() for span in self.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, target):
+        """
+        Writes the recorded spans to `target`, POSTing them when it is an
+        http(s) URL and writing a JSON file otherwise.
+        """
+        import json
+
+        payload = self.as_otlp()
+        if target.startswith(("http://", "https://")):
+            import requests
+
+            response = requests.post(target, json=payload, timeout=10)
+            response.raise_for_status()
+        else:
+            with open(target, "w") as f:
+                json.dump(payload, f)
+        log.debug("Exported {:d} spans to '{}'".format(len(self.spans), target))
+        return payload
+
+
+def enable(traceparent=None, **kwargs):
+    global _tracer
+    traceparent = traceparent or os.environ.get("TRACEPARENT")
+    if traceparent:
+        _tracer = Tracer.from_traceparent(traceparent, **kwargs)
+    else:
+        _tracer = Tracer(**kwargs)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+def span(name, **attributes):
+    if _tracer is None:
+        return NOOP_SPAN
+    return _tracer.span(name, **attributes)
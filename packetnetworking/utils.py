@@ -1,13 +1,22 @@
-import json
+import importlib
+import ipaddress
+import logging
 import os
-import re
+import socket
 import subprocess
 import sys
 from textwrap import dedent
 
 import click
 
+from . import probe
+from . import tracing
+
+log = logging.getLogger()
+
 MAX_RESOLVE_DEPTH = 10
+WAIT_FOR_LINK = "usr/local/sbin/wait-for-link"
+SYSFS_NET = "/sys/class/net/"
 package_dir = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
 
 
@@ -154,6 +163,36 @@ class Tasks(object):
         t["template_path"] = path
         return t
 
+    def task_symlink(self, task, target):
+        self.tasks[task] = {"symlink": target}
+        return self.tasks[task]
+
+
+def entry_points(group):
+    """
+    Returns the installed setuptools entry points registered under `group`.
+    """
+    try:
+        from importlib import metadata
+    except ImportError:  # python 3.7
+        import importlib_metadata as metadata
+
+    eps = metadata.entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=group))
+    return list(eps.get(group, []))
+
+
+def import_path(path):
+    """
+    Imports and returns the object referenced by a 'module:attribute' path.
+    """
+    module, _, attr = path.partition(":")
+    obj = importlib.import_module(module)
+    for name in attr.split(".") if attr else []:
+        obj = getattr(obj, name)
+    return obj
+
 
 def jfind(j, fn):
     result = []
@@ -202,6 +241,197 @@ def generated_header(prefix="#"):
     ).strip()
 
 
+ETHTOOL_FLAGS = {"rings": "-G", "channels": "-L", "offloads": "-K", "coalesce": "-C"}
+
+SYSTEMD_LINK_TUNING = {
+    ("rings", "rx"): "RxBufferSize",
+    ("rings", "tx"): "TxBufferSize",
+    ("channels", "combined"): "CombinedChannels",
+    ("channels", "rx"): "RxChannels",
+    ("channels", "tx"): "TxChannels",
+    ("offloads", "gro"): "GenericReceiveOffload",
+    ("offloads", "gso"): "GenericSegmentationOffload",
+    ("offloads", "tso"): "TCPSegmentationOffload",
+    ("offloads", "lro"): "LargeReceiveOffload",
+    ("coalesce", "adaptive_rx"): "UseAdaptiveRxCoalesce",
+    ("coalesce", "adaptive_tx"): "UseAdaptiveTxCoalesce",
+    ("coalesce", "rx_usecs"): "RxCoalesceSec",
+    ("coalesce", "tx_usecs"): "TxCoalesceSec",
+}
+
+
+def ethtool_commands(iface, tuning):
+    """
+    Returns the ethtool arguments applying `tuning` to `iface`, one string per
+    ethtool invocation.
+    """
+    commands = []
+    for section, flag in ETHTOOL_FLAGS.items():
+        args = []
+        for key, value in tuning[section].items():
+            if isinstance(value, bool):
+                value = "on" if value else "off"
+            args.append("{} {}".format(key.replace("_", "-"), value))
+        if args:
+            commands.append("{} {} {}".format(flag, iface, " ".join(args)))
+    return commands
+
+
+def systemd_link_tuning(tuning):
+    """
+    Returns the systemd.link [Link] settings applying `tuning`, as (key, value)
+    pairs.
+    """
+    settings = []
+    for (section, key), setting in SYSTEMD_LINK_TUNING.items():
+        value = tuning[section].get(key)
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = "yes" if value else "no"
+        elif key.endswith("_usecs"):
+            value = "{}us".format(value)
+        settings.append((setting, value))
+    return settings
+
+
+# NIC tuning section -> NetworkManager [ethtool] key prefix
+NM_ETHTOOL_PREFIXES = {
+    "rings": "ring",
+    "channels": "channels",
+    "offloads": "feature",
+    "coalesce": "coalesce",
+}
+
+
+def networkmanager_ethtool(tuning):
+    """
+    Returns the NetworkManager keyfile [ethtool] settings applying `tuning`,
+    as (key, value) pairs.
+    """
+    settings = []
+    for section, prefix in NM_ETHTOOL_PREFIXES.items():
+        for key, value in tuning[section].items():
+            if isinstance(value, bool):
+                if section == "offloads":
+                    value = "true" if value else "false"
+                else:
+                    value = int(value)
+            settings.append(("{}-{}".format(prefix, key.replace("_", "-")), value))
+    return settings
+
+
+# bonding driver parameter -> systemd.netdev [Bond] setting
+SYSTEMD_BOND_OPTIONS = {
+    "mode": "Mode",
+    "miimon": "MIIMonitorSec",
+    "downdelay": "DownDelaySec",
+    "updelay": "UpDelaySec",
+    "arp_interval": "ARPIntervalSec",
+    "arp_ip_target": "ARPIPTargets",
+    "xmit_hash_policy": "TransmitHashPolicy",
+    "lacp_rate": "LACPTransmitRate",
+    "ad_select": "AdSelect",
+    "min_links": "MinLinks",
+}
+# options the bonding driver also accepts by number
+BOND_OPTION_NAMES = {
+    "mode": (
+        "balance-rr",
+        "active-backup",
+        "balance-xor",
+        "broadcast",
+        "802.3ad",
+        "balance-tlb",
+        "balance-alb",
+    ),
+    "lacp_rate": ("slow", "fast"),
+    "ad_select": ("stable", "bandwidth", "count"),
+}
+BOND_MS_OPTIONS = ("miimon", "downdelay", "updelay", "arp_interval")
+
+
+def bond_option_name(key, value):
+    """
+    Returns the name of bonding option `key`'s `value` when it was given by
+    number, e.g. 802.3ad for mode 4.
+    """
+    if key in BOND_OPTION_NAMES and str(value).isdigit():
+        return BOND_OPTION_NAMES[key][int(value)]
+    return value
+
+
+def systemd_bond_options(options):
+    """
+    Returns the systemd.netdev [Bond] settings for the bonding driver
+    `options`, as (key, value) pairs.
+    """
+    settings = []
+    for key, value in options.items():
+        if key not in SYSTEMD_BOND_OPTIONS:
+            continue
+        value = bond_option_name(key, value)
+        if key in BOND_MS_OPTIONS:
+            value = "{}ms".format(value)
+        elif key == "arp_ip_target":
+            value = str(value).replace(",", " ")
+        settings.append((SYSTEMD_BOND_OPTIONS[key], value))
+    return settings
+
+
+# offload -> netplan ethernet setting
+NETPLAN_OFFLOADS = {
+    "gro": "generic-receive-offload",
+    "gso": "generic-segmentation-offload",
+    "tso": "tcp-segmentation-offload",
+    "lro": "large-receive-offload",
+}
+
+
+def netplan_offloads(tuning):
+    """
+    Returns the netplan ethernet settings applying the offloads of `tuning`,
+    as (key, value) pairs.
+    """
+    return [
+        (NETPLAN_OFFLOADS[key], "true" if value else "false")
+        for key, value in tuning["offloads"].items()
+    ]
+
+
+# bonding driver parameter -> netplan bond `parameters` key
+NETPLAN_BOND_PARAMETERS = {
+    "mode": "mode",
+    "miimon": "mii-monitor-interval",
+    "downdelay": "down-delay",
+    "updelay": "up-delay",
+    "arp_interval": "arp-interval",
+    "arp_ip_target": "arp-ip-targets",
+    "xmit_hash_policy": "transmit-hash-policy",
+    "lacp_rate": "lacp-rate",
+    "ad_select": "ad-select",
+    "min_links": "min-links",
+}
+
+
+def netplan_bond_parameters(options):
+    """
+    Returns the netplan bond `parameters` for the bonding driver `options`, as
+    (key, value) pairs with values rendered as YAML flow scalars.
+    """
+    parameters = []
+    for key, value in options.items():
+        if key not in NETPLAN_BOND_PARAMETERS:
+            continue
+        value = bond_option_name(key, value)
+        if key == "arp_ip_target":
+            value = "[{}]".format(", ".join(str(value).split(",")))
+        elif isinstance(value, str):
+            value = '"{}"'.format(value)
+        parameters.append((NETPLAN_BOND_PARAMETERS[key], value))
+    return parameters
+
+
 def generate_persistent_names_udev():
     persistent_udev = """\
     {{ generated_header() }}
@@ -217,6 +447,233 @@ def generate_persistent_names_udev():
     return {"etc/udev/rules.d/70-persistent-net.rules": persistent_udev}
 
 
+# How NICs get their persistent names: one udev rule per NIC, a single udev
+# rule set keyed on the MAC address, or one systemd .link file per NIC.
+PERSISTENT_NAMES_METHODS = ("udev", "keyed", "link")
+
+
+def generate_persistent_names_keyed():
+    """
+    Same names as `generate_persistent_names_udev`, but events other than
+    physical NICs being added skip every rule and each NIC is matched on its
+    MAC address alone.
+    """
+    persistent_udev = """\
+    {{ generated_header() }}
+    SUBSYSTEM!="net", GOTO="packet_persistent_net_end"
+    ACTION!="add", GOTO="packet_persistent_net_end"
+    # bonds and other virtual devices borrow their slaves' MAC address
+    TEST!="device", GOTO="packet_persistent_net_end"
+    ATTR{type}!="1", GOTO="packet_persistent_net_end"
+    # only the first port of multi-port devices sharing a MAC address
+    ATTR{dev_id}!="0x0", GOTO="packet_persistent_net_end"
+    {% for iface in interfaces %}
+    ATTR{address}=="{{ iface.mac }}", NAME="{{ iface.name }}"
+    {% endfor %}
+    LABEL="packet_persistent_net_end"
+    """
+    return {"etc/udev/rules.d/70-persistent-net.rules": persistent_udev}
+
+
+# A NIC's systemd .link file, for the NIC at index `i` of `interfaces`
+SYSTEMD_LINK = """\
+{{ generated_header() }}
+[Match]
+MACAddress={{ interfaces[i].mac }}
+
+[Link]
+Name={{ interfaces[i].name }}
+{% if interfaces[i].mtu %}
+MTUBytes={{ interfaces[i].mtu }}
+{% endif %}
+{% for key, value in systemd_link_tuning(interfaces[i].tuning) %}
+{{ key }}={{ value }}
+{% endfor %}
+"""
+
+
+def generate_persistent_names_link(interfaces):
+    """
+    Names NICs with systemd .link files, applied by udev's net_setup_link
+    builtin rather than by extra rules. The files carry the NIC's MTU and
+    tuning as well, since only the first .link file matching a NIC is used.
+    """
+    return {
+        "etc/systemd/network/70-{}.link".format(iface["name"]): {
+            "template": SYSTEMD_LINK,
+            "context": {"i": i},
+        }
+        for i, iface in enumerate(interfaces)
+    }
+
+
+def generate_persistent_names(method, interfaces):
+    """
+    Returns the tasks naming `interfaces` with `method`, one of
+    `PERSISTENT_NAMES_METHODS`, per NIC udev rules if it's unset.
+    """
+    if method == "link":
+        return generate_persistent_names_link(interfaces)
+    if method == "keyed":
+        return generate_persistent_names_keyed()
+    return generate_persistent_names_udev()
+
+
+def generate_wait_for_link():
+    wait_for_link = """\
+    #!/bin/sh
+    {{ generated_header() }}
+    #
+    # Usage: wait-for-link IFACE [TIMEOUT]
+    #
+    # Waits up to TIMEOUT seconds for IFACE to report carrier. Returns right
+    # away if IFACE isn't up, or if waiting on it already timed out during this
+    # boot, so a NIC without link only delays bring-up once.
+
+    iface="$1"
+    timeout="${2:-4}"
+    sysfs="${SYSFS:-/sys}/class/net/$iface"
+    marker="${RUNDIR:-/run}/wait-for-link.$iface.timedout"
+
+    [ -e "$marker" ] && exit 0
+    [ -r "$sysfs/flags" ] || exit 0
+    [ $(( $(cat "$sysfs/flags") & 1 )) -eq 1 ] || exit 0
+
+    tries=$((timeout * 10))
+    while [ "$tries" -gt 0 ]; do
+        [ "$(cat "$sysfs/carrier" 2>/dev/null)" = 1 ] && exit 0
+        sleep 0.1
+        tries=$((tries - 1))
+    done
+    touch "$marker" 2>/dev/null
+    exit 0
+    """
+    return {WAIT_FOR_LINK: {"template": wait_for_link, "mode": 0o755}}
+
+
+STEERING_SCRIPT = "usr/local/sbin/packet-steering"
+SYSCTL_CONF = "etc/sysctl.d/60-packet-network.conf"
+PRIVATE_ROUTES = "etc/network/private-routes"
+
+
+def generate_steering_script(name_attr="name"):
+    script = """\
+    #!/bin/sh
+    {{ generated_header() }}
+    #
+    # Usage: packet-steering [IFACE...]
+    #
+    # Spreads the receive and transmit queues (RPS/XPS) and the interrupts of
+    # the NICs over the CPUs of their NUMA node, of every NIC if none is given.
+
+    SYSFS="${SYSFS:-/sys}"
+    PROCFS="${PROCFS:-/proc}"
+
+    set_queue() {
+        queue="$SYSFS/class/net/$1/queues/$2"
+        [ -e "$queue" ] && echo "$3" > "$queue"
+    }
+
+    set_irqs() {
+        dir="$SYSFS/class/net/$1/device/msi_irqs"
+        [ -d "$dir" ] || return 0
+        cpus="$2"
+        set -- $cpus
+        for irq in $(ls "$dir" | sort -n); do
+            [ $# -gt 0 ] || set -- $cpus
+            # managed interrupts can't be moved, leave those to the kernel
+            echo "$1" > "$PROCFS/irq/$irq/smp_affinity_list" 2>/dev/null
+            shift
+        done
+    }
+
+    steer() {
+        case "$1" in
+        {% for iface in interfaces if iface.steering %}
+        {{ iface[name_attr] }})
+            {% for mask in iface.steering.rps %}
+            set_queue {{ iface[name_attr] }} rx-{{ loop.index0 }}/rps_cpus {{ mask }}
+            {% endfor %}
+            {% for mask in iface.steering.xps %}
+            set_queue {{ iface[name_attr] }} tx-{{ loop.index0 }}/xps_cpus {{ mask }}
+            {% endfor %}
+            set_irqs {{ iface[name_attr] }} "{{ iface.steering.cpus | join(" ") }}"
+            ;;
+        {% endfor %}
+        esac
+    }
+
+    if [ $# -eq 0 ]; then
+        set -- {{ interfaces | selectattr("steering") | map(attribute=name_attr) | join(" ") }}
+    fi
+    for iface in "$@"; do
+        steer "$iface"
+    done
+    """
+    return {
+        STEERING_SCRIPT: {
+            "template": script,
+            "mode": 0o755,
+            "context": {"name_attr": name_attr},
+        }
+    }
+
+
+def generate_steering_udev():
+    # NICs are matched by MAC, by the time RUN runs $name is their final name
+    # whichever rule (or .link file) assigned it
+    rules = """\
+    {{ generated_header() }}
+    {% for iface in interfaces if iface.steering %}
+    SUBSYSTEM=="net", ACTION=="add", TEST=="device", ATTR{address}=="{{ iface.mac | lower }}", RUN+="/usr/local/sbin/packet-steering $name"
+    {% endfor %}
+    """  # noqa
+    tasks = generate_steering_script()
+    tasks["etc/udev/rules.d/71-packet-steering.rules"] = rules
+    return tasks
+
+
+def generate_steering_local_d():
+    start = """\
+    #!/bin/sh
+    {{ generated_header() }}
+
+    /usr/local/sbin/packet-steering
+    """
+    tasks = generate_steering_script("meta_name")
+    tasks["etc/local.d/packet-steering.start"] = {"template": start, "mode": 0o755}
+    # local.d scripts only run once OpenRC's local service is enabled
+    tasks["etc/runlevels/default/local"] = {"symlink": "/etc/init.d/local"}
+    return tasks
+
+
+def generate_private_routes():
+    """
+    Returns `ip -batch` files adding (.up) and removing (.down) the routes to
+    the private subnets, so they're installed by a single ip process.
+    """
+    routes = """\
+    {{ generated_header() }}
+    {% for subnet in private_subnets | sort %}
+    route {{ action }} {{ subnet }} via {{ ip4priv.gateway }}
+    {% endfor %}
+    """
+    return {
+        PRIVATE_ROUTES + ".up": {"template": routes, "context": {"action": "add"}},
+        PRIVATE_ROUTES + ".down": {"template": routes, "context": {"action": "del"}},
+    }
+
+
+def generate_sysctl_conf():
+    conf = """\
+    {{ generated_header() }}
+    {% for key, value in net.sysctl.items() %}
+    {{ key }} = {{ value }}
+    {% endfor %}
+    """
+    return {SYSCTL_CONF: conf}
+
+
 def generate_persistent_names_mdev():
     mdevconf = """\
         {{ generated_header() }}
@@ -246,14 +703,87 @@ def generate_persistent_names_mdev():
     }
 
 
+def collapse_subnets(subnets, onlink=()):
+    """
+    Returns the minimal list of IPv4 networks routing `subnets`, in their
+    original order: adjacent ones are merged and contained ones dropped.
+    Entries that don't parse, aren't IPv4 or fall inside one of the `onlink`
+    networks (already reachable without a gateway) are dropped with a warning.
+    """
+    onlink = [ipaddress.ip_network(n, strict=False) for n in onlink]
+    networks = []
+    for subnet in subnets:
+        try:
+            network = ipaddress.ip_network(str(subnet).strip(), strict=False)
+        except ValueError:
+            log.warning("Ignoring invalid private subnet '{}'".format(subnet))
+            continue
+        if network.version != 4:
+            log.warning("Ignoring non IPv4 private subnet '{}'".format(subnet))
+            continue
+        inside = [n for n in onlink if n.version == 4 and network.subnet_of(n)]
+        if inside:
+            log.warning(
+                "Ignoring private subnet '{}', it is on-link through '{}'".format(
+                    subnet, inside[0]
+                )
+            )
+            continue
+        networks.append(network)
+
+    collapsed = list(ipaddress.collapse_addresses(networks))
+
+    # keep the metadata's order, by the first entry each network covers
+    def first_seen(network):
+        return min(i for i, n in enumerate(networks) if n.subnet_of(network))
+
+    return [str(network) for network in sorted(collapsed, key=first_seen)]
+
+
+def nameserver_address(nameserver):
+    """
+    Parses a nameserver, IPv6 ones may carry a zone (`fe80::1%eth0`) which
+    ipaddress only accepts from python 3.9 on, so it's left out.
+    """
+    address, sep, zone = nameserver.partition("%")
+    parsed = ipaddress.ip_address(address)
+    if sep and (parsed.version != 6 or not zone):
+        raise ValueError("Invalid nameserver '{}'".format(nameserver))
+    return parsed
+
+
+def parse_nameservers(lines):
+    """
+    Returns the IPv4 and IPv6 addresses of resolv.conf's `nameserver` lines,
+    IPv6 ones may carry a zone (`fe80::1%eth0`).
+    """
+    nameservers = []
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 2 or fields[0] != "nameserver":
+            continue
+        try:
+            nameserver_address(fields[1])
+        except ValueError:
+            continue
+        nameservers.append(fields[1])
+    return tuple(nameservers)
+
+
+def split_resolvers(resolvers):
+    """
+    Returns the IPv4 and the IPv6 resolvers of `resolvers`.
+    """
+    ipv4 = [r for r in resolvers if nameserver_address(r).version == 4]
+    ipv6 = [r for r in resolvers if nameserver_address(r).version == 6]
+    return ipv4, ipv6
+
+
 def resolvers(default):
     resolvers = ()
     try:
         with open("/etc/resolv.conf") as f:
-            reg = re.compile(r"nameserver ([0-9]+(\.[0-9]+){3})$")
-            resolvers = tuple(
-                [m.group(1) for m in [reg.match(line) for line in f.readlines()] if m]
-            )
+            resolvers = parse_nameservers(f.readlines())
     except Exception:
         pass
     finally:
@@ -263,15 +793,57 @@ def resolvers(default):
     return resolvers
 
 
-def get_interfaces():
-    # let udev discover the nics, some renaming may take place which is why we
-    # don't store the discovered nics
-    for nic in discover_nics(get_devices_info()):
-        udev_update_db(nic["logicalname"])
+class DiscoveryFilter(object):
+    """
+    Restricts which NICs are probed during discovery, hooks can narrow it down
+    from the `pre_discovery` trigger. A field left as None doesn't restrict.
+    """
+
+    def __init__(self, macs=None, drivers=None):
+        self.macs = None
+        self.drivers = None
+        if macs is not None:
+            self.restrict_macs(macs)
+        if drivers is not None:
+            self.restrict_drivers(drivers)
+
+    def restrict_macs(self, macs):
+        macs = {mac.lower() for mac in macs}
+        self.macs = macs if self.macs is None else self.macs & macs
+
+    def restrict_drivers(self, drivers):
+        drivers = set(drivers)
+        self.drivers = drivers if self.drivers is None else self.drivers & drivers
+
+    def allows_driver(self, driver):
+        return self.drivers is None or driver in self.drivers
+
+    def allows(self, dev):
+        if not self.allows_driver(dev["driver"]):
+            return False
+        if self.macs is not None and dev["mac"].lower() not in self.macs:
+            return False
+        return True
+
+
+def get_interfaces(discovery=None):
+    with tracing.span("discovery.get_interfaces"):
+        return _get_interfaces(discovery)
+
+
+def _get_interfaces(discovery=None):
+    devs = get_devices_info(discovery)
+
+    # let udev discover the nics, some renaming may take place so the current
+    # name is looked up by ifindex afterwards rather than scanning again
+    for dev in devs:
+        udev_update_db(dev["logicalname"], settle=False)
+    if devs:
+        udev_settle()
 
     nics = []
-    for nic in discover_nics(get_devices_info()):
-        lname = nic["logicalname"]
+    for dev in devs:
+        lname = current_name(dev)
         name = None
         names = {}
         for line in get_udev_info(lname):
@@ -290,7 +862,11 @@ def get_interfaces():
                 name = names[t]
                 break
 
-        n = {"names": names, "name": name, "mac": nic["mac"], "driver": nic["driver"]}
+        n = {"names": names, "name": name, "mac": dev["mac"], "driver": dev["driver"]}
+        with tracing.span("discovery.probe", iface=lname):
+            n["hardware"] = probe.probe(lname, SYSFS_NET)
+        for key in LINK_STATE_KEYS:
+            n[key] = n["hardware"].get(key)
         # for test-network.py
         if n["driver"] == "dummy":
             n["name"] = lname
@@ -299,16 +875,43 @@ def get_interfaces():
     return nics
 
 
-def udev_update_db(nic):
-    path = "/sys/class/net/" + nic
+LINK_STATE_KEYS = ("carrier", "operstate", "speed")
+
+
+def link_rank(iface):
+    """
+    Sort key for bringing interfaces up, the ones with link first and the ones
+    known to have no carrier last. Link state can't be read from NICs that are
+    still administratively down, those keep their place.
+    """
+    carrier = iface.get("carrier")
+    if carrier is None:
+        return 1
+    return 0 if carrier else 2
+
+
+def current_name(dev):
+    """
+    Returns the name of a device found by get_devices_info, which udev may
+    have renamed since, using its ifindex.
+    """
+    try:
+        return socket.if_indextoname(dev["ifindex"])
+    except (KeyError, OSError):
+        return dev["logicalname"]
+
+
+def udev_update_db(nic, settle=True):
+    path = SYSFS_NET + nic
 
     # udev needs to discover some of the device properties, we let it do so with
     # the `test` sub-command
     stdout = subprocess.DEVNULL
     stderr = subprocess.PIPE
-    ret = subprocess.run(
-        ["udevadm", "test", "--action=add", path], stdout=stdout, stderr=stderr
-    )
+    with tracing.span("discovery.udevadm_test", iface=nic):
+        ret = subprocess.run(
+            ["udevadm", "test", "--action=add", path], stdout=stdout, stderr=stderr
+        )
     if ret.returncode:
         print(
             "udevadm test returned an error:",
@@ -317,40 +920,80 @@ def udev_update_db(nic):
             file=sys.stderr,
         )
 
-    subprocess.run(["udevadm", "settle"])
+    if settle:
+        udev_settle()
+
+
+def udev_settle():
+    with tracing.span("discovery.udevadm_settle"):
+        subprocess.run(["udevadm", "settle"])
 
 
 def get_udev_info(nic):
-    path = "/sys/class/net/" + nic
+    path = SYSFS_NET + nic
     return get_output(["udevadm", "info", path]).splitlines()
 
 
 def get_output(cmd):
     stdout = subprocess.PIPE
-    return subprocess.run(cmd, check=True, stdout=stdout).stdout
+    with tracing.span("discovery." + os.path.basename(cmd[0]), command=" ".join(cmd)):
+        return subprocess.run(cmd, check=True, stdout=stdout).stdout
+
 
+def read_sysfs(path):
+    with open(path) as f:
+        return f.readline().strip()
 
-def get_lshw_info():
-    # Workaround for x.large.arm: Skip framebuffer test ("-disable fb")
-    return json.loads(get_output(["lshw", "-json", "-disable", "fb"]).decode())
 
+def get_devices_info(discovery=None):
+    """
+    Scans SYSFS_NET once for physical NICs.
 
-def get_devices_info():
-    path = "/sys/class/net/"
+    Virtual devices (veths, bridges, bonds, tunnels...) have no `device` link
+    and are dropped by the single readlink needed to find the driver, NICs
+    using an ignored driver or filtered out by `discovery` are dropped before
+    anything else is read.
+    """
     nics = []
-    ifaces = os.listdir(path)
-    for iface in ifaces:
-        try:
-            driver_path = os.readlink(path + iface + "/device/driver")
-            driver = os.path.basename(driver_path)
-        except OSError:
-            continue
+    virtual = 0
+    ignored = 0
+    with os.scandir(SYSFS_NET) as entries:
+        for entry in entries:
+            try:
+                driver = os.path.basename(os.readlink(entry.path + "/device/driver"))
+            except OSError:
+                virtual += 1
+                continue
+
+            if driver in ignored_drivers or (
+                discovery is not None and not discovery.allows_driver(driver)
+            ):
+                ignored += 1
+                continue
 
-        with open(path + iface + "/address") as f:
-            mac = f.readline().strip()
+            n = {
+                "logicalname": entry.name,
+                "mac": read_sysfs(entry.path + "/address"),
+                "driver": driver,
+            }
+            if discovery is not None and not discovery.allows(n):
+                ignored += 1
+                continue
 
-        n = {"logicalname": iface, "mac": mac, "driver": driver}
-        nics.append(n)
+            try:
+                n["ifindex"] = int(read_sysfs(entry.path + "/ifindex"))
+            except (OSError, ValueError):
+                pass
+            nics.append(n)
+
+    log.info(
+        "Discovered {:d} NICs ({}), skipped {:d} virtual and {:d} ignored devices".format(
+            len(nics),
+            " ".join(sorted(nic["logicalname"] for nic in nics)),
+            virtual,
+            ignored,
+        )
+    )
     return nics
 
 
@@ -360,20 +1003,7 @@ def pam(arg, *funcs):
     return map(lambda f: f(arg), *funcs)
 
 
-def discover_nics(devs):
-    ignored_drivers = ("bridge", "veth", "virtio-pci")
-    nics = []
-
-    def is_real_nic(dev):
-        return dev["driver"] not in ignored_drivers
-
-    for dev in devs:
-        print("name={} driver={}".format(dev["logicalname"], dev["driver"]))
-
-        if is_real_nic(dev):
-            nics.append(dev)
-
-    return nics
+ignored_drivers = ("bridge", "veth", "virtio-pci")
 
 
 def get_matched_interfaces(metainterfaces, realinterfaces):